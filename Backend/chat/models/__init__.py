@@ -1,2 +1,4 @@
-# Este archivo es necesario para Django para reconocer la carpeta como un paquete Python
-# No importamos los modelos aquí para evitar importaciones circulares
+# Los modelos están en archivos separados; se importan aquí para que Django los registre al iniciar
+# (antes solo se registraban al cargar las URLs, y los comandos y workers no los veían)
+from chat.models.chat_message import ChatMessage
+from chat.models.chat_attachment import ChatAttachment
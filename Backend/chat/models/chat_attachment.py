@@ -1,8 +1,10 @@
 from django.db import models
+from function.storage import get_attachment_storage
 
 class ChatAttachment(models.Model):
     message = models.ForeignKey('chat.ChatMessage', on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='chat_attachments/')
+    # Almacenamiento por contenido (function/storage.py): un archivo repetido se guarda una sola vez
+    file = models.FileField(upload_to='chat_attachments/', storage=get_attachment_storage, db_index=True)
     file_name = models.CharField(max_length=255)
     upload_date = models.DateTimeField(auto_now_add=True)
     
@@ -0,0 +1,6 @@
+from chat.models.chat_attachment import ChatAttachment
+from function.file_deletion import register_file_cleanup
+
+
+# Los adjuntos eliminados se borran del storage en segundo plano (function/file_deletion.py)
+register_file_cleanup(ChatAttachment)
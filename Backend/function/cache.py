@@ -0,0 +1,252 @@
+"""
+Cache de dos niveles para Optipro.
+L1: LocMemCache del proceso, con TTL corto (evita ir a Redis en lecturas repetidas).
+L2: Redis compartido entre los workers de gunicorn y Celery.
+Si Redis falla, TieredCache sigue funcionando solo con L1 y reintenta después de un tiempo.
+"""
+import logging
+import time
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache(BaseCache):
+    """
+    Backend de cache L1 (memoria local) + L2 (Redis por defecto).
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'function.cache.TieredCache',
+            'LOCATION': 'redis://...',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'L1_TIMEOUT': 5,           # segundos que un valor vive en la memoria del proceso
+                'L1_MAX_ENTRIES': 1000,
+                'L2_BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'L2_OPTIONS': {},
+                'L2_RETRY_AFTER': 30,      # segundos sin usar L2 después de un error
+            },
+        }
+    }
+    Las invalidaciones (delete/incr) limpian L1 solo en el proceso actual; en los demás
+    el valor anterior puede durar como máximo L1_TIMEOUT segundos.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l2_retry_after = options.get('L2_RETRY_AFTER', 30)
+        self._l2_failed_at = None
+
+        shared_params = {
+            'KEY_PREFIX': params.get('KEY_PREFIX', ''),
+            'VERSION': params.get('VERSION', 1),
+            'KEY_FUNCTION': params.get('KEY_FUNCTION'),
+        }
+        self.l1 = LocMemCache(f'tiered-l1-{server}', {
+            **shared_params,
+            'TIMEOUT': self.l1_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000)},
+        })
+
+        l2_backend = import_string(options.get('L2_BACKEND', 'django.core.cache.backends.redis.RedisCache'))
+        self.l2 = l2_backend(server, {
+            **shared_params,
+            'TIMEOUT': params.get('TIMEOUT', 300),
+            'OPTIONS': options.get('L2_OPTIONS', {}),
+        })
+
+    # --- L2 con tolerancia a fallos ---
+
+    def l2_available(self):
+        if self._l2_failed_at is None:
+            return True
+        if time.monotonic() - self._l2_failed_at >= self.l2_retry_after:
+            self._l2_failed_at = None
+            return True
+        return False
+
+    def call_l2(self, method, *args, default=None, **kwargs):
+        if not self.l2_available():
+            return default
+        try:
+            return getattr(self.l2, method)(*args, **kwargs)
+        except ValueError:
+            # incr/decr de una clave que no existe: L2 respondió, no es una falla
+            raise
+        except Exception as e:
+            self._l2_failed_at = time.monotonic()
+            logger.warning(f"Cache L2 no disponible ({method}), usando solo memoria local: {e}")
+            return default
+
+    def get_l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    # --- API de cache ---
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = self.l1.get(key, missing, version=version)
+        if value is not missing:
+            return value
+
+        value = self.call_l2('get', key, missing, version=version, default=missing)
+        if value is missing:
+            return default
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.call_l2('set', key, value, timeout, version=version)
+        self.l1.set(key, value, self.get_l1_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.call_l2('add', key, value, timeout, version=version, default=None)
+        if added is None:
+            # L2 no disponible
+            return self.l1.add(key, value, self.get_l1_timeout(timeout), version=version)
+        if added:
+            self.l1.set(key, value, self.get_l1_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.touch(key, self.get_l1_timeout(timeout), version=version)
+        return self.call_l2('touch', key, timeout, version=version, default=False)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version=version)
+        return self.call_l2('delete', key, version=version, default=False)
+
+    def has_key(self, key, version=None):
+        return self.l1.has_key(key, version=version) or self.call_l2('has_key', key, version=version, default=False)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(key, version=version)
+        if not self.l2_available():
+            raise ValueError(f"Key '{key}' not found")
+        value = self.call_l2('incr', key, delta, version=version, default=None)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.l1.get_many(keys, version=version)
+        pending = [key for key in keys if key not in found]
+        if pending:
+            from_l2 = self.call_l2('get_many', pending, version=version, default={})
+            if from_l2:
+                self.l1.set_many(from_l2, self.l1_timeout, version=version)
+                found.update(from_l2)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.call_l2('set_many', data, timeout, version=version, default=[])
+        self.l1.set_many(data, self.get_l1_timeout(timeout), version=version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l1.delete_many(keys, version=version)
+        self.call_l2('delete_many', keys, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.call_l2('clear')
+
+    # --- Solo L2: valores que todos los procesos deben ver igual apenas cambian ---
+    # (versiones de cache). Si L2 no está disponible retornan None.
+
+    def get_shared(self, key, default=None, version=None):
+        return self.call_l2('get', key, default, version=version, default=None)
+
+    def add_shared(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.call_l2('add', key, value, timeout, version=version, default=None)
+
+    def set_shared(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.call_l2('set', key, value, timeout, version=version, default=None)
+
+    def incr_shared(self, key, delta=1, version=None):
+        return self.call_l2('incr', key, delta, version=version, default=None)
+
+    def close(self, **kwargs):
+        self.call_l2('close', **kwargs)
+
+
+# --- Claves versionadas ---
+# Cada namespace (un modelo o una etiqueta, ver function/response_cache.py) tiene un número
+# de versión en cache; bump_cache_version lo incrementa y todas las claves construidas con la
+# versión anterior dejan de usarse (expiran solas), sin tener que buscarlas ni borrarlas.
+# Las señales que incrementan las versiones se registran con connect_cache_tags.
+
+CACHE_VERSION_KEY = 'cache_version:{namespace}'
+
+
+def get_cache_namespace(model_or_namespace):
+    if isinstance(model_or_namespace, str):
+        return model_or_namespace
+    return model_or_namespace._meta.label_lower
+
+
+def shared_cache_call(method, *args, **kwargs):
+    """
+    Llama al método de la cache sin pasar por la memoria local de TieredCache: las versiones
+    deben verse en todos los procesos apenas cambian, o un worker seguiría entregando la
+    respuesta anterior a la escritura durante L1_TIMEOUT. Otros backends se usan tal cual.
+    """
+    shared_method = getattr(cache, f'{method}_shared', None)
+    if shared_method is None:
+        return getattr(cache, method)(*args, **kwargs)
+    return shared_method(*args, **kwargs)
+
+
+def get_cache_version(model_or_namespace):
+    """Versión actual del namespace; None si la cache compartida no está disponible"""
+    key = CACHE_VERSION_KEY.format(namespace=get_cache_namespace(model_or_namespace))
+    version = shared_cache_call('get', key)
+    if version is None:
+        # Versión inicial basada en la hora: si la clave se pierde (cull, reinicio de Redis)
+        # nunca se reutiliza un número anterior que tenga respuestas viejas en cache
+        shared_cache_call('add', key, time.time_ns() // 1000, None)
+        version = shared_cache_call('get', key)
+    return version
+
+
+def bump_cache_version(model_or_namespace):
+    key = CACHE_VERSION_KEY.format(namespace=get_cache_namespace(model_or_namespace))
+    try:
+        version = shared_cache_call('incr', key)
+    except ValueError:
+        version = None
+    if version is None:
+        # La versión no existía (o expiró): cualquier valor nuevo invalida las claves anteriores
+        version = time.time_ns() // 1000
+        shared_cache_call('set', key, version, None)
+    return version
+
+
+def versioned_cache_key(prefix, models, *parts):
+    """
+    Clave que cambia cuando cambia cualquiera de los modelos indicados.
+    Ej: versioned_cache_key('sale_order_list', [M_sale_order], 'page', 2)
+    Retorna None si no se pudo leer alguna versión (no se debe usar la cache).
+    """
+    versions = []
+    for model in models:
+        version = get_cache_version(model)
+        if version is None:
+            return None
+        versions.append(f'{get_cache_namespace(model)}:{version}')
+    versions = '.'.join(versions)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{prefix}:{versions}:{suffix}' if suffix else f'{prefix}:{versions}'
+
@@ -0,0 +1,343 @@
+"""
+Subida de archivos grandes por partes, reanudable.
+
+Protocolo:
+1. POST uploads/ con target, target_id, file_name, size (y opcionalmente content_type, sha256):
+   crea la subida y el archivo temporal vacío en CHUNKED_UPLOAD_DIR.
+2. PUT uploads/<id>/ con el cuerpo crudo de la parte y el header Upload-Offset: la parte se
+   escribe directo al disco en bloques, sin pasar por la memoria del worker ni mantener una
+   transacción abierta mientras se recibe. Si la conexión se corta se conservan los bytes
+   recibidos; GET uploads/<id>/ indica desde dónde reanudar.
+3. POST uploads/<id>/complete/: valida el tamaño (y el sha256 si se envió) y crea el adjunto de
+   la cotización, el adjunto del proyecto o la foto de evidencia de la visita técnica con los
+   mismos serializers que las subidas normales. El archivo se lee una sola vez (hash) y se
+   mueve a su ubicación final sin copiarlo.
+
+Las subidas sin actividad por CHUNKED_UPLOAD_EXPIRATION_HOURS se eliminan con una tarea programada.
+"""
+import datetime
+import hashlib
+import logging
+import os
+import uuid
+from celery import shared_task
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from function.models.chunked_upload import M_chunked_upload
+from notifications.utils.notifications_ut import notify_new_project_attachment
+from proyect.models.attach_proyect import M_attach_proyect
+from proyect.models.proyect import M_proyect
+from proyect.serializers.sz_attach_proyect import sz_attach_proyect
+from sale_order.models.attach_sale_order import M_attach_sale_order
+from sale_order.models.sale_order import M_sale_order
+from sale_order.serializers.sz_attach_sale_order import sz_attach_sale_order
+from technical_visit.models.evidence_photo import M_evidence_photo
+from technical_visit.models.technical_visit import M_technical_visit
+from technical_visit.serializers.sz_evidence_photo import sz_evidence_photo
+
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de cada lectura del cuerpo de la petición al escribir una parte
+CHUNKED_UPLOAD_READ_SIZE = 64 * 1024
+
+
+class ChunkedUploadError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST, upload=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.upload = upload
+
+
+def get_chunked_upload_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'chunked_uploads'))
+
+
+def get_chunked_upload_max_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+
+
+def get_chunked_upload_max_chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 20 * 1024 * 1024)
+
+
+def get_chunked_upload_expiration_hours():
+    return getattr(settings, 'CHUNKED_UPLOAD_EXPIRATION_HOURS', 48)
+
+
+def get_chunk_path(upload):
+    return os.path.join(get_chunked_upload_dir(), f'{upload.pk}.part')
+
+
+def remove_chunk_file(upload):
+    remove_file(get_chunk_path(upload))
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def fit_file_name(file_name, max_length):
+    """Recorta el nombre conservando la extensión (el campo name de cada adjunto tiene límite)"""
+    if len(file_name) <= max_length:
+        return file_name
+    base, extension = os.path.splitext(file_name)
+    return f'{base[:max_length - len(extension)]}{extension}'
+
+
+# --- Destinos: registro al que se adjunta el archivo completo ---
+
+def _attach_to_sale_order(sale_order, uploaded_file, user):
+    uploaded_file.name = fit_file_name(uploaded_file.name, M_attach_sale_order._meta.get_field('name').max_length)
+    serializer = sz_attach_sale_order(data={'attach': uploaded_file, 'sale_order_id': sale_order.pk})
+    serializer.is_valid(raise_exception=True)
+    instance = serializer.save(uploaded_by=user)
+    return instance, serializer.data
+
+
+def _attach_to_proyect(proyect, uploaded_file, user):
+    uploaded_file.name = fit_file_name(uploaded_file.name, M_attach_proyect._meta.get_field('name').max_length)
+    serializer = sz_attach_proyect(data={
+        'attach': uploaded_file,
+        'proyect_id': proyect.pk,
+        'name': uploaded_file.name,
+        'size': str(uploaded_file.size),
+        'content_type': uploaded_file.content_type or '',
+    })
+    serializer.is_valid(raise_exception=True)
+    instance = serializer.save()
+    transaction.on_commit(lambda: notify_new_project_attachment(instance, user))
+    return instance, serializer.data
+
+
+def _attach_to_technical_visit(visit, uploaded_file, user):
+    serializer = sz_evidence_photo(data={'photo': uploaded_file})
+    serializer.is_valid(raise_exception=True)
+    instance = serializer.save(technical_visit=visit, order=visit.evidence_photos.count())
+    return instance, serializer.data
+
+
+CHUNKED_UPLOAD_TARGETS = {
+    'sale_order': {'model': M_sale_order, 'file_field': (M_attach_sale_order, 'attach'), 'attach': _attach_to_sale_order},
+    'proyect': {'model': M_proyect, 'file_field': (M_attach_proyect, 'attach'), 'attach': _attach_to_proyect},
+    'technical_visit': {'model': M_technical_visit, 'file_field': (M_evidence_photo, 'photo'), 'attach': _attach_to_technical_visit},
+}
+
+
+# --- Protocolo ---
+
+def create_chunked_upload(user, target, target_id, file_name, size, content_type='', sha256=''):
+    if target not in CHUNKED_UPLOAD_TARGETS:
+        raise ChunkedUploadError(f"target inválido. Opciones: {', '.join(CHUNKED_UPLOAD_TARGETS)}")
+    try:
+        size = int(size)
+        target_id = int(target_id)
+    except (TypeError, ValueError):
+        raise ChunkedUploadError('size y target_id deben ser números enteros')
+    if size < 1 or size > get_chunked_upload_max_size():
+        raise ChunkedUploadError(f'size debe estar entre 1 y {get_chunked_upload_max_size()} bytes')
+    file_name = os.path.basename((file_name or '').replace('\\', '/')).strip()
+    if not file_name:
+        raise ChunkedUploadError('file_name es obligatorio')
+    sha256 = (sha256 or '').lower()
+    if sha256 and (len(sha256) != 64 or any(char not in '0123456789abcdef' for char in sha256)):
+        raise ChunkedUploadError('sha256 debe ser un hash hexadecimal de 64 caracteres')
+
+    spec = CHUNKED_UPLOAD_TARGETS[target]
+    if not spec['model'].objects.filter(pk=target_id).exists():
+        raise ChunkedUploadError(f'{target} {target_id} no existe', status.HTTP_404_NOT_FOUND)
+
+    # Extensiones permitidas por el campo destino: se rechaza antes de recibir el archivo
+    model, field_name = spec['file_field']
+    try:
+        model._meta.get_field(field_name).run_validators(File(None, name=file_name))
+    except ValidationError as e:
+        raise ChunkedUploadError(' '.join(e.messages))
+
+    upload = M_chunked_upload.objects.create(
+        user=user, target=target, target_id=target_id, file_name=file_name,
+        content_type=(content_type or '')[:100], size=size, sha256=sha256,
+    )
+    os.makedirs(get_chunked_upload_dir(), exist_ok=True)
+    open(get_chunk_path(upload), 'wb').close()
+    return upload
+
+
+def check_chunk(upload, offset, length):
+    """Valida que la parte continúe el archivo donde quedó (sin bloquear la fila)"""
+    if upload.status != 'uploading':
+        raise ChunkedUploadError('La subida ya se completó', status.HTTP_409_CONFLICT, upload)
+    if offset != upload.offset:
+        raise ChunkedUploadError(f'Upload-Offset debe ser {upload.offset}', status.HTTP_409_CONFLICT, upload)
+    if offset + length > upload.size:
+        raise ChunkedUploadError('La parte supera el tamaño declarado del archivo', upload=upload)
+
+
+def receive_chunk(upload, stream, length):
+    """
+    Copia la parte del cuerpo de la petición a un archivo propio, sin transacción abierta:
+    un cliente lento no mantiene una conexión de la base ni bloquea los reintentos.
+    Retorna (ruta, bytes recibidos, si la conexión se cortó).
+    """
+    path = os.path.join(get_chunked_upload_dir(), f'{upload.pk}.{uuid.uuid4().hex}.chunk')
+    written = 0
+    interrupted = False
+    with open(path, 'wb') as chunk_file:
+        try:
+            while written < length:
+                data = stream.read(min(CHUNKED_UPLOAD_READ_SIZE, length - written))
+                if not data:
+                    break
+                chunk_file.write(data)
+                written += len(data)
+        except OSError as e:
+            # Conexión cortada: se conservan los bytes recibidos para reanudar
+            logger.warning(f"Parte incompleta en la subida {upload.pk}: {e}")
+            interrupted = True
+    return path, written, interrupted
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Escribe length bytes de stream en offset. La parte se recibe primero en un archivo aparte;
+    luego, con la fila bloqueada solo mientras se copia en disco, se agrega al archivo de la
+    subida y se avanza el offset. De dos reintentos simultáneos de la misma parte solo uno se
+    agrega; el otro recibe 409 con el offset actual. Retorna la subida actualizada.
+    """
+    if length < 1:
+        raise ChunkedUploadError('La parte está vacía (Content-Length)')
+    if length > get_chunked_upload_max_chunk_size():
+        raise ChunkedUploadError(
+            f'La parte supera {get_chunked_upload_max_chunk_size()} bytes', status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    check_chunk(upload, offset, length)
+
+    chunk_path, written, interrupted = receive_chunk(upload, stream, length)
+    try:
+        if written:
+            with transaction.atomic():
+                upload = M_chunked_upload.objects.select_for_update().get(pk=upload.pk)
+                check_chunk(upload, offset, written)
+                with open(get_chunk_path(upload), 'r+b') as part_file, open(chunk_path, 'rb') as chunk_file:
+                    part_file.seek(offset)
+                    for block in iter(lambda: chunk_file.read(CHUNKED_UPLOAD_READ_SIZE), b''):
+                        part_file.write(block)
+                    # Descarta restos de escrituras anteriores que no se confirmaron
+                    part_file.truncate()
+                M_chunked_upload.objects.filter(pk=upload.pk, offset=offset).update(
+                    offset=offset + written, updated_at=timezone.now()
+                )
+                upload.refresh_from_db()
+    finally:
+        remove_file(chunk_path)
+
+    if interrupted or written < length:
+        raise ChunkedUploadError(
+            f'Parte incompleta: se recibieron {written} de {length} bytes', upload=upload
+        )
+    return upload
+
+
+def get_file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Assembled_upload_file(UploadedFile):
+    """
+    Archivo completo de la subida. Como TemporaryUploadedFile, expone temporary_file_path():
+    el storage lo mueve a su ubicación final en lugar de copiarlo, y con sha256 no lo vuelve a leer.
+    """
+
+    def __init__(self, path, name, content_type, size, sha256):
+        super().__init__(file=open(path, 'rb'), name=name, content_type=content_type, size=size)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def complete_chunked_upload(upload):
+    """
+    Crea el registro destino con el archivo ensamblado. El hash se calcula antes de bloquear la
+    fila; el bloqueo solo cubre la creación del registro (el archivo se mueve, no se copia).
+    Repetir la llamada sobre una subida completada no crea otro registro.
+    Retorna (subida, datos serializados o None).
+    """
+    if upload.status == 'completed':
+        return upload, None
+    if upload.offset != upload.size:
+        raise ChunkedUploadError(f'Faltan {upload.size - upload.offset} bytes', status.HTTP_409_CONFLICT, upload)
+
+    path = get_chunk_path(upload)
+    if not os.path.exists(path):
+        raise ChunkedUploadError(
+            'El archivo de la subida ya no existe; inicie la subida de nuevo', status.HTTP_410_GONE, upload
+        )
+    sha256 = get_file_sha256(path)
+    if upload.sha256 and sha256 != upload.sha256:
+        raise ChunkedUploadError('El sha256 del archivo no coincide', upload=upload)
+
+    with transaction.atomic():
+        upload = M_chunked_upload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'completed':
+            return upload, None
+        if upload.offset != upload.size:
+            raise ChunkedUploadError(
+                f'Faltan {upload.size - upload.offset} bytes', status.HTTP_409_CONFLICT, upload
+            )
+
+        spec = CHUNKED_UPLOAD_TARGETS[upload.target]
+        parent = spec['model'].objects.filter(pk=upload.target_id).first()
+        if parent is None:
+            raise ChunkedUploadError(f'{upload.target} {upload.target_id} no existe', status.HTTP_404_NOT_FOUND, upload)
+
+        uploaded_file = Assembled_upload_file(path, upload.file_name, upload.content_type, upload.size, sha256)
+        try:
+            instance, data = spec['attach'](parent, uploaded_file, upload.user)
+        finally:
+            uploaded_file.close()
+
+        upload.status = 'completed'
+        upload.result_id = instance.pk
+        upload.save(update_fields=['status', 'result_id', 'updated_at'])
+        # Si el archivo se reutilizó (blob repetido) el temporal sigue en disco
+        transaction.on_commit(lambda: remove_chunk_file(upload))
+
+    logger.info(f"Subida por partes {upload.pk} completada: {upload.target} {upload.target_id}, {upload.size} bytes")
+    return upload, data
+
+
+def abort_chunked_upload(upload):
+    remove_chunk_file(upload)
+    upload.delete()
+
+
+def cleanup_expired_chunked_uploads():
+    """Elimina las subidas sin actividad (y sus archivos temporales). Retorna la cantidad"""
+    limit = timezone.now() - datetime.timedelta(hours=get_chunked_upload_expiration_hours())
+    expired = list(M_chunked_upload.objects.filter(updated_at__lt=limit))
+    for upload in expired:
+        remove_chunk_file(upload)
+    M_chunked_upload.objects.filter(pk__in=[upload.pk for upload in expired]).delete()
+    return len(expired)
+
+
+@shared_task
+def cleanup_chunked_uploads_task():
+    removed = cleanup_expired_chunked_uploads()
+    if removed:
+        logger.info(f"Subidas por partes vencidas eliminadas: {removed}")
+    return f"Subidas por partes vencidas eliminadas: {removed}"
@@ -0,0 +1,224 @@
+"""
+Sincronización incremental (delta) para consumidores BI.
+
+Los modelos sincronizados tienen updated_at (auto_now) indexado junto con id. Cada
+consulta con ?since=<ISO 8601> retorna las filas modificadas desde esa fecha, ordenadas
+por (updated_at, id) y paginadas por cursor, y los ids eliminados desde esa fecha
+(M_deleted_record). La respuesta incluye next_since: el valor de since para la siguiente
+sincronización, una vez recorridas todas las páginas.
+Los ids eliminados se guardan DELTA_SYNC_TOMBSTONE_DAYS días: un since anterior a ese límite
+podría omitir eliminaciones y se responde 410 con full_resync=true (el consumidor debe volver
+a hacer la carga inicial, sin since).
+
+Para eliminaciones masivas (cascadas con cientos de adjuntos) usar deferred_delta_sync(): los
+registros de borrado se insertan con un solo bulk_create y los updated_at que tocan las señales
+(touch_updated_at) se actualizan con un UPDATE por modelo al salir.
+"""
+import base64
+import datetime
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from celery import shared_task
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from function.models.deleted_record import M_deleted_record
+from function.paginator import Cursor_encoder, Keyset_paginator
+
+
+_local = threading.local()
+
+
+def get_delta_sync_buffer():
+    buffers = getattr(_local, 'buffers', None)
+    return buffers[-1] if buffers else None
+
+
+def record_deletions(records):
+    records = list(records)
+    if not records:
+        return
+    buffer = get_delta_sync_buffer()
+    if buffer is not None:
+        buffer['deleted'].extend(records)
+        return
+    M_deleted_record.objects.bulk_create(records)
+
+
+def touch_updated_at(model, pks):
+    """
+    Marca filas como modificadas para la sincronización (p.ej. el proyecto cuando cambian sus
+    adjuntos). Dentro de deferred_delta_sync() se agrupa y se omiten las filas eliminadas en
+    el mismo bloque.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    buffer = get_delta_sync_buffer()
+    if buffer is not None:
+        buffer['touched'].setdefault(model, set()).update(pks)
+        return
+    model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+@contextmanager
+def deferred_delta_sync():
+    """
+    Acumula los registros de borrado y los updated_at de las señales hechas dentro del bloque y
+    los guarda al salir (un INSERT y un UPDATE por modelo). Usar dentro de transaction.atomic().
+    """
+    buffers = _local.__dict__.setdefault('buffers', [])
+    buffers.append({'deleted': [], 'touched': {}})
+    try:
+        yield
+    except Exception:
+        buffers.pop()
+        raise
+    buffer = buffers.pop()
+    deleted = {(record.model, record.object_id) for record in buffer['deleted']}
+    record_deletions(buffer['deleted'])
+    for model, pks in buffer['touched'].items():
+        # No se toca el padre eliminado en el mismo bloque (p.ej. el proyecto de los adjuntos en cascada)
+        label = model._meta.label_lower
+        touch_updated_at(model, [pk for pk in pks if (label, pk) not in deleted])
+
+
+def _record_deletion(sender, instance, **kwargs):
+    record_deletions([M_deleted_record(model=sender._meta.label_lower, object_id=instance.pk)])
+
+
+def register_deletion_tracking(*models):
+    """Guarda un M_deleted_record por cada instancia eliminada (llamar desde el signals.py de la app)"""
+    for model in models:
+        post_delete.connect(
+            _record_deletion, sender=model, dispatch_uid=f'delta_sync:{model._meta.label_lower}:delete'
+        )
+
+
+def get_delta_sync_overlap():
+    """
+    Segundos que next_since se adelanta al inicio de la consulta: una transacción que
+    empezó antes y confirma después puede tener updated_at anterior. Las filas de ese
+    margen se reciben dos veces; el consumidor hace upsert por id.
+    """
+    return getattr(settings, 'DELTA_SYNC_OVERLAP_SECONDS', 60)
+
+
+def get_tombstone_days():
+    return getattr(settings, 'DELTA_SYNC_TOMBSTONE_DAYS', 90)
+
+
+def get_min_since():
+    """Fecha más antigua desde la que los ids eliminados están completos (purge_deleted_records)"""
+    return timezone.now() - datetime.timedelta(days=get_tombstone_days())
+
+
+def parse_since(value):
+    if not value:
+        return None
+    since = parse_datetime(value.replace(' ', '+'))  # '+' de la zona horaria llega como espacio si no se codifica
+    if since is None:
+        try:
+            since = datetime.datetime.combine(datetime.date.fromisoformat(value), datetime.time.min)
+        except ValueError:
+            raise ValidationError({'since': 'Fecha inválida, use ISO 8601 (p.ej. 2025-01-31T08:00:00Z).'})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.timezone.utc)
+    return since
+
+
+class Delta_sync_paginator(Keyset_paginator):
+    """
+    Keyset sobre (updated_at, id) para filas obtenidas con values().
+    Las páginas siguientes conservan since y next_since en el enlace next.
+    """
+    page_size = 1000
+    max_page_size = 5000
+    default_ordering = ('updated_at', 'id')
+
+    def get_ordering(self, queryset):
+        return self.default_ordering
+
+    def encode_cursor(self, row):
+        values = [row[field.lstrip('-')] for field in self.ordering]
+        raw = json.dumps(values, cls=Cursor_encoder).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def delta_sync_response(request, model, queryset, fields=(), expressions=None):
+    """
+    Respuesta de sincronización de `model`:
+    { since, next_since, next, cursor, has_more, changed: [...], deleted: [ids] }
+    queryset ya filtrado/anotado; `fields` y `expressions` se pasan a values().
+    Sin since se entregan todas las filas (carga inicial) y ningún eliminado.
+    Si since es anterior a los registros de borrado que se conservan responde 410 con
+    full_resync=true; solo se valida en la primera página.
+    """
+    since = parse_since(request.query_params.get('since'))
+    first_page = Delta_sync_paginator.cursor_query_param not in request.query_params
+    if since is not None and first_page:
+        min_since = get_min_since()
+        if since < min_since:
+            return Response(OrderedDict([
+                ('error', 'full resync required'),
+                ('messages', f'since es anterior a {get_tombstone_days()} días: los eliminados ya no están '
+                             f'disponibles. Repita la carga inicial sin since.'),
+                ('full_resync', True),
+                ('since', since),
+                ('min_since', min_since),
+            ]), status=status.HTTP_410_GONE)
+
+    next_since = request.query_params.get('next_since')
+    if not next_since:
+        next_since = (timezone.now() - datetime.timedelta(seconds=get_delta_sync_overlap())).isoformat()
+
+    changed = queryset
+    if since is not None:
+        changed = changed.filter(updated_at__gte=since)
+
+    paginator = Delta_sync_paginator()
+    rows = paginator.paginate_queryset(changed.values(*fields, 'updated_at', **(expressions or {})), request)
+
+    deleted = []
+    if since is not None and first_page:
+        deleted = list(
+            M_deleted_record.objects
+            .filter(model=model._meta.label_lower, deleted_at__gte=since)
+            .order_by('object_id')
+            .values_list('object_id', flat=True)
+            .distinct()
+        )
+
+    next_link = paginator.get_next_link()
+    if next_link:
+        next_link = replace_query_param(next_link, 'next_since', next_since)
+
+    return Response(OrderedDict([
+        ('since', since),
+        ('next_since', next_since),
+        ('next', next_link),
+        ('cursor', paginator.next_cursor),
+        ('has_more', paginator.has_more),
+        ('changed', rows),
+        ('deleted', deleted),
+    ]))
+
+
+def purge_deleted_records(days=None):
+    """Elimina los registros de borrado más antiguos que DELTA_SYNC_TOMBSTONE_DAYS"""
+    days = get_tombstone_days() if days is None else days
+    limit = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = M_deleted_record.objects.filter(deleted_at__lt=limit).delete()
+    return deleted
+
+
+@shared_task
+def purge_deleted_records_task(days=None):
+    return f"Registros de borrado eliminados: {purge_deleted_records(days)}"
@@ -0,0 +1,162 @@
+"""
+Cola persistente de eliminación de archivos del storage.
+
+Al eliminar un registro con FileField/ImageField (modelos registrados con register_file_cleanup)
+se guarda el nombre del archivo en M_pending_file_deletion dentro de la misma transacción:
+si la transacción se revierte, la fila desaparece y el archivo se conserva. Al confirmarse
+se programa el worker de Celery, que borra los archivos por lotes y reintenta los que fallan.
+Una tarea programada procesa la cola aunque el broker no haya estado disponible.
+
+Para eliminaciones masivas (cascadas con cientos de adjuntos) usar deferred_file_deletions():
+los nombres se acumulan y se insertan con un solo bulk_create.
+"""
+import datetime
+import logging
+import threading
+from contextlib import contextmanager
+from celery import shared_task
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from function.models.pending_file_deletion import M_pending_file_deletion
+from function.storage import get_storage_for_name
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def get_file_deletion_batch_size():
+    return getattr(settings, 'FILE_DELETION_BATCH_SIZE', 200)
+
+
+def get_file_deletion_max_attempts():
+    return getattr(settings, 'FILE_DELETION_MAX_ATTEMPTS', 8)
+
+
+def schedule_file_deletion_worker():
+    try:
+        process_file_deletions_task.delay()
+    except Exception as e:
+        # Sin broker los archivos se eliminan en la siguiente ejecución programada
+        logger.warning(f"No se pudo programar la eliminación de archivos: {e}")
+
+
+def queue_file_deletions(names):
+    """Registra los archivos a eliminar y programa el worker cuando la transacción se confirma"""
+    names = [name for name in names if name]
+    if not names:
+        return 0
+
+    buffers = getattr(_local, 'buffers', None)
+    if buffers:
+        buffers[-1].extend(names)
+        return len(names)
+
+    M_pending_file_deletion.objects.bulk_create([M_pending_file_deletion(name=name) for name in names])
+    transaction.on_commit(schedule_file_deletion_worker)
+    return len(names)
+
+
+@contextmanager
+def deferred_file_deletions():
+    """
+    Acumula los archivos de las eliminaciones hechas dentro del bloque y los registra
+    con un solo INSERT al salir. Usar dentro de transaction.atomic().
+    """
+    buffers = _local.__dict__.setdefault('buffers', [])
+    buffers.append([])
+    try:
+        yield
+    except Exception:
+        buffers.pop()
+        raise
+    names = buffers.pop()
+    queue_file_deletions(names)
+
+
+def get_file_names(instance):
+    return [
+        getattr(instance, field.attname).name
+        for field in instance._meta.concrete_fields
+        if isinstance(field, models.FileField) and getattr(instance, field.attname)
+    ]
+
+
+def _queue_instance_files(sender, instance, **kwargs):
+    queue_file_deletions(get_file_names(instance))
+
+
+def register_file_cleanup(*models_to_clean):
+    """Encola los archivos de cada instancia eliminada (llamar desde el signals.py de la app)"""
+    for model in models_to_clean:
+        post_delete.connect(
+            _queue_instance_files, sender=model, dispatch_uid=f'file_cleanup:{model._meta.label_lower}'
+        )
+
+
+def get_retry_delay(attempts):
+    # 1, 2, 4, ... minutos, como máximo un día
+    return datetime.timedelta(minutes=min(2 ** max(attempts - 1, 0), 24 * 60))
+
+
+def process_pending_file_deletions(batch_size=None, max_attempts=None, storage=None):
+    """
+    Procesa un lote de la cola. Retorna (eliminados, fallidos).
+    En PostgreSQL los lotes se toman con SELECT ... FOR UPDATE SKIP LOCKED, así varios
+    workers pueden procesar la cola a la vez sin repetir archivos.
+    Sin storage, cada archivo se elimina con el suyo (los blobs solo si ya no tienen referencias).
+    """
+    batch_size = batch_size or get_file_deletion_batch_size()
+    max_attempts = max_attempts or get_file_deletion_max_attempts()
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending = list(
+            M_pending_file_deletion.objects
+            .select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now, attempts__lt=max_attempts)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+
+        done = []
+        failed = []
+        for item in pending:
+            try:
+                (storage or get_storage_for_name(item.name)).delete(item.name)  # no falla si el archivo ya no existe
+                done.append(item.id)
+            except Exception as e:
+                item.attempts += 1
+                item.last_error = str(e)[:1000]
+                item.next_attempt_at = now + get_retry_delay(item.attempts)
+                failed.append(item)
+                logger.warning(f"No se pudo eliminar {item.name} (intento {item.attempts}): {e}")
+
+        if done:
+            M_pending_file_deletion.objects.filter(id__in=done).delete()
+        if failed:
+            M_pending_file_deletion.objects.bulk_update(failed, ['attempts', 'last_error', 'next_attempt_at'])
+
+    return len(done), len(failed)
+
+
+def process_all_pending_file_deletions(batch_size=None):
+    """Procesa lotes hasta que no queden archivos listos. Retorna (eliminados, fallidos)"""
+    batch_size = batch_size or get_file_deletion_batch_size()
+    total_done = total_failed = 0
+    while True:
+        done, failed = process_pending_file_deletions(batch_size=batch_size)
+        total_done += done
+        total_failed += failed
+        if done + failed < batch_size:
+            return total_done, total_failed
+
+
+@shared_task
+def process_file_deletions_task():
+    done, failed = process_all_pending_file_deletions()
+    if done or failed:
+        logger.info(f"Archivos eliminados: {done}, con error: {failed}")
+    return f"Archivos eliminados: {done}, con error: {failed}"
@@ -0,0 +1,51 @@
+"""
+Índices para búsquedas por prefijo sin distinguir mayúsculas (function/search.py).
+
+Los filtros istartswith generan UPPER(campo) LIKE UPPER('texto%') en PostgreSQL; un índice
+btree sobre UPPER(campo) con text_pattern_ops los resuelve. Las columnas TextField se indexan
+por un prefijo acotado (UPPER(SUBSTRING(campo, 1, n))) para no superar el tamaño máximo de
+una fila de índice.
+"""
+from django.contrib.postgres.indexes import OpClass
+from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Substr, Upper
+
+
+# Caracteres de un TextField que se indexan para búsquedas por prefijo
+PREFIX_INDEX_LENGTH = 100
+
+
+def upper_prefix(field, length=None):
+    """UPPER(campo) o UPPER(SUBSTRING(campo, 1, length)): misma expresión en el índice y en la consulta"""
+    return Upper(Substr(field, 1, length) if length else F(field))
+
+
+def upper_prefix_search(field, query, length=PREFIX_INDEX_LENGTH):
+    """
+    (anotaciones, condición) para buscar por prefijo en un TextField indexado con
+    upper_prefix_index(field, length=length): la condición sobre el prefijo anotado usa el
+    índice y la del valor completo descarta textos que solo coinciden en los primeros caracteres.
+    Uso: queryset.annotate(**annotations).filter(condition)
+    """
+    alias = f'{field}_prefix'
+    annotations = {alias: upper_prefix(field, length)}
+    condition = Q(**{f'{alias}__startswith': query.upper()[:length]}) & Q(**{f'{field}__istartswith': query})
+    return annotations, condition
+
+
+class Upper_prefix_index(models.Index):
+    """Índice con opclass de PostgreSQL; en otras bases (tests con SQLite) se crea sin la opclass"""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            expressions = [
+                expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+                for expression in self.expressions
+            ]
+            return models.Index(*expressions, name=self.name).create_sql(model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def upper_prefix_index(field, name, length=None):
+    return Upper_prefix_index(OpClass(upper_prefix(field, length), name='text_pattern_ops'), name=name)
@@ -0,0 +1,49 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from function.parquet_export import (
+    PARQUET_COMPRESSIONS,
+    PARQUET_DATASETS,
+    PARQUET_EXPORT_CHUNK_SIZE,
+    ParquetUnavailable,
+    require_pyarrow,
+    write_parquet,
+)
+
+
+class Command(BaseCommand):
+    help = 'Exporta cotizaciones, proyectos y visitas técnicas a archivos Parquet para análisis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', type=str, help='Directorio donde se generan los archivos <dataset>.parquet')
+        parser.add_argument(
+            '--dataset',
+            action='append',
+            choices=list(PARQUET_DATASETS),
+            help='Tabla a exportar (se puede repetir); por defecto todas',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=PARQUET_EXPORT_CHUNK_SIZE,
+            help=f'Filas por row group (por defecto {PARQUET_EXPORT_CHUNK_SIZE})',
+        )
+        parser.add_argument('--compression', choices=PARQUET_COMPRESSIONS, default='zstd')
+
+    def handle(self, *args, **options):
+        try:
+            require_pyarrow()
+        except ParquetUnavailable as e:
+            raise CommandError(str(e))
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for dataset in options['dataset'] or list(PARQUET_DATASETS):
+            path = os.path.join(options['output_dir'], f'{dataset}.parquet')
+            rows = write_parquet(
+                PARQUET_DATASETS[dataset], path,
+                chunk_size=options['chunk_size'], compression=options['compression'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{dataset}: {rows} filas -> {path} ({os.path.getsize(path) / 1024:.1f} KB)'
+            ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from function.media_gc import collect_orphaned_media, get_media_gc_grace_hours
+
+
+class Command(BaseCommand):
+    help = 'Elimina de MEDIA_ROOT los archivos que ningún registro referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo reporta los archivos, no los elimina')
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=None,
+            help=f'Ignora archivos modificados en las últimas N horas (por defecto {get_media_gc_grace_hours()})',
+        )
+        parser.add_argument('--list', action='store_true', help='Muestra cada archivo huérfano')
+
+    def handle(self, *args, **options):
+        if options['grace_hours'] is not None and options['grace_hours'] < 0:
+            raise CommandError('--grace-hours no puede ser negativo')
+
+        stats = collect_orphaned_media(dry_run=options['dry_run'], grace_hours=options['grace_hours'])
+
+        if options['list']:
+            for name in stats['files']:
+                self.stdout.write(name)
+
+        action = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {stats['orphaned']} archivos huérfanos "
+            f"({stats['reclaimed_bytes'] / (1024 * 1024):.2f} MB) de {stats['scanned']} revisados; "
+            f"{stats['recent_skipped']} recientes omitidos, {stats['errors']} errores"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from function.storage import migrate_files_to_blobs
+
+
+class Command(BaseCommand):
+    help = 'Mueve los adjuntos existentes al almacenamiento por contenido (blobs/) eliminando los duplicados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los archivos a migrar')
+        parser.add_argument('--batch-size', type=int, default=500, help='Filas leídas por consulta (por defecto 500)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        stats = migrate_files_to_blobs(batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        action = 'Se migrarían' if options['dry_run'] else 'Migrados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {stats['migrated']} archivos a {stats['blobs']} blobs; "
+            f"{stats['missing']} filas apuntan a archivos inexistentes"
+        ))
@@ -0,0 +1,131 @@
+"""
+Recolector de archivos huérfanos en MEDIA_ROOT.
+
+Construye el conjunto de nombres referenciados por todos los FileField/ImageField de los
+modelos instalados y recorre MEDIA_ROOT con os.scandir (sin listar directorios completos
+en memoria). Los archivos que ninguna fila referencia y que son más antiguos que el
+periodo de gracia se eliminan; el periodo de gracia protege las subidas cuya transacción
+todavía no se confirma. Los blobs (function/storage.py) se eliminan con
+Content_addressed_storage.delete_if_unused: una subida repetida puede reutilizar el blob
+entre la revisión y la eliminación, y ese procedimiento lo detecta.
+"""
+import logging
+import os
+import time
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from function.storage import Content_addressed_storage, is_blob_name
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_media_gc_grace_hours(grace_hours=None):
+    return getattr(settings, 'MEDIA_GC_GRACE_HOURS', 24) if grace_hours is None else grace_hours
+
+
+def get_media_gc_exclude_dirs():
+    """Directorios de MEDIA_ROOT que no corresponden a FileField (p.ej. la cache de PDF)"""
+    return getattr(settings, 'MEDIA_GC_EXCLUDE_DIRS', ['quotations_cache'])
+
+
+def get_file_fields():
+    """(modelo, campo) de cada FileField/ImageField concreto de los modelos instalados"""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def get_referenced_names(chunk_size=5000):
+    """Conjunto de nombres de archivo (relativos a MEDIA_ROOT, con '/') referenciados en la BD"""
+    referenced = set()
+    for model, field in get_file_fields():
+        names = (
+            model._base_manager
+            .exclude(**{f'{field.attname}__isnull': True})
+            .exclude(**{field.attname: ''})
+            .values_list(field.attname, flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        referenced.update(name.lstrip('/') for name in names)
+    return referenced
+
+
+def walk_media_files(root, exclude_dirs=()):
+    """Genera (nombre relativo con '/', ruta, tamaño, mtime) de cada archivo bajo root"""
+    pending = [('', root)]
+    while pending:
+        prefix, directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning(f"No se pudo leer {directory}: {e}")
+            continue
+
+        with entries:
+            for entry in entries:
+                name = f'{prefix}{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in exclude_dirs:
+                        pending.append((f'{name}/', entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, entry.path, stat.st_size, stat.st_mtime
+
+
+def collect_orphaned_media(dry_run=False, grace_hours=None, root=None):
+    """
+    Elimina (o solo reporta, con dry_run) los archivos huérfanos de MEDIA_ROOT.
+    Retorna un resumen: scanned, orphaned, reclaimed_bytes, recent_skipped, errors, files.
+    """
+    root = root or settings.MEDIA_ROOT
+    grace_seconds = get_media_gc_grace_hours(grace_hours) * 3600
+    cutoff = time.time() - grace_seconds
+    blob_storage = Content_addressed_storage(location=root)
+    referenced = get_referenced_names()
+
+    stats = {'scanned': 0, 'orphaned': 0, 'reclaimed_bytes': 0, 'recent_skipped': 0, 'errors': 0, 'files': []}
+    if not os.path.isdir(root):
+        return stats
+
+    for name, path, size, mtime in walk_media_files(root, get_media_gc_exclude_dirs()):
+        stats['scanned'] += 1
+        if name in referenced:
+            continue
+        if mtime > cutoff:
+            stats['recent_skipped'] += 1
+            continue
+
+        if not dry_run:
+            try:
+                if is_blob_name(name):
+                    if not blob_storage.delete_if_unused(name, grace_seconds):
+                        stats['recent_skipped'] += 1
+                        continue
+                else:
+                    os.remove(path)
+            except OSError as e:
+                stats['errors'] += 1
+                logger.warning(f"No se pudo eliminar el archivo huérfano {name}: {e}")
+                continue
+
+        stats['orphaned'] += 1
+        stats['reclaimed_bytes'] += size
+        stats['files'].append(name)
+
+    return stats
+
+
+@shared_task
+def collect_orphaned_media_task(grace_hours=None):
+    stats = collect_orphaned_media(grace_hours=grace_hours)
+    logger.info(
+        f"Archivos huérfanos eliminados: {stats['orphaned']} "
+        f"({stats['reclaimed_bytes'] / (1024 * 1024):.1f} MB), revisados: {stats['scanned']}, errores: {stats['errors']}"
+    )
+    return f"Archivos huérfanos eliminados: {stats['orphaned']} ({stats['reclaimed_bytes']} bytes)"
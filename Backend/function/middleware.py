@@ -4,6 +4,8 @@ Middleware personalizado para Optipro
 import logging
 import time
 import gc
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse
 from django.core.cache import cache
 from django.db import connection
@@ -91,3 +93,41 @@ class MemoryOptimizationMiddleware:
             connection.close_if_unusable_or_obsolete()
         
         return response
+
+
+async def iterate_in_thread(iterator):
+    """
+    Recorre un iterador síncrono desde código asíncrono pidiendo una parte a la vez en el hilo
+    de Django (las exportaciones consultan la base mientras generan el archivo)
+    """
+    iterator = iter(iterator)
+    get_next = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while True:
+            part = await get_next(iterator, done)
+            if part is done:
+                break
+            yield part
+    finally:
+        # Cliente desconectado: se cierra el generador (y su cursor) en el mismo hilo
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+class AsyncStreamingMiddleware:
+    """
+    Bajo ASGI Django consume completas en memoria las StreamingHttpResponse con iteradores
+    síncronos antes de enviarlas (exportaciones de Power BI y Parquet, FileResponse de
+    descargas y los estáticos de WhiteNoise). Este middleware les asigna un iterador asíncrono
+    para que se envíen por partes. Bajo WSGI no cambia la respuesta.
+    Debe ir primero en MIDDLEWARE para ver la respuesta final.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+            response.streaming_content = iterate_in_thread(response.streaming_content)
+        return response
@@ -0,0 +1,3 @@
+from .deleted_record import M_deleted_record
+from .pending_file_deletion import M_pending_file_deletion
+from .chunked_upload import M_chunked_upload
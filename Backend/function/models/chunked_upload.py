@@ -0,0 +1,37 @@
+import uuid
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class M_chunked_upload(models.Model):
+    """
+    Subida por partes de un archivo grande (ver function/chunked_upload.py).
+    Las partes se agregan a un archivo temporal en CHUNKED_UPLOAD_DIR; offset es la cantidad
+    de bytes confirmados, desde donde el cliente reanuda si la conexión se corta.
+    """
+    status_choices = [
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, null=True, on_delete=models.CASCADE, related_name='chunked_uploads')
+    target = models.CharField(max_length=20)        # sale_order, proyect o technical_visit
+    target_id = models.PositiveIntegerField()
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)   # opcional, se verifica al completar
+    status = models.CharField(max_length=10, choices=status_choices, default='uploading')
+    result_id = models.PositiveIntegerField(null=True, blank=True)  # adjunto o foto creada al completar
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'chunked_upload'
+        indexes = [
+            models.Index(fields=['updated_at'], name='chunked_upload_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.file_name} ({self.offset}/{self.size})'
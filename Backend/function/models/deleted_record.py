@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class M_deleted_record(models.Model):
+    """
+    Registro de filas eliminadas de los modelos con sincronización incremental
+    (ver function/delta_sync.py), para que los consumidores BI también eliminen la fila.
+    """
+    model = models.CharField(max_length=100)  # label_lower, p.ej. 'proyect.m_proyect'
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'deleted_record'
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='deleted_record_model_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} #{self.object_id}'
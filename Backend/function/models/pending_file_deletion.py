@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class M_pending_file_deletion(models.Model):
+    """
+    Archivo del storage pendiente de eliminar (ver function/file_deletion.py).
+    La fila se crea en la misma transacción que elimina el registro que lo referenciaba
+    y la elimina el worker de Celery después de borrar el archivo.
+    """
+    name = models.CharField(max_length=500)  # nombre del archivo en el storage por defecto
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'pending_file_deletion'
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'], name='pending_file_next_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -1,7 +1,143 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 # from rest_framework.pagination import LimitOffsetPagination
 
+
+class Cursor_encoder(DjangoJSONEncoder):
+    """Igual que DjangoJSONEncoder pero conserva los microsegundos (el cursor debe ser exacto)"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Keyset_paginator(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre el ordenamiento del queryset, p.ej. (-id) o (-date, -id).
+    No ejecuta COUNT(*) ni OFFSET: filtra a partir de los valores de la última fila entregada
+    y pide page_size + 1 filas para saber si hay más resultados.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 20
+    cursor_query_param = 'cursor'
+    default_ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(cursor))
+
+        rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if self.has_more else None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('cursor', self.next_cursor),
+            ('has_more', self.has_more),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size and page_size.isdigit() and int(page_size) > 0:
+            return min(int(page_size), self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """Toma el ordenamiento declarado en el queryset y garantiza que termine en id (único)"""
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(self.default_ordering)
+
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def get_keyset_filter(self, values):
+        """
+        Construye la comparación lexicográfica (f1, f2, ...) < (v1, v2, ...)
+        respetando la dirección de cada campo.
+        """
+        keyset_filter = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+
+            condition = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_field, previous_value in zip(self.ordering[:index], values[:index]):
+                condition &= Q(**{previous_field.lstrip('-'): previous_value})
+
+            keyset_filter |= condition
+        return keyset_filter
+
+    def encode_cursor(self, instance):
+        values = [instance.serializable_value(field.lstrip('-')) for field in self.ordering]
+        raw = json.dumps(values, cls=Cursor_encoder).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound('Cursor inválido.')
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Cursor inválido.')
+        return values
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+
 class Limit_paginator(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 20
\ No newline at end of file
+    max_page_size = 20
+
+    # ?pagination=cursor (o enviar ?cursor=) cambia a paginación por cursor, sin COUNT(*) ni OFFSET
+    pagination_query_param = 'pagination'
+    keyset_class = Keyset_paginator
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
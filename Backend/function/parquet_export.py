@@ -0,0 +1,160 @@
+"""
+Exportación columnar (Parquet) de cotizaciones, proyectos y visitas técnicas para análisis.
+Los Decimal se guardan como decimal128(max_digits, decimal_places) (sin pérdida de precisión)
+y los campos con choices con codificación de diccionario. Cada bloque de filas leído de
+la base de datos se escribe como un row group, así la memoria no depende del tamaño de la tabla.
+Requiere pyarrow (opcional: sin él la exportación responde con un error claro).
+"""
+import datetime
+from django.db import models
+from django.utils import timezone
+from proyect.models.proyect import M_proyect
+from sale_order.models.sale_order import M_sale_order
+from technical_visit.models.technical_visit import M_technical_visit
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional
+    pa = None
+    pq = None
+
+
+PARQUET_EXPORT_CHUNK_SIZE = 10000
+PARQUET_COMPRESSIONS = ('zstd', 'snappy', 'gzip', 'none')
+
+PARQUET_DATASETS = {
+    'sale_orders': M_sale_order,
+    'proyects': M_proyect,
+    'technical_visits': M_technical_visit,
+}
+
+
+class ParquetUnavailable(Exception):
+    pass
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ParquetUnavailable('La exportación Parquet requiere pyarrow (pip install pyarrow)')
+
+
+def get_arrow_type(field):
+    """Tipo de Arrow equivalente al campo del modelo"""
+    if field.is_relation:
+        return pa.int64()
+    if field.choices:
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.TimeField):
+        return pa.time64('us')
+    # CharField, TextField, FileField (ruta del archivo), ...
+    return pa.string()
+
+
+def get_export_fields(model):
+    return [field for field in model._meta.concrete_fields if not isinstance(field, models.JSONField)]
+
+
+def get_arrow_schema(model):
+    require_pyarrow()
+    return pa.schema([
+        pa.field(field.attname, get_arrow_type(field), nullable=field.null)
+        for field in get_export_fields(model)
+    ])
+
+
+def _to_arrow_value(value):
+    if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+        return timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def build_record_batch(schema, rows):
+    """rows: tuplas de values_list() en el orden del esquema"""
+    arrays = []
+    for index, arrow_field in enumerate(schema):
+        values = [_to_arrow_value(row[index]) for row in rows]
+        if pa.types.is_dictionary(arrow_field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, arrow_field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(model, chunk_size=PARQUET_EXPORT_CHUNK_SIZE):
+    schema = get_arrow_schema(model)
+    rows = model.objects.order_by('pk').values_list(*schema.names).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield build_record_batch(schema, chunk)
+            chunk = []
+    if chunk:
+        yield build_record_batch(schema, chunk)
+
+
+class _StreamBuffer:
+    """Archivo de solo escritura que acumula lo que escribe ParquetWriter hasta que se entrega"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def write_parquet(model, sink, chunk_size=PARQUET_EXPORT_CHUNK_SIZE, compression='zstd'):
+    """Escribe la tabla del modelo en sink (ruta o archivo). Retorna la cantidad de filas"""
+    schema = get_arrow_schema(model)
+    rows = 0
+    with pq.ParquetWriter(sink, schema, compression=compression, use_dictionary=True) as writer:
+        for batch in iter_record_batches(model, chunk_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def stream_parquet(model, chunk_size=PARQUET_EXPORT_CHUNK_SIZE, compression='zstd'):
+    """Generador de bytes del archivo Parquet: entrega cada row group apenas se escribe"""
+    schema = get_arrow_schema(model)
+    buffer = _StreamBuffer()
+    writer = pq.ParquetWriter(buffer, schema, compression=compression, use_dictionary=True)
+    try:
+        for batch in iter_record_batches(model, chunk_size):
+            writer.write_batch(batch)
+            yield buffer.pop()
+    finally:
+        writer.close()
+    yield buffer.pop()
@@ -0,0 +1,119 @@
+"""
+Cache de respuestas de solo lectura (GET) de DRF con invalidación por etiquetas.
+
+Cada vista declara las etiquetas de los objetos que componen la respuesta, p.ej.
+['sale_order:15', 'technical_visit:7']. Cada etiqueta tiene una versión en cache
+(function.cache) que las señales post_save/post_delete incrementan cuando la transacción
+se confirma; la clave de la respuesta incluye esas versiones, así un cambio en cualquier
+objeto relacionado hace que la siguiente petición genere la respuesta de nuevo.
+Las respuestas incluyen ETag y responden 304 cuando el cliente envía If-None-Match.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+from function.cache import bump_cache_version, versioned_cache_key
+
+
+def cache_tag(name, pk='all'):
+    """'sale_order:15' para un objeto; 'sale_order:all' para listados/exportaciones"""
+    return f'{name}:{pk}'
+
+
+def invalidate_cache_tags(*tags):
+    for tag in set(tags):
+        bump_cache_version(f'tag:{tag}')
+
+
+def invalidate_cache_tags_on_commit(*tags):
+    """
+    Invalida las etiquetas cuando se confirma la transacción actual (de inmediato fuera de una).
+    Si se invalidara antes, otra petición podría volver a guardar en cache los datos anteriores
+    al cambio con la versión nueva y quedarían ahí hasta el siguiente cambio o el TIMEOUT.
+    """
+    transaction.on_commit(lambda: invalidate_cache_tags(*tags))
+
+
+def connect_cache_tags(model, get_tags, name='default'):
+    """
+    Invalida las etiquetas que retorna get_tags(instance) cuando se guarda o elimina
+    una instancia del modelo. Llamar desde el signals.py de cada app; `name` distingue
+    varios registros sobre el mismo modelo (p.ej. desde apps distintas).
+    Las etiquetas se calculan en la señal y se invalidan al confirmar la transacción.
+    Al eliminar se calculan antes (las relaciones SET_NULL todavía existen) y después del DELETE.
+    """
+    def invalidate(sender, instance, **kwargs):
+        invalidate_cache_tags_on_commit(*get_tags(instance))
+
+    uid = f'response_cache:{model._meta.label_lower}:{name}'
+    post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    pre_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f'{uid}:pre_delete')
+    post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    return etag in [value.strip() for value in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+
+class Cached_response_mixin:
+    """
+    Mixin para vistas GET (RetrieveAPIView, ListAPIView, ...). Las subclases definen
+    get_cache_tags(request, *args, **kwargs); retornar None desactiva la cache para esa petición.
+    Solo se guardan respuestas 200.
+    """
+    cache_prefix = None
+    cache_timeout = None
+
+    def get_cache_tags(self, request, *args, **kwargs):
+        raise NotImplementedError('get_cache_tags() debe retornar la lista de etiquetas de la respuesta')
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+
+    def get_cache_key(self, request, tags):
+        prefix = self.cache_prefix or f'response:{self.__class__.__name__}'
+        # La URL completa (host incluido: hay URLs absolutas en las respuestas) identifica la variante
+        url_hash = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return versioned_cache_key(prefix, [f'tag:{tag}' for tag in tags], url_hash)
+
+    def build_cached_response(self, request, content, etag):
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def get(self, request, *args, **kwargs):
+        tags = self.get_cache_tags(request, *args, **kwargs)
+        if tags is None or not self.get_cache_timeout():
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_cache_key(request, tags)
+        if key is None:
+            # Sin las versiones compartidas no se puede saber si lo guardado sigue vigente
+            return super().get(request, *args, **kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            return self.build_cached_response(request, *cached)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code != 200 or getattr(response, 'data', None) is None:
+            return response
+
+        content = JSONRenderer().render(response.data)
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        cache.set(key, (content, etag), self.get_cache_timeout())
+
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['X-Cache'] = 'MISS'
+        return response
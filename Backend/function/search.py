@@ -0,0 +1,172 @@
+"""
+Búsqueda combinada de ofertas, visitas técnicas y proyectos.
+Todas las condiciones son por prefijo (LIKE 'texto%') para aprovechar los índices
+*_pattern_ops declarados en los modelos; el ranking se calcula en SQL con Case/When.
+Código e identificación (números y letras en mayúscula) se comparan con el texto en
+mayúsculas sobre la columna; nombre, ciudad y extras con istartswith, que usa los índices
+sobre UPPER(campo) de function/indexes.py.
+"""
+from django.db.models import Case, CharField, IntegerField, Q, Value, When
+from django.db.models.functions import Concat
+from function.indexes import upper_prefix_search
+from sale_order.models.sale_order import M_sale_order
+from technical_visit.models.technical_visit import M_technical_visit
+from proyect.models.proyect import M_proyect
+
+# Puntaje por tipo de coincidencia (mayor = más relevante)
+RANK_EXACT_CODE = 100
+RANK_EXACT_IDENTIFICATION = 90
+RANK_PREFIX_CODE = 80
+RANK_PREFIX_IDENTIFICATION = 70
+RANK_PREFIX_NAME = 50
+RANK_PREFIX_CITY = 30
+RANK_OTHER = 10
+
+# Campos por fuente: código, identificación (NIT/C.C), nombre del cliente, ciudad y extras
+SEARCH_SOURCES = {
+    'sale_order': {
+        'model': M_sale_order,
+        'code': 'code',
+        'identification': 'nitCC',
+        'name': 'name',
+        'city': 'city',
+        'extra': ['state'],
+    },
+    'technical_visit': {
+        'model': M_technical_visit,
+        'code': 'code',
+        'identification': 'N_identification',
+        'name': 'name',
+        'city': 'city',
+        'extra': [],
+        # TextField: se compara el prefijo indexado y luego el valor completo
+        'long_text': ['description_more'],
+    },
+    'proyect': {
+        'model': M_proyect,
+        'code': 'code',
+        'identification': 'sale_order_id__nitCC',
+        'name': 'p_name',
+        'city': 'sale_order_id__city',
+        'extra': ['sale_order_id__name'],
+    },
+}
+
+
+def get_search_queryset(source, query):
+    """Queryset filtrado y anotado con 'rank' para una fuente de búsqueda"""
+    config = SEARCH_SOURCES[source]
+    code = config['code']
+    identification = config['identification']
+    name = config['name']
+    city = config['city']
+    code_query = query.upper()
+
+    condition = (
+        Q(**{f'{code}__startswith': code_query}) |
+        Q(**{f'{identification}__startswith': code_query}) |
+        Q(**{f'{name}__istartswith': query}) |
+        Q(**{f'{city}__istartswith': query})
+    )
+    for field in config['extra']:
+        condition |= Q(**{f'{field}__istartswith': query})
+
+    prefixes = {}
+    for field in config.get('long_text', []):
+        annotations, long_text_condition = upper_prefix_search(field, query)
+        prefixes.update(annotations)
+        condition |= long_text_condition
+
+    rank = Case(
+        When(**{code: code_query}, then=Value(RANK_EXACT_CODE)),
+        When(**{identification: code_query}, then=Value(RANK_EXACT_IDENTIFICATION)),
+        When(**{f'{code}__startswith': code_query}, then=Value(RANK_PREFIX_CODE)),
+        When(**{f'{identification}__startswith': code_query}, then=Value(RANK_PREFIX_IDENTIFICATION)),
+        When(**{f'{name}__istartswith': query}, then=Value(RANK_PREFIX_NAME)),
+        When(**{f'{city}__istartswith': query}, then=Value(RANK_PREFIX_CITY)),
+        default=Value(RANK_OTHER),
+        output_field=IntegerField(),
+    )
+
+    return config['model'].objects.annotate(**prefixes).filter(condition).annotate(rank=rank)
+
+
+def search_sale_orders(query, limit):
+    queryset = get_search_queryset('sale_order', query).order_by('-rank', '-id')
+    return [
+        {
+            'type': 'sale_order',
+            'id': row['id'],
+            'code': row['code'],
+            'title': row['name'],
+            'identification': row['nitCC'],
+            'city': row['city'],
+            'status': row['state'],
+            'rank': row['rank'],
+        }
+        for row in queryset.values('id', 'code', 'name', 'nitCC', 'city', 'state', 'rank')[:limit]
+    ]
+
+
+def search_technical_visits(query, limit):
+    queryset = get_search_queryset('technical_visit', query).annotate(
+        full_name=Concat('name', Value(' '), 'last_name', output_field=CharField())
+    ).order_by('-rank', '-id')
+    return [
+        {
+            'type': 'technical_visit',
+            'id': row['id'],
+            'code': row['code'],
+            'title': row['full_name'],
+            'identification': row['N_identification'],
+            'city': row['city'],
+            'status': row['concept_visit'],
+            'rank': row['rank'],
+        }
+        for row in queryset.values('id', 'code', 'full_name', 'N_identification', 'city', 'concept_visit', 'rank')[:limit]
+    ]
+
+
+def search_proyects(query, limit):
+    queryset = get_search_queryset('proyect', query).order_by('-rank', '-id')
+    return [
+        {
+            'type': 'proyect',
+            'id': row['id'],
+            'code': row['code'],
+            'title': row['p_name'],
+            'identification': row['sale_order_id__nitCC'],
+            'city': row['sale_order_id__city'],
+            'status': row['status'],
+            'rank': row['rank'],
+        }
+        for row in queryset.values(
+            'id', 'code', 'p_name', 'sale_order_id__nitCC', 'sale_order_id__city', 'status', 'rank'
+        )[:limit]
+    ]
+
+
+SEARCH_FUNCTIONS = {
+    'sale_order': search_sale_orders,
+    'technical_visit': search_technical_visits,
+    'proyect': search_proyects,
+}
+
+
+def search_all(query, limit=10, types=None):
+    """
+    Busca en todas las fuentes (o en las indicadas en types) y mezcla los resultados
+    ordenados por relevancia. Cada fuente aporta como máximo `limit` filas.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    sources = [source for source in (types or SEARCH_FUNCTIONS) if source in SEARCH_FUNCTIONS]
+    results = []
+    for source in sources:
+        results.extend(SEARCH_FUNCTIONS[source](query, limit))
+
+    # Orden estable: relevancia y luego el orden de las fuentes
+    results.sort(key=lambda row: -row['rank'])
+    return results[:limit]
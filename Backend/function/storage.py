@@ -0,0 +1,241 @@
+"""
+Almacenamiento direccionado por contenido para adjuntos.
+
+Cada archivo se guarda una sola vez en blobs/<aa>/<bb>/<sha256><ext>: el hash se calcula
+mientras el archivo se copia a un temporal en el mismo disco, y si el blob ya existe el
+temporal se descarta (subir un archivo repetido solo cuesta leerlo). Los archivos que ya
+están en disco (temporary_file_path(), p.ej. subidas grandes o por partes) se mueven al
+blob sin copiarlos; si traen el atributo sha256 tampoco se vuelven a leer. Varias filas pueden
+apuntar al mismo blob; las referencias se cuentan en las propias tablas (una consulta
+indexada por cada FileField que usa este storage) al momento de eliminar, así el conteo
+no se desincroniza con bulk_create, queryset.delete() ni cargas masivas.
+
+delete() solo elimina un blob sin referencias y que no se haya tocado en el periodo de
+gracia: una subida repetida actualiza el mtime del blob antes de que su fila se confirme.
+Los blobs que se conservan por el periodo de gracia los recupera function/media_gc.py, con el
+mismo procedimiento (delete_if_unused).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import uuid
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'blobs'
+BLOB_HASH_CHUNK_SIZE = 1024 * 1024
+# Longitud máxima de la extensión que se conserva (el nombre debe caber en FileField max_length=100)
+BLOB_MAX_EXTENSION_LENGTH = 10
+
+
+def get_blob_delete_grace_seconds():
+    return getattr(settings, 'BLOB_DELETE_GRACE_SECONDS', 3600)
+
+
+def get_blob_name(digest, original_name=''):
+    extension = os.path.splitext(original_name)[1].lower()
+    if len(extension) > BLOB_MAX_EXTENSION_LENGTH or not extension[1:].isalnum():
+        extension = ''
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+@deconstructible
+class Content_addressed_storage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el hash en _save; un blob repetido se reutiliza
+        return name
+
+    def _save(self, name, content):
+        blob_root = self.path(BLOB_DIR)
+        os.makedirs(blob_root, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            return self._save_local_file(name, content)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=blob_root, prefix='.upload-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks(BLOB_HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            blob_name = get_blob_name(digest.hexdigest(), name)
+            if self._reuse_blob(blob_name):
+                return blob_name
+            self._prepare_blob_path(blob_name, temp_path)
+            # Si otra subida escribió el mismo blob a la vez, el contenido es idéntico
+            os.replace(temp_path, self.path(blob_name))
+            temp_path = None
+            return blob_name
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _save_local_file(self, name, content):
+        """Archivo que ya está en disco: se calcula el hash (si no viene) y se mueve al blob"""
+        source_path = content.temporary_file_path()
+        digest = getattr(content, 'sha256', None)
+        if not digest:
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as source:
+                for chunk in iter(lambda: source.read(BLOB_HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            digest = digest.hexdigest()
+
+        blob_name = get_blob_name(digest, name)
+        if self._reuse_blob(blob_name):
+            return blob_name
+        self._prepare_blob_path(blob_name, source_path)
+        # Renombra si está en el mismo disco; si no, copia y elimina el original
+        file_move_safe(source_path, self.path(blob_name), allow_overwrite=True)
+        return blob_name
+
+    def _reuse_blob(self, blob_name):
+        try:
+            # Blob repetido: se marca como usado para que delete() no lo elimine mientras
+            # la fila que lo referencia se confirma
+            os.utime(self.path(blob_name))
+        except FileNotFoundError:
+            return False
+        logger.info(f"Archivo repetido, se reutiliza {blob_name}")
+        return True
+
+    def _prepare_blob_path(self, blob_name, source_path):
+        blob_path = self.path(blob_name)
+        if self.directory_permissions_mode is not None:
+            os.makedirs(os.path.dirname(blob_path), mode=self.directory_permissions_mode, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(source_path, self.file_permissions_mode)
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            # Archivos anteriores al almacenamiento por contenido
+            return super().delete(name)
+        self.delete_if_unused(name)
+
+    def delete_if_unused(self, name, grace_seconds=None):
+        """
+        Elimina el blob si ninguna fila lo referencia y no se usó en grace_seconds
+        (BLOB_DELETE_GRACE_SECONDS por defecto). Retorna True si se eliminó.
+        """
+        if grace_seconds is None:
+            grace_seconds = get_blob_delete_grace_seconds()
+        path = self.path(name)
+        if not os.path.exists(path) or get_blob_reference_count(name):
+            return False
+
+        # Se aparta el blob antes de revisar el mtime: una subida que lo reutilice después
+        # no lo encuentra y lo vuelve a escribir
+        trash_path = f'{path}.{uuid.uuid4().hex}.trash'
+        try:
+            os.rename(path, trash_path)
+        except FileNotFoundError:
+            return False
+
+        recently_used = os.stat(trash_path).st_mtime > time.time() - grace_seconds
+        if recently_used or get_blob_reference_count(name):
+            os.replace(trash_path, path)
+            return False
+        os.remove(trash_path)
+        return True
+
+
+def get_storage_for_name(name):
+    """Storage con el que se elimina un archivo de la cola: los blobs respetan sus referencias"""
+    from django.core.files.storage import default_storage
+
+    return get_attachment_storage() if is_blob_name(name) else default_storage
+
+
+def get_content_addressed_fields():
+    from function.media_gc import get_file_fields
+
+    return [
+        (model, field) for model, field in get_file_fields()
+        if isinstance(field.storage, Content_addressed_storage)
+    ]
+
+
+def get_blob_reference_count(name):
+    """Filas de todos los modelos con Content_addressed_storage que apuntan al blob"""
+    return sum(
+        model._base_manager.filter(**{field.attname: name}).count()
+        for model, field in get_content_addressed_fields()
+    )
+
+
+def migrate_files_to_blobs(batch_size=500, dry_run=False):
+    """
+    Mueve los archivos guardados antes del almacenamiento por contenido a blobs/ y actualiza
+    las filas. Los archivos originales se encolan para eliminación (function/file_deletion.py).
+    Retorna {'migrated', 'missing', 'blobs'}.
+    """
+    from function.file_deletion import queue_file_deletions
+
+    stats = {'migrated': 0, 'missing': 0, 'blobs': 0}
+    blobs = set()
+    for model, field in get_content_addressed_fields():
+        storage = field.storage
+        pending = (
+            model._base_manager
+            .exclude(**{f'{field.attname}__startswith': f'{BLOB_DIR}/'})
+            .exclude(**{field.attname: ''})
+            .order_by('pk')
+            .values_list('pk', field.attname)
+        )
+        last_pk = None
+        while True:
+            batch = list((pending.filter(pk__gt=last_pk) if last_pk is not None else pending)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            for pk, name in batch:
+                if not storage.exists(name):
+                    stats['missing'] += 1
+                    continue
+                stats['migrated'] += 1
+                if dry_run:
+                    continue
+
+                with storage.open(name) as old_file:
+                    blob_name = storage.save(name, old_file)
+                blobs.add(blob_name)
+                changes = {field.attname: blob_name}
+                if any(model_field.name == 'updated_at' for model_field in model._meta.concrete_fields):
+                    changes['updated_at'] = timezone.now()  # la sincronización incremental ve el cambio
+                with transaction.atomic():
+                    model._base_manager.filter(pk=pk, **{field.attname: name}).update(**changes)
+                    if not model._base_manager.filter(**{field.attname: name}).exists():
+                        queue_file_deletions([name])
+
+    stats['blobs'] = len(blobs)
+    return stats
+
+
+_attachment_storage = None
+
+
+def get_attachment_storage():
+    """Storage de los FileField de adjuntos (callable para que las migraciones no lo serialicen)"""
+    global _attachment_storage
+    if _attachment_storage is None:
+        _attachment_storage = Content_addressed_storage()
+    return _attachment_storage
@@ -0,0 +1,397 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from function.cache import TieredCache, bump_cache_version, get_cache_version
+from function.chunked_upload import ChunkedUploadError, complete_chunked_upload, get_chunk_path, write_chunk
+from function.file_deletion import process_pending_file_deletions
+from function import media_gc
+from function.media_gc import collect_orphaned_media
+from function.models.deleted_record import M_deleted_record
+from function.models.chunked_upload import M_chunked_upload
+from function.paginator import Keyset_paginator
+from proyect.models.attach_proyect import M_attach_proyect
+from proyect.models.proyect import M_proyect
+from proyect.utils.export_ut import PROYECT_EXPORT_COLUMNS
+from sale_order.models.attach_sale_order import M_attach_sale_order
+from sale_order.models.sale_order import M_sale_order
+from sale_order.tests import create_sale_order
+
+
+def create_tiered_cache(l1_name, l2_name='tiered-tests-l2'):
+    """TieredCache con L2 en memoria; l1_name distinto simula otro proceso con la misma L2"""
+    tiered = TieredCache(l2_name, {
+        'TIMEOUT': 300,
+        'OPTIONS': {'L1_TIMEOUT': 60, 'L2_BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    tiered.l1 = LocMemCache(l1_name, {'TIMEOUT': 60})
+    return tiered
+
+
+class CacheVersionAcrossProcessesTest(SimpleTestCase):
+    """Las versiones de cache se leen e incrementan en L2, sin la copia local de cada proceso"""
+
+    def setUp(self):
+        self.worker_a = create_tiered_cache('tiered-tests-worker-a')
+        self.worker_b = create_tiered_cache('tiered-tests-worker-b')
+        self.worker_a.clear()
+        self.worker_b.l1.clear()
+
+    def test_bump_in_one_process_is_seen_by_the_other(self):
+        with mock.patch('function.cache.cache', self.worker_b):
+            before = get_cache_version('tag:sale_order:1')
+        with mock.patch('function.cache.cache', self.worker_a):
+            after = bump_cache_version('tag:sale_order:1')
+        with mock.patch('function.cache.cache', self.worker_b):
+            self.assertEqual(get_cache_version('tag:sale_order:1'), after)
+        self.assertEqual(after, before + 1)
+
+    def test_version_is_unknown_when_l2_is_down(self):
+        with mock.patch.object(self.worker_a.l2, 'get', side_effect=ConnectionError('redis')), \
+                mock.patch('function.cache.cache', self.worker_a):
+            self.assertIsNone(get_cache_version('tag:sale_order:1'))
+
+
+class TieredCacheTest(SimpleTestCase):
+    """L1 guarda lo leído de L2; si L2 falla se usa solo L1 hasta L2_RETRY_AFTER"""
+
+    def setUp(self):
+        self.tiered = create_tiered_cache('tiered-tests-l1')
+        self.tiered.clear()
+
+    def test_l2_value_is_copied_to_l1(self):
+        self.tiered.l2.set('key', 'l2')
+        self.assertEqual(self.tiered.get('key'), 'l2')
+        self.assertEqual(self.tiered.l1.get('key'), 'l2')
+
+        # Otro proceso cambia L2: este sigue con su copia hasta que expire o se invalide
+        self.tiered.l2.set('key', 'changed')
+        self.assertEqual(self.tiered.get('key'), 'l2')
+        self.tiered.delete('key')
+        self.assertIsNone(self.tiered.get('key'))
+
+    def test_falls_back_to_l1_while_l2_is_down(self):
+        with mock.patch.object(self.tiered.l2, 'set', side_effect=ConnectionError('redis')):
+            self.tiered.set('key', 'local')
+        self.assertFalse(self.tiered.l2_available())
+
+        with mock.patch.object(self.tiered.l2, 'get') as l2_get:
+            self.assertEqual(self.tiered.get('key'), 'local')
+            self.assertIsNone(self.tiered.get('missing'))
+        l2_get.assert_not_called()
+
+        # Pasado L2_RETRY_AFTER se vuelve a usar L2
+        self.tiered._l2_failed_at -= self.tiered.l2_retry_after
+        self.tiered.set('key', 'shared')
+        self.assertEqual(self.tiered.l2.get('key'), 'shared')
+
+    def test_incr_updates_l2_and_drops_l1_copy(self):
+        other = create_tiered_cache('tiered-tests-other-l1')
+        other.l1.clear()
+        self.tiered.set('counter', 1)
+        self.assertEqual(other.get('counter'), 1)
+
+        self.assertEqual(self.tiered.incr('counter'), 2)
+        self.assertEqual(self.tiered.get('counter'), 2)
+        other.l1.delete('counter')
+        self.assertEqual(other.get('counter'), 2)
+
+    def test_incr_of_missing_key_keeps_l2_available(self):
+        with self.assertRaises(ValueError):
+            self.tiered.incr('missing')
+        self.assertTrue(self.tiered.l2_available())
+
+        with mock.patch.object(self.tiered.l2, 'incr', side_effect=ConnectionError('redis')):
+            with self.assertRaises(ValueError):
+                self.tiered.incr('counter')
+        self.assertFalse(self.tiered.l2_available())
+
+
+class Media_root_test_mixin:
+    """MEDIA_ROOT temporal; sin periodo de gracia los blobs sin referencias se eliminan de inmediato"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, BLOB_DELETE_GRACE_SECONDS=0)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='comercial', password='x')
+        self.sale_order = create_sale_order(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_attachment(self, name, sale_order=None, content=None):
+        return M_attach_sale_order.objects.create(
+            attach=SimpleUploadedFile(name, content or name.encode()), name=name, size='9',
+            content_type='application/pdf', sale_order_id=sale_order or self.sale_order,
+        )
+
+
+class MediaGarbageCollectionTest(Media_root_test_mixin, TestCase):
+    """El recolector solo elimina archivos sin referencias y más antiguos que el periodo de gracia"""
+
+    def test_collect_orphaned_media(self):
+        attachment = self.create_attachment('referenciado.pdf')
+        os.makedirs(os.path.join(self.media_root, 'media'), exist_ok=True)
+        old_orphan = os.path.join(self.media_root, 'media', 'huerfano.pdf')
+        new_orphan = os.path.join(self.media_root, 'media', 'subiendo.pdf')
+        cached_pdf = os.path.join(self.media_root, 'quotations_cache', 'cotizacion.pdf')
+        os.makedirs(os.path.dirname(cached_pdf))
+        for path in (old_orphan, new_orphan, cached_pdf):
+            with open(path, 'wb') as f:
+                f.write(b'x' * 10)
+        two_days_ago = time.time() - 48 * 3600
+        for path in (attachment.attach.path, old_orphan, cached_pdf):
+            os.utime(path, (two_days_ago, two_days_ago))
+
+        stats = collect_orphaned_media(dry_run=True, grace_hours=24)
+        self.assertEqual(stats['files'], ['media/huerfano.pdf'])
+        self.assertEqual(stats['reclaimed_bytes'], 10)
+        self.assertTrue(os.path.exists(old_orphan))
+
+        stats = collect_orphaned_media(grace_hours=24)
+        self.assertEqual((stats['orphaned'], stats['recent_skipped']), (1, 1))
+        self.assertFalse(os.path.exists(old_orphan))
+        for path in (attachment.attach.path, new_orphan, cached_pdf):
+            self.assertTrue(os.path.exists(path))
+
+
+    def test_blob_reused_during_collection_is_kept(self):
+        attachment = self.create_attachment('ficha.pdf', content=b'ficha tecnica')
+        blob_name, blob_path = attachment.attach.name, attachment.attach.path
+        M_attach_sale_order.objects.filter(id=attachment.id).delete()
+        two_days_ago = time.time() - 48 * 3600
+        os.utime(blob_path, (two_days_ago, two_days_ago))
+        walk_media_files = media_gc.walk_media_files
+
+        def walk_with_duplicate_upload(*args):
+            for entry in walk_media_files(*args):
+                # Una subida repetida reutiliza el blob después de que el recolector lo revisó
+                os.utime(blob_path)
+                yield entry
+
+        with mock.patch('function.media_gc.walk_media_files', walk_with_duplicate_upload):
+            stats = collect_orphaned_media(grace_hours=24)
+        self.assertEqual((stats['orphaned'], stats['recent_skipped']), (0, 1))
+        self.assertTrue(os.path.exists(blob_path))
+
+        os.utime(blob_path, (two_days_ago, two_days_ago))
+        stats = collect_orphaned_media(grace_hours=24)
+        self.assertEqual(stats['files'], [blob_name])
+        self.assertFalse(os.path.exists(blob_path))
+
+class ContentAddressedStorageTest(Media_root_test_mixin, TestCase):
+    """Los adjuntos con el mismo contenido comparten un blob que se elimina con la última referencia"""
+
+    def test_duplicate_uploads_share_one_blob(self):
+        other_sale_order = create_sale_order(self.user, code='100010')
+        first = self.create_attachment('ficha.pdf', content=b'ficha tecnica')
+        second = self.create_attachment('ficha_copia.pdf', sale_order=other_sale_order, content=b'ficha tecnica')
+        self.create_attachment('otra.pdf', sale_order=other_sale_order)
+
+        self.assertEqual(first.attach.name, second.attach.name)
+        self.assertTrue(first.attach.name.startswith('blobs/'))
+        blob_dir = os.path.dirname(first.attach.path)
+        self.assertEqual(len([name for name in os.listdir(blob_dir) if name.endswith('.pdf')]), 1)
+
+        # El blob se conserva mientras otra fila lo referencie
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/sale_order/delete/{self.sale_order.id}/')
+        process_pending_file_deletions()
+        self.assertTrue(os.path.exists(second.attach.path))
+
+        second.delete()
+        process_pending_file_deletions()
+        self.assertFalse(os.path.exists(second.attach.path))
+
+
+class ChunkedUploadTest(TestCase):
+    """Subida por partes reanudable de un archivo grande a una cotización"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.upload_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, CHUNKED_UPLOAD_DIR=self.upload_dir)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='tecnico', password='x')
+        self.sale_order = create_sale_order(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def put_chunk(self, upload_id, offset, data):
+        return self.client.generic(
+            'PUT', f'/uploads/{upload_id}/', data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload_resumes_and_attaches_file(self):
+        content = b'plano CAD ' * 1000
+        response = self.client.post('/uploads/', {
+            'target': 'sale_order', 'target_id': self.sale_order.id,
+            'file_name': 'plano.dwg', 'size': len(content), 'content_type': 'application/acad',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['upload_id']
+
+        self.assertEqual(self.put_chunk(upload_id, 0, content[:4000]).data['offset'], 4000)
+        # Una parte repetida o fuera de orden indica desde dónde reanudar
+        response = self.put_chunk(upload_id, 0, content[:4000])
+        self.assertEqual((response.status_code, response.data['offset']), (409, 4000))
+        self.assertEqual(self.client.get(f'/uploads/{upload_id}/').data['offset'], 4000)
+
+        response = self.client.post(f'/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 409)
+        self.put_chunk(upload_id, 4000, content[4000:])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 201)
+        attachment = M_attach_sale_order.objects.get(id=response.data['result_id'])
+        self.assertEqual((attachment.name, attachment.size, attachment.uploaded_by), ('plano.dwg', str(len(content)), self.user))
+        with attachment.attach.open('rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertFalse(os.path.exists(get_chunk_path(M_chunked_upload.objects.get(pk=upload_id))))
+
+        # Reintentar complete no crea otro adjunto
+        response = self.client.post(f'/uploads/{upload_id}/complete/')
+        self.assertEqual((response.status_code, response.data['result_id']), (200, attachment.id))
+        self.assertEqual(M_attach_sale_order.objects.count(), 1)
+
+    def test_upload_belongs_to_its_user(self):
+        response = self.client.post('/uploads/', {
+            'target': 'sale_order', 'target_id': self.sale_order.id, 'file_name': 'a.pdf', 'size': 10,
+        }, format='json')
+        other = User.objects.create_user(username='otro', password='x')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+        self.assertEqual(self.put_chunk(response.data['upload_id'], 0, b'x' * 10).status_code, 404)
+
+    def test_concurrent_retry_of_a_chunk_is_rejected(self):
+        content = b'0123456789' * 10
+        response = self.client.post('/uploads/', {
+            'target': 'sale_order', 'target_id': self.sale_order.id, 'file_name': 'plano.pdf', 'size': len(content),
+        }, format='json')
+        stale = M_chunked_upload.objects.get(pk=response.data['upload_id'])
+
+        write_chunk(stale, 0, io.BytesIO(content[:60]), 60)
+        # El reintento se validó con el offset anterior y termina de recibirse después
+        with self.assertRaises(ChunkedUploadError) as error:
+            write_chunk(stale, 0, io.BytesIO(content[:60]), 60)
+        self.assertEqual(error.exception.status_code, 409)
+        upload = write_chunk(error.exception.upload, 60, io.BytesIO(content[60:]), 40)
+        self.assertEqual(upload.offset, len(content))
+        # Los archivos de cada parte recibida se eliminan
+        self.assertEqual(os.listdir(self.upload_dir), [os.path.basename(get_chunk_path(upload))])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upload, _ = complete_chunked_upload(upload)
+        attachment = M_attach_sale_order.objects.get(id=upload.result_id)
+        with attachment.attach.open('rb') as f:
+            self.assertEqual(f.read(), content)
+        # El archivo ensamblado se movió al blob, no se copió
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+
+class AsyncStreamingMiddlewareTest(TestCase):
+    """Bajo ASGI las exportaciones se envían por partes con un iterador asíncrono"""
+
+    async def test_streaming_export_is_async_under_asgi(self):
+        response = await self.async_client.get('/powerbi/proyectos/stream/csv/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([part async for part in response.streaming_content]).decode('utf-8-sig')
+        self.assertEqual(content.splitlines()[0].split(',')[0], PROYECT_EXPORT_COLUMNS[0][0])
+
+    def test_streaming_export_is_unchanged_under_wsgi(self):
+        response = self.client.get('/powerbi/proyectos/stream/csv/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+
+
+class DeferredDeltaSyncTest(Media_root_test_mixin, TestCase):
+    """Eliminar un proyecto con muchos adjuntos no hace un INSERT y un UPDATE por adjunto"""
+
+    def create_proyect(self, code, attachments):
+        proyect = M_proyect.objects.create(p_name='Proyecto', code=code, status='process', sale_order_id=self.sale_order)
+        for index in range(attachments):
+            M_attach_proyect.objects.create(
+                proyect_id=proyect, name=f'plano {index}.pdf',
+                attach=SimpleUploadedFile(f'plano_{code}_{index}.pdf', f'{code}-{index}'.encode()),
+            )
+        return proyect
+
+    def delete_proyect(self, proyect):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/proyect/delete/{proyect.id}/')
+        self.assertEqual(response.status_code, 204)
+        return [query['sql'] for query in queries]
+
+    def test_cascade_delete_batches_tombstones_and_skips_touch(self):
+        small = self.delete_proyect(self.create_proyect('100001', 2))
+        large = self.delete_proyect(self.create_proyect('100002', 12))
+
+        self.assertEqual(len(small), len(large))
+        self.assertFalse([sql for sql in large if sql.startswith('UPDATE "proyect"')])
+        self.assertEqual(M_deleted_record.objects.filter(model='proyect.m_attach_proyect').count(), 14)
+        self.assertEqual(M_deleted_record.objects.filter(model='proyect.m_proyect').count(), 2)
+
+
+class KeysetPaginatorTest(TestCase):
+    """El cursor sobre (-date, -id) no repite ni omite filas que comparten fecha"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='comercial', password='x')
+        dates = ['2025-01-03', '2025-01-02', '2025-01-02', '2025-01-02', '2025-01-01', '2025-01-01', '2025-01-02']
+        for index, day in enumerate(dates):
+            sale_order = create_sale_order(user, code=f'{100001 + index}')
+            M_sale_order.objects.filter(pk=sale_order.pk).update(date=day)
+
+    def paginate(self, cursor=None, page_size=2):
+        params = {'page_size': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        paginator = Keyset_paginator()
+        request = Request(APIRequestFactory().get('/', params))
+        page = paginator.paginate_queryset(M_sale_order.objects.order_by('-date', '-id'), request)
+        return [sale_order.pk for sale_order in page], paginator
+
+    def test_pages_follow_date_and_id(self):
+        seen = []
+        cursor = None
+        while True:
+            page, paginator = self.paginate(cursor)
+            self.assertLessEqual(len(page), 2)
+            seen.extend(page)
+            if not paginator.has_more:
+                break
+            cursor = paginator.next_cursor
+
+        expected = list(M_sale_order.objects.order_by('-date', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        with self.assertRaises(NotFound):
+            self.paginate('no-es-un-cursor')
+        with self.assertRaises(NotFound):
+            self.paginate('WzFd')  # [1]: no coincide con la cantidad de campos del ordenamiento
+
+        response = self.client.get('/sale_order/list/', {'cursor': 'no-es-un-cursor'}, SERVER_NAME='localhost')
+        self.assertEqual(response.status_code, 404)
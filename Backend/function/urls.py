@@ -0,0 +1,12 @@
+from django.urls import path
+from function.views.v_search import V_global_search
+from function.views.v_parquet_export import V_parquet_export
+from function.views.v_chunked_upload import V_chunked_upload_create, V_chunked_upload_detail, V_chunked_upload_complete
+
+urlpatterns = [
+    path('search/', V_global_search.as_view(), name='global-search'),
+    path('analytics/parquet/<str:dataset>/', V_parquet_export.as_view(), name='parquet-export'),
+    path('uploads/', V_chunked_upload_create.as_view(), name='chunked-upload-create'),
+    path('uploads/<uuid:upload_id>/', V_chunked_upload_detail.as_view(), name='chunked-upload-detail'),
+    path('uploads/<uuid:upload_id>/complete/', V_chunked_upload_complete.as_view(), name='chunked-upload-complete'),
+]
@@ -0,0 +1,116 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from function.chunked_upload import (
+    ChunkedUploadError,
+    abort_chunked_upload,
+    complete_chunked_upload,
+    create_chunked_upload,
+    get_chunked_upload_max_chunk_size,
+    write_chunk,
+)
+from function.models.chunked_upload import M_chunked_upload
+
+
+def upload_status(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'target': upload.target,
+        'target_id': upload.target_id,
+        'file_name': upload.file_name,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'result_id': upload.result_id,
+    }
+
+
+def error_response(error):
+    data = {'error': str(error)}
+    if error.upload is not None:
+        data.update(upload_status(error.upload))
+    return Response(data, status=error.status_code)
+
+
+class V_chunked_upload_base(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, upload_id):
+        # Cada subida solo la puede continuar el usuario que la creó
+        return get_object_or_404(M_chunked_upload, pk=upload_id, user=self.request.user)
+
+
+class V_chunked_upload_create(V_chunked_upload_base):
+    """
+    Inicia una subida por partes (function/chunked_upload.py).
+    Body: target (sale_order, proyect, technical_visit), target_id, file_name, size,
+    content_type y sha256 opcionales.
+    """
+
+    def post(self, request):
+        try:
+            upload = create_chunked_upload(
+                request.user,
+                target=request.data.get('target'),
+                target_id=request.data.get('target_id'),
+                file_name=request.data.get('file_name'),
+                size=request.data.get('size'),
+                content_type=request.data.get('content_type', ''),
+                sha256=request.data.get('sha256', ''),
+            )
+        except ChunkedUploadError as e:
+            return error_response(e)
+
+        data = upload_status(upload)
+        data['max_chunk_size'] = get_chunked_upload_max_chunk_size()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class V_chunked_upload_detail(V_chunked_upload_base):
+    """
+    GET: estado de la subida (offset desde donde reanudar).
+    PUT: agrega una parte; cuerpo crudo (application/octet-stream) y header Upload-Offset.
+    DELETE: cancela la subida.
+    """
+
+    def get(self, request, upload_id):
+        return Response(upload_status(self.get_upload(upload_id)), status=status.HTTP_200_OK)
+
+    def put(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        offset = request.headers.get('Upload-Offset', request.query_params.get('offset'))
+        try:
+            offset = int(offset)
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (TypeError, ValueError):
+            return Response({'error': 'Upload-Offset es obligatorio y debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # request.stream lee el cuerpo por bloques sin cargarlo completo en memoria
+            upload = write_chunk(upload, offset, request.stream, length)
+        except ChunkedUploadError as e:
+            return error_response(e)
+        return Response(upload_status(upload), status=status.HTTP_200_OK)
+
+    def delete(self, request, upload_id):
+        abort_chunked_upload(self.get_upload(upload_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class V_chunked_upload_complete(V_chunked_upload_base):
+    """Crea el adjunto (o la foto de evidencia) con el archivo completo"""
+
+    def post(self, request, upload_id):
+        try:
+            upload, result = complete_chunked_upload(self.get_upload(upload_id))
+        except ChunkedUploadError as e:
+            return error_response(e)
+
+        data = upload_status(upload)
+        if result is None:
+            # La subida ya se había completado (reintento del cliente)
+            return Response(data, status=status.HTTP_200_OK)
+        data['result'] = result
+        return Response(data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,47 @@
+from datetime import date
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from function.parquet_export import (
+    PARQUET_COMPRESSIONS,
+    PARQUET_DATASETS,
+    ParquetUnavailable,
+    require_pyarrow,
+    stream_parquet,
+)
+
+
+class V_parquet_export(APIView):
+    """
+    Descarga una tabla completa en formato Parquet para análisis (pandas, Power BI, DuckDB).
+    Datasets: sale_orders, proyects, technical_visits. Parámetro opcional: ?compression=zstd
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset):
+        if dataset not in PARQUET_DATASETS:
+            return Response(
+                {"error": "invalid dataset", "messages": f"Opciones: {', '.join(PARQUET_DATASETS)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        compression = request.query_params.get('compression', 'zstd')
+        if compression not in PARQUET_COMPRESSIONS:
+            return Response(
+                {"error": "invalid compression", "messages": f"Opciones: {', '.join(PARQUET_COMPRESSIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            require_pyarrow()
+        except ParquetUnavailable as e:
+            return Response({"error": "not available", "messages": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        response = StreamingHttpResponse(
+            stream_parquet(PARQUET_DATASETS[dataset], compression=compression),
+            content_type='application/vnd.apache.parquet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{dataset}_{date.today().isoformat()}.parquet"'
+        return response
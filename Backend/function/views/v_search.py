@@ -0,0 +1,37 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from function.search import search_all, SEARCH_FUNCTIONS
+
+
+class V_global_search(APIView):
+    """
+    Búsqueda combinada de ofertas, visitas técnicas y proyectos por código,
+    NIT/identificación, nombre del cliente y ciudad, ordenada por relevancia.
+    Parámetros: ?query=texto&limit=10&types=sale_order,technical_visit,proyect
+    """
+    permission_classes = [AllowAny]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('query', '').strip()
+        if not query:
+            return Response({"message": "No results found.", "results": []}, status=status.HTTP_200_OK)
+
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), self.max_limit) if limit.isdigit() and int(limit) > 0 else self.default_limit
+
+        types = request.query_params.get('types', None)
+        if types:
+            types = [source.strip() for source in types.split(',') if source.strip()]
+            unknown = [source for source in types if source not in SEARCH_FUNCTIONS]
+            if unknown:
+                return Response(
+                    {"error": "invalid types", "messages": f"Tipos desconocidos: {', '.join(unknown)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        results = search_all(query, limit=limit, types=types)
+        return Response({'count': len(results), 'results': results}, status=status.HTTP_200_OK)
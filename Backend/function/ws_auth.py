@@ -0,0 +1,30 @@
+"""
+Autenticación JWT para conexiones WebSocket (Channels).
+El navegador no permite enviar el header Authorization en un WebSocket, por eso
+el token de acceso se recibe en la URL: ws://.../ws/notifications/?token=<access>
+"""
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser, User
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@database_sync_to_async
+def get_user_from_token(raw_token):
+    try:
+        token = AccessToken(raw_token)
+        return User.objects.get(id=token['user_id'], is_active=True)
+    except (InvalidToken, TokenError, KeyError, User.DoesNotExist):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Agrega scope['user'] a partir del parámetro ?token= de la conexión"""
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+        token = query.get('token', [None])[0]
+        scope['user'] = await get_user_from_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,48 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from notifications.utils.push_ut import get_unread_counts, get_user_group_name
+from notifications.utils.summary_ut import get_notification_summary
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canal en tiempo real de notificaciones: ws/notifications/?token=<access>
+    Eventos enviados al cliente:
+      {"type": "notification.created", "notification": {...}, "unread": n}
+      {"type": "notification.unread", "unread": n}
+      {"type": "notification.summary", "summary": {...}}  (al conectar o si el cliente envía {"action": "summary"})
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.user_id = user.id
+        self.group_name = get_user_group_name(self.user_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_summary()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('action') == 'summary':
+            await self.send_summary()
+        elif content.get('action') == 'unread':
+            counts = await database_sync_to_async(get_unread_counts)([self.user_id])
+            await self.send_json({'type': 'notification.unread', 'unread': counts[self.user_id]})
+
+    async def send_summary(self):
+        summary = await database_sync_to_async(get_notification_summary)(self.user_id)
+        await self.send_json({'type': 'notification.summary', 'summary': summary})
+
+    # Manejadores de los eventos enviados al grupo del usuario (push_ut.send_to_users)
+    async def notification_created(self, event):
+        await self.send_json(event)
+
+    async def notification_unread(self, event):
+        await self.send_json(event)
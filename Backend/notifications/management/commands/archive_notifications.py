@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from notifications.utils.archive_ut import ARCHIVE_MODES, archive_read_notifications, get_archive_mode
+from notifications.utils.cleanup_ut import get_cleanup_chunk_size, get_expired_read_notifications
+
+
+class Command(BaseCommand):
+    help = 'Mueve las notificaciones leídas antiguas a la tabla de archivo o a archivos JSONL.gz'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Antigüedad mínima en días (por defecto NOTIFICATIONS_READ_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=ARCHIVE_MODES,
+            help='Destino del archivo (por defecto NOTIFICATIONS_ARCHIVE_MODE)',
+        )
+        parser.add_argument('--chunk-size', type=int, help='Notificaciones por lote')
+        parser.add_argument('--limit', type=int, help='Máximo de notificaciones a archivar en esta ejecución')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo muestra cuántas notificaciones se archivarían',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = get_cleanup_chunk_size(options.get('chunk_size'))
+        if chunk_size < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+        mode = get_archive_mode(options.get('mode'))
+
+        if options['dry_run']:
+            count = get_expired_read_notifications(options.get('days')).count()
+            self.stdout.write(self.style.WARNING(f'Modo de prueba: se archivarían {count} notificaciones ({mode})'))
+            return
+
+        archived = archive_read_notifications(
+            days=options.get('days'),
+            chunk_size=chunk_size,
+            mode=mode,
+            limit=options.get('limit'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Notificaciones archivadas ({mode}): {archived}'))
@@ -1,13 +1,19 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from notifications.models.m_notifications import m_notification
-from notifications.utils.notifications_ut import validate_notification_references
+from django.core.management.base import BaseCommand, CommandError
+from notifications.utils.cleanup_ut import (
+    delete_in_batches,
+    get_cleanup_chunk_size,
+    get_expired_read_notifications,
+    get_orphaned_notifications,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Limpia las notificaciones que referencian objetos que ya no existen'
+    help = (
+        'Limpia las notificaciones que referencian objetos que ya no existen '
+        'y, opcionalmente, las notificaciones leídas antiguas'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,60 +26,63 @@ class Command(BaseCommand):
             type=str,
             help='Filtrar por tipo específico de notificación (new_sale_order, quote_reminder, etc.)',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Filas eliminadas por lote (por defecto NOTIFICATIONS_CLEANUP_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--read-older-than',
+            type=int,
+            metavar='DIAS',
+            help='También elimina las notificaciones leídas con más de DIAS días',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         notification_type = options.get('type')
-        
+        chunk_size = get_cleanup_chunk_size(options.get('chunk_size'))
+        retention_days = options.get('read_older_than')
+
+        if chunk_size < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+
         self.stdout.write(
             self.style.SUCCESS(f'Iniciando limpieza de notificaciones {"(modo de prueba)" if dry_run else ""}')
         )
-        
-        # Filtrar notificaciones
-        queryset = m_notification.objects.filter(is_read=False)
-        
         if notification_type:
-            queryset = queryset.filter(type=notification_type)
             self.stdout.write(f'Filtrando por tipo: {notification_type}')
-        
-        total_checked = 0
-        invalid_notifications = []
-        
-        for notification in queryset:
-            total_checked += 1
-            
-            if not validate_notification_references(notification):
-                invalid_notifications.append({
-                    'id': notification.id,
-                    'type': notification.type,
-                    'message': notification.message[:100] + '...' if len(notification.message) > 100 else notification.message,
-                    'user': notification.user.username,
-                    'created_at': notification.created_at
-                })
-                
-                if not dry_run:
-                    notification.delete()
-                    logger.info(f'Notificación eliminada: ID {notification.id}, Tipo: {notification.type}')
-        
-        # Mostrar resultados
-        self.stdout.write(f'\\nNotificaciones revisadas: {total_checked}')
-        self.stdout.write(f'Notificaciones inválidas encontradas: {len(invalid_notifications)}')
-        
-        if invalid_notifications:
-            self.stdout.write('\\nNotificaciones inválidas:')
-            for notif in invalid_notifications:
+
+        orphaned = get_orphaned_notifications(notification_type=notification_type)
+        expired = get_expired_read_notifications(retention_days) if retention_days is not None else None
+
+        if dry_run:
+            orphaned_count = orphaned.count()
+            self.stdout.write(f'Notificaciones inválidas encontradas: {orphaned_count}')
+            for notif in orphaned.values('id', 'type', 'user__username', 'created_at')[:20]:
                 self.stdout.write(
-                    f'  - ID: {notif["id"]}, Tipo: {notif["type"]}, Usuario: {notif["user"]}'
+                    f'  - ID: {notif["id"]}, Tipo: {notif["type"]}, Usuario: {notif["user__username"]}, '
+                    f'Creada: {notif["created_at"]}'
+                )
+            if orphaned_count > 20:
+                self.stdout.write(f'  ... y {orphaned_count - 20} más')
+
+            if expired is not None:
+                self.stdout.write(
+                    f'Notificaciones leídas con más de {retention_days} días: {expired.count()}'
                 )
-                self.stdout.write(f'    Mensaje: {notif["message"]}')
-                self.stdout.write(f'    Creada: {notif["created_at"]}')
-                self.stdout.write('')
-        
-        if dry_run:
             self.stdout.write(
                 self.style.WARNING('Modo de prueba activado - No se eliminaron notificaciones')
             )
-        else:
-            self.stdout.write(
-                self.style.SUCCESS(f'Limpieza completada - {len(invalid_notifications)} notificaciones eliminadas')
-            )
+            return
+
+        orphaned_deleted = delete_in_batches(orphaned, chunk_size)
+        logger.info(f'Notificaciones huérfanas eliminadas: {orphaned_deleted}')
+        self.stdout.write(f'Notificaciones inválidas eliminadas: {orphaned_deleted}')
+
+        if expired is not None:
+            expired_deleted = delete_in_batches(expired, chunk_size)
+            logger.info(f'Notificaciones leídas antiguas eliminadas: {expired_deleted}')
+            self.stdout.write(f'Notificaciones leídas con más de {retention_days} días eliminadas: {expired_deleted}')
+
+        self.stdout.write(self.style.SUCCESS('Limpieza completada'))
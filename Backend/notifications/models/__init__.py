@@ -1 +1,2 @@
-from .m_notifications import m_notification
\ No newline at end of file
+from .m_notifications import m_notification
+from .m_notification_archive import m_notification_archive
@@ -0,0 +1,24 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class m_notification_archive(models.Model):
+    """
+    Notificaciones leídas retiradas de la tabla principal (ver utils/archive_ut.py).
+    Mantiene m_notification pequeña para que los listados no dependan del historial.
+    """
+    original_id = models.BigIntegerField(db_index=True)
+    type = models.CharField(max_length=50)
+    message = models.CharField(max_length=255)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+    is_read = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notif_archive_user_idx'),
+            models.Index(fields=['created_at'], name='notif_archive_created_idx'),
+        ]
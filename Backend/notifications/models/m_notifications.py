@@ -17,4 +17,12 @@ class m_notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Resumen y listado de no leídas por usuario
+            models.Index(fields=['user', 'is_read', 'type'], name='notification_user_read_idx'),
+            # Listado de no leídas paginado por cursor (created_at, id)
+            models.Index(fields=['user', 'is_read', '-created_at', '-id'], name='notification_unread_page_idx'),
+            # Retención: leídas más antiguas que N días (utils/archive_ut.py)
+            models.Index(fields=['is_read', 'created_at'], name='notification_retention_idx'),
+        ]
\ No newline at end of file
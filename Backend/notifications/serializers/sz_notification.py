@@ -7,8 +7,47 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'first_name', 'last_name']
 
+# Ruta del frontend por tipo de notificación: (administrador, usuario)
+NAVIGATION_ROUTES = {
+    'new_sale_order': ('/admin/ofertas', '/ofertas'),
+    'new_project': ('/admin/projects', '/projects'),
+    'new_chat': ('/admin/chat', '/chat'),
+}
+
+
+def get_navigation_route(notification_type, is_admin):
+    routes = NAVIGATION_ROUTES.get(notification_type)
+    if routes is None:
+        return None
+    return routes[0] if is_admin else routes[1]
+
+
 class sz_notification(serializers.ModelSerializer):
     user_info = UserSerializer(source='user', read_only=True)
+
+    def get_is_admin(self):
+        """Si el usuario de la petición es administrador (se calcula una vez por respuesta)"""
+        if 'is_admin' not in self.context:
+            request = self.context.get('request')
+            user = getattr(request, 'user', None)
+            self.context['is_admin'] = bool(user and (user.is_staff or user.is_superuser))
+        return self.context['is_admin']
+
+    def to_representation(self, instance):
+        """
+        Agrega is_admin y navigation_route a 'data' para la navegación del frontend,
+        sin modificar la instancia (la columna JSON no se vuelve a escribir)
+        """
+        representation = super().to_representation(instance)
+        is_admin = self.get_is_admin()
+        data = dict(representation.get('data') or {})
+        data['is_admin'] = is_admin
+        if 'navigation_route' not in data:
+            route = get_navigation_route(instance.type, is_admin)
+            if route is not None:
+                data['navigation_route'] = route
+        representation['data'] = data
+        return representation
     
     class Meta:
         model = m_notification
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from notifications.models.m_notifications import m_notification
+from notifications.utils.fanout_ut import invalidate_admin_user_ids
+from notifications.utils.summary_ut import invalidate_notification_summary
+from notifications.utils.push_ut import push_notifications_on_commit
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_admin_ids_cache(sender, **kwargs):
+    """Cualquier cambio en usuarios puede cambiar la lista de administradores"""
+    invalidate_admin_user_ids()
+
+
+@receiver(post_save, sender=m_notification)
+def invalidate_summary_cache(sender, instance, **kwargs):
+    # Sin receptor post_delete a propósito: así los DELETE masivos (cleanup_ut) no cargan cada fila;
+    # quien elimina notificaciones invalida el resumen explícitamente
+    invalidate_notification_summary([instance.user_id])
+
+
+@receiver(post_save, sender=m_notification)
+def push_created_notification(sender, instance, created, **kwargs):
+    """Envía por WebSocket las notificaciones creadas con objects.create()"""
+    if created:
+        push_notifications_on_commit([instance])
@@ -0,0 +1,88 @@
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from notifications.models.m_notifications import m_notification
+from notifications.utils.cleanup_ut import cleanup_orphaned_notifications
+from notifications.utils.notifications_ut import notify_all_admins
+from notifications.utils.push_ut import get_user_group_name, send_to_users
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationConsumerTest(TransactionTestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='x', is_staff=True)
+
+    def get_communicator(self, token=None):
+        from optipro.asgi import application
+        path = 'ws/notifications/' + (f'?token={token}' if token else '')
+        return WebsocketCommunicator(application, path, headers=[(b'origin', b'http://localhost')])
+
+    async def test_rejects_connection_without_token(self):
+        communicator = self.get_communicator()
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_pushes_created_notifications_and_unread_count(self):
+        communicator = self.get_communicator(str(AccessToken.for_user(self.admin)))
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        summary = await communicator.receive_json_from()
+        self.assertEqual(summary['type'], 'notification.summary')
+        self.assertEqual(summary['summary']['unread'], 0)
+
+        await database_sync_to_async(notify_all_admins)('new_chat', 'Nuevo mensaje', {'sale_order_id': 1})
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['type'], 'notification.created')
+        self.assertEqual(event['notification']['message'], 'Nuevo mensaje')
+        self.assertEqual(event['unread'], 1)
+        self.assertEqual(await database_sync_to_async(m_notification.objects.count)(), 1)
+
+        await communicator.disconnect()
+
+
+
+class SendToUsersTest(TestCase):
+    """Todos los destinatarios se envían en una sola llamada; el error de uno no afecta a los demás"""
+
+    def test_sends_all_messages_in_one_call(self):
+        sent = []
+
+        class Channel_layer:
+            async def group_send(self, group, event):
+                if group == get_user_group_name(2):
+                    raise ConnectionError('redis')
+                sent.append((group, event['unread']))
+
+        messages = [(user_id, {'type': 'notification.unread', 'unread': user_id}) for user_id in range(1, 51)]
+        with mock.patch('notifications.utils.push_ut.get_channel_layer', return_value=Channel_layer()), \
+                mock.patch('notifications.utils.push_ut.async_to_sync', wraps=async_to_sync) as wrapped:
+            send_to_users(messages)
+
+        self.assertEqual(wrapped.call_count, 1)
+        self.assertEqual(len(sent), 49)
+        self.assertNotIn((get_user_group_name(2), 2), sent)
+
+class OrphanedNotificationsCleanupTest(TestCase):
+    """Solo se eliminan las notificaciones cuya cotización no existe; los ids no numéricos se ignoran"""
+
+    def test_non_numeric_references_do_not_break_cleanup(self):
+        from sale_order.tests import create_sale_order
+
+        user = User.objects.create_user(username='admin', password='x', is_staff=True)
+        sale_order = create_sale_order(user)
+        references = [sale_order.id, str(sale_order.id), 999999, '999999', 'abc', '', '99999999999999999999']
+        for reference in references:
+            m_notification.objects.create(
+                user=user, type='new_sale_order', message='Nueva cotización', data={'sale_order_id': reference}
+            )
+
+        self.assertEqual(cleanup_orphaned_notifications(), 2)
+        remaining = sorted(str(n.data['sale_order_id']) for n in m_notification.objects.all())
+        self.assertEqual(remaining, sorted(['', '99999999999999999999', 'abc', str(sale_order.id), str(sale_order.id)]))
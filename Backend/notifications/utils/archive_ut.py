@@ -0,0 +1,110 @@
+import gzip
+import json
+import logging
+import os
+from celery import shared_task
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from notifications.models.m_notifications import m_notification
+from notifications.models.m_notification_archive import m_notification_archive
+from notifications.utils.cleanup_ut import get_cleanup_chunk_size, get_expired_read_notifications
+from notifications.utils.summary_ut import invalidate_notification_summary
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ('id', 'type', 'message', 'data', 'created_at', 'is_read', 'user_id')
+
+# 'table': copia a m_notification_archive; 'file': JSONL comprimido con gzip (un archivo por mes)
+ARCHIVE_MODES = ('table', 'file')
+
+
+def get_archive_mode(mode=None):
+    mode = mode or getattr(settings, 'NOTIFICATIONS_ARCHIVE_MODE', 'table')
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Modo de archivo inválido: {mode}. Opciones: {', '.join(ARCHIVE_MODES)}")
+    return mode
+
+
+def get_archive_dir():
+    return getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive', 'notifications'))
+
+
+def write_archive_table(rows):
+    m_notification_archive.objects.bulk_create([
+        m_notification_archive(
+            original_id=row['id'],
+            type=row['type'],
+            message=row['message'],
+            data=row['data'],
+            created_at=row['created_at'],
+            is_read=row['is_read'],
+            user_id=row['user_id'],
+        )
+        for row in rows
+    ])
+
+
+def write_archive_file(rows):
+    """
+    Agrega las filas a notifications-AAAA-MM.jsonl.gz según el mes de creación.
+    Cada llamada agrega un miembro gzip nuevo; gzip/zcat leen el archivo completo.
+    """
+    directory = get_archive_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row['created_at'].strftime('%Y-%m'), []).append(row)
+
+    for month, month_rows in by_month.items():
+        path = os.path.join(directory, f'notifications-{month}.jsonl.gz')
+        with gzip.open(path, 'at', encoding='utf-8') as archive_file:
+            for row in month_rows:
+                archive_file.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+
+def archive_read_notifications(days=None, chunk_size=None, mode=None, limit=None):
+    """
+    Mueve las notificaciones leídas con más de `days` días al archivo (tabla o JSONL.gz)
+    y las elimina de m_notification, por lotes de chunk_size.
+    Retorna la cantidad de notificaciones archivadas.
+    """
+    mode = get_archive_mode(mode)
+    chunk_size = get_cleanup_chunk_size(chunk_size)
+    queryset = get_expired_read_notifications(days).order_by('id')
+
+    archived = 0
+    while limit is None or archived < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - archived)
+        rows = list(queryset.values(*ARCHIVE_FIELDS)[:size])
+        if not rows:
+            break
+
+        ids = [row['id'] for row in rows]
+        with transaction.atomic():
+            if mode == 'table':
+                write_archive_table(rows)
+            else:
+                # Si falla la escritura la transacción se revierte y las filas siguen en la tabla
+                write_archive_file(rows)
+            m_notification.objects.filter(id__in=ids).delete()
+
+        invalidate_notification_summary({row['user_id'] for row in rows})
+        archived += len(rows)
+
+        if len(rows) < size:
+            break
+
+    return archived
+
+
+@shared_task
+def archive_notifications_task(days=None, chunk_size=None, mode=None):
+    """Tarea programada (Celery beat) de retención de notificaciones"""
+    started = timezone.now()
+    archived = archive_read_notifications(days=days, chunk_size=chunk_size, mode=mode)
+    logger.info(f"Notificaciones archivadas: {archived} en {(timezone.now() - started).total_seconds():.1f}s")
+    return f"Notificaciones archivadas: {archived}"
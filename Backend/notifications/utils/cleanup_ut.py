@@ -0,0 +1,85 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import BigIntegerField, Case, Exists, OuterRef, When
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from django.utils import timezone
+from notifications.models.m_notifications import m_notification
+from notifications.utils.summary_ut import invalidate_notification_summary
+from sale_order.models.sale_order import M_sale_order
+
+
+# Tipos cuya data['sale_order_id'] debe apuntar a una cotización existente
+SALE_ORDER_REFERENCE_TYPES = ['new_sale_order', 'quote_reminder']
+
+# Solo se convierten a bigint los valores numéricos (máximo 18 dígitos, sin desbordar bigint)
+NUMERIC_REFERENCE_REGEX = r'^[0-9]{1,18}$'
+
+
+def get_cleanup_chunk_size(chunk_size=None):
+    return chunk_size or getattr(settings, 'NOTIFICATIONS_CLEANUP_CHUNK_SIZE', 1000)
+
+
+def get_orphaned_notifications(queryset=None, notification_type=None):
+    """
+    Notificaciones no leídas cuya cotización (data->>'sale_order_id') ya no existe.
+    Es un anti-join (NOT EXISTS) resuelto por la base de datos en una sola consulta.
+    El CAST va dentro de un CASE: un valor no numérico ('abc', '') queda en NULL y se ignora
+    en lugar de hacer fallar toda la consulta.
+    """
+    if queryset is None:
+        queryset = m_notification.objects.all()
+
+    types = [notification_type] if notification_type else SALE_ORDER_REFERENCE_TYPES
+    return (
+        queryset.filter(type__in=types, is_read=False)
+        .annotate(reference_text=KeyTextTransform('sale_order_id', 'data'))
+        .annotate(reference_id=Case(
+            When(reference_text__regex=NUMERIC_REFERENCE_REGEX, then=Cast('reference_text', BigIntegerField())),
+            default=None,
+            output_field=BigIntegerField(),
+        ))
+        .filter(reference_id__isnull=False)
+        .filter(~Exists(M_sale_order.objects.filter(id=OuterRef('reference_id'))))
+    )
+
+
+def get_expired_read_notifications(days=None, queryset=None):
+    """Notificaciones leídas con más de `days` días (NOTIFICATIONS_READ_RETENTION_DAYS por defecto)"""
+    if days is None:
+        days = getattr(settings, 'NOTIFICATIONS_READ_RETENTION_DAYS', 90)
+    if queryset is None:
+        queryset = m_notification.objects.all()
+    return queryset.filter(is_read=True, created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def delete_in_batches(queryset, chunk_size=None):
+    """
+    Elimina las filas del queryset en lotes de chunk_size (DELETE ... WHERE id IN (...)),
+    así cada transacción es corta y no bloquea la tabla. Retorna el total eliminado.
+    """
+    chunk_size = get_cleanup_chunk_size(chunk_size)
+    ids_queryset = queryset.order_by('id').values_list('id', 'user_id')
+
+    deleted = 0
+    while True:
+        rows = list(ids_queryset[:chunk_size])
+        if not rows:
+            break
+
+        ids = [row[0] for row in rows]
+        m_notification.objects.filter(id__in=ids).delete()
+        invalidate_notification_summary({row[1] for row in rows})
+        deleted += len(ids)
+
+        if len(rows) < chunk_size:
+            break
+    return deleted
+
+
+def cleanup_orphaned_notifications(notification_type=None, chunk_size=None, queryset=None):
+    return delete_in_batches(get_orphaned_notifications(queryset, notification_type), chunk_size)
+
+
+def cleanup_expired_read_notifications(days=None, chunk_size=None, queryset=None):
+    return delete_in_batches(get_expired_read_notifications(days, queryset), chunk_size)
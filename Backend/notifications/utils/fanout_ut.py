@@ -0,0 +1,85 @@
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from notifications.models.m_notifications import m_notification
+from notifications.utils.summary_ut import invalidate_notification_summary
+from notifications.utils.push_ut import push_notifications_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+ADMIN_IDS_CACHE_KEY = 'notifications:admin_user_ids'
+ADMIN_IDS_CACHE_TIMEOUT = 60 * 10
+
+
+def get_admin_user_ids():
+    """IDs de los administradores (is_staff) en cache; se invalida con las señales de User"""
+    admin_ids = cache.get(ADMIN_IDS_CACHE_KEY)
+    if admin_ids is None:
+        admin_ids = list(User.objects.filter(is_staff=True).order_by('id').values_list('id', flat=True))
+        cache.set(ADMIN_IDS_CACHE_KEY, admin_ids, ADMIN_IDS_CACHE_TIMEOUT)
+    return admin_ids
+
+
+def invalidate_admin_user_ids():
+    cache.delete(ADMIN_IDS_CACHE_KEY)
+
+
+def fan_out_notification(type, message, data, user_ids):
+    """
+    Crea la misma notificación para varios usuarios con un solo INSERT (bulk_create).
+    Los IDs repetidos se ignoran.
+    """
+    unique_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id is not None))
+    if not unique_ids:
+        return []
+
+    notifications = [
+        m_notification(type=type, message=message, data=data, user_id=user_id)
+        for user_id in unique_ids
+    ]
+    created = m_notification.objects.bulk_create(notifications)
+    # bulk_create no envía post_save: invalidar el resumen de cada destinatario
+    invalidate_notification_summary(unique_ids)
+    push_notifications_on_commit(created)
+    return created
+
+
+@shared_task
+def fan_out_notification_task(type, message, data, user_ids=None, include_admins=False):
+    """Versión en segundo plano de fan_out_notification"""
+    user_ids = list(user_ids or [])
+    if include_admins:
+        user_ids = get_admin_user_ids() + user_ids
+    return len(fan_out_notification(type, message, data, user_ids))
+
+
+def async_fanout_enabled():
+    return getattr(settings, 'NOTIFICATIONS_ASYNC_FANOUT', False)
+
+
+def dispatch_notification(type, message, data, user_ids=None, include_admins=False):
+    """
+    Punto de entrada para enviar una notificación a varios usuarios.
+    Con NOTIFICATIONS_ASYNC_FANOUT activo se delega a Celery al confirmar la transacción,
+    así la petición no espera a los INSERT; si no hay broker se hace en línea.
+    """
+    user_ids = [getattr(user, 'id', user) for user in (user_ids or [])]
+
+    if async_fanout_enabled():
+        def schedule_fan_out():
+            try:
+                fan_out_notification_task.delay(type, message, data, user_ids, include_admins)
+            except Exception as e:
+                logger.warning(f"No se pudo programar la notificación '{type}', se crea en línea: {e}")
+                fan_out_notification_task(type, message, data, user_ids, include_admins)
+
+        transaction.on_commit(schedule_fan_out)
+        return []
+
+    if include_admins:
+        user_ids = get_admin_user_ids() + user_ids
+    return fan_out_notification(type, message, data, user_ids)
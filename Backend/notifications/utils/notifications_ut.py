@@ -4,6 +4,8 @@ from notifications.models.m_notifications import m_notification
 from django.contrib.auth.models import User
 from django.utils import timezone
 from sale_order.models.sale_order import M_sale_order
+from notifications.utils.fanout_ut import dispatch_notification, fan_out_notification, get_admin_user_ids
+from notifications.utils.summary_ut import invalidate_notification_summary
 
 
 @shared_task
@@ -22,14 +24,8 @@ def notify_admins_quote_reminder(sale_order_id):
 
     message = f'Recordatorio: La cotización #{sale_order.code} de {sale_order.name} fue creada hace 3 días.'
 
-    admins = User.objects.filter(is_staff=True)
-    for admin in admins:
-        m_notification.objects.create(
-            type='new_sale_order',  # debe coincidir con los valores permitidos
-            message=message,
-            data=data,
-            user=admin
-        )
+    # Ya se ejecuta en Celery: un solo INSERT para todos los administradores
+    fan_out_notification('new_sale_order', message, data, get_admin_user_ids())  # el tipo debe coincidir con los valores permitidos
 
 def notify_admins_sale_order (sale_order):
     notificacaion_data ={
@@ -43,10 +39,11 @@ def notify_admins_sale_order (sale_order):
 
     message = f'Se ha creado una nueva cotizacion comercial #{sale_order.code} para {sale_order.name}'
 
-    notify_all_admins('new_sale_order', message,notificacaion_data)
-
-    if sale_order.user_id:
-        create_notification('new_sale_order', message,notificacaion_data, sale_order.user_id)
+    # Administradores y creador de la cotización reciben el mismo mensaje: un solo INSERT
+    dispatch_notification(
+        'new_sale_order', message, notificacaion_data,
+        user_ids=[sale_order.user_id_id], include_admins=True
+    )
 
 
 
@@ -63,17 +60,10 @@ def create_notification(type, message, data, user):
 
 def notify_all_admins(type, message, data):
     """
-    Envía notificación a todos los administradores del sistema
+    Envía notificación a todos los administradores del sistema con un solo INSERT
+    (o en segundo plano si NOTIFICATIONS_ASYNC_FANOUT está activo)
     """
-    admin_users = User.objects.filter(is_staff=True)
-    notifications = []
-    
-    for admin in admin_users:
-        notifications.append(
-            create_notification(type, message, data, admin)
-        )
-    
-    return notifications
+    return dispatch_notification(type, message, data, include_admins=True)
 
 def notify_sale_order_status_change(sale_order, old_state, new_state):
     """
@@ -202,28 +192,21 @@ def validate_notification_references(notification):
         return True
 
 @shared_task
-def cleanup_orphaned_notifications():
+def cleanup_orphaned_notifications(chunk_size=None, retention_days=None):
     """
-    Tarea de Celery para limpiar notificaciones que referencian objetos que ya no existen
+    Tarea de Celery para limpiar notificaciones que referencian objetos que ya no existen.
+    Con retention_days también elimina (sin archivar) las leídas más antiguas;
+    la retención normal la hace archive_notifications_task.
     """
-    from notifications.models.m_notifications import m_notification
-    
-    deleted_count = 0
-    total_checked = 0
-    
-    # Obtener todas las notificaciones no leídas relacionadas con sale_orders
-    notifications = m_notification.objects.filter(
-        type__in=['new_sale_order', 'quote_reminder'],
-        is_read=False
-    )
-    
-    for notification in notifications:
-        total_checked += 1
-        if not validate_notification_references(notification):
-            notification.delete()
-            deleted_count += 1
-    
-    return f"Limpieza completada: {deleted_count} notificaciones eliminadas de {total_checked} revisadas"
+    from notifications.utils.cleanup_ut import cleanup_expired_read_notifications
+    from notifications.utils.cleanup_ut import cleanup_orphaned_notifications as delete_orphaned_notifications
+
+    orphaned = delete_orphaned_notifications(chunk_size=chunk_size)
+    expired = 0
+    if retention_days is not None:
+        expired = cleanup_expired_read_notifications(days=retention_days, chunk_size=chunk_size)
+
+    return f"Limpieza completada: {orphaned} notificaciones huérfanas y {expired} leídas antiguas eliminadas"
 
 def mark_notification_as_invalid(notification_id, reason="Referencia no válida"):
     """
@@ -235,6 +218,7 @@ def mark_notification_as_invalid(notification_id, reason="Referencia no válida"
         
         # Opción 1: Eliminar la notificación
         notification.delete()
+        invalidate_notification_summary([notification.user_id])
         return True
         
         # Opción 2: Marcar como leída y agregar información del error
@@ -0,0 +1,113 @@
+"""
+Envío en tiempo real de notificaciones a los usuarios conectados por WebSocket.
+Si Channels no está instalado o no hay capa de canales configurada, las funciones no hacen nada
+y el frontend sigue funcionando con las consultas a /notifications/unread/.
+"""
+import asyncio
+import logging
+from django.db import transaction
+from django.db.models import Count
+from notifications.models.m_notifications import m_notification
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+except ImportError:  # Channels es opcional
+    get_channel_layer = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_user_group_name(user_id):
+    """Grupo de Channels que reúne todas las conexiones abiertas de un usuario"""
+    return f'notifications_user_{user_id}'
+
+
+def get_unread_counts(user_ids):
+    """No leídas por usuario en una sola consulta"""
+    rows = (
+        m_notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .order_by()
+        .values('user_id')
+        .annotate(unread=Count('id'))
+    )
+    counts = {user_id: 0 for user_id in user_ids}
+    counts.update({row['user_id']: row['unread'] for row in rows})
+    return counts
+
+
+async def group_send_all(channel_layer, messages):
+    """Envía todos los mensajes a la vez; retorna el resultado (None o la excepción) de cada uno"""
+    return await asyncio.gather(
+        *(channel_layer.group_send(get_user_group_name(user_id), event) for user_id, event in messages),
+        return_exceptions=True,
+    )
+
+
+def send_to_users(messages):
+    """
+    messages: lista de (user_id, evento). Se envían en una sola llamada asíncrona, así el tiempo
+    no crece con la cantidad de destinatarios. Errores de la capa de canales solo se registran.
+    """
+    channel_layer = get_channel_layer() if get_channel_layer else None
+    if channel_layer is None or not messages:
+        return
+
+    try:
+        results = async_to_sync(group_send_all)(channel_layer, messages)
+    except Exception as e:
+        logger.warning(f"No se pudieron enviar las notificaciones en tiempo real: {e}")
+        return
+
+    for (user_id, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.warning(f"No se pudo enviar la notificación en tiempo real al usuario {user_id}: {result}")
+
+
+def push_notifications(notifications):
+    """Envía las notificaciones nuevas y el total de no leídas a cada destinatario"""
+    from notifications.serializers.sz_notification import sz_notification
+
+    notification_ids = [notification.pk for notification in notifications if notification.pk]
+    if not notification_ids:
+        return
+
+    # Una consulta con el usuario incluido (el serializador usa user_info)
+    notifications = m_notification.objects.filter(id__in=notification_ids).select_related('user')
+
+    unread_counts = get_unread_counts({notification.user_id for notification in notifications})
+    messages = []
+    for notification in notifications:
+        is_admin = notification.user.is_staff or notification.user.is_superuser
+        payload = dict(sz_notification(notification, context={'is_admin': is_admin}).data)
+        messages.append((notification.user_id, {
+            'type': 'notification.created',
+            'notification': payload,
+            'unread': unread_counts.get(notification.user_id, 0),
+        }))
+    send_to_users(messages)
+
+
+def push_unread_counts(user_ids):
+    """Envía el total actualizado de no leídas (p.ej. después de marcar como leídas)"""
+    unread_counts = get_unread_counts(set(user_ids))
+    send_to_users([
+        (user_id, {'type': 'notification.unread', 'unread': unread})
+        for user_id, unread in unread_counts.items()
+    ])
+
+
+def push_notifications_on_commit(notifications):
+    """Espera a que la transacción confirme para no anunciar filas que podrían revertirse"""
+    if get_channel_layer is None:
+        return
+    notifications = list(notifications)
+    transaction.on_commit(lambda: push_notifications(notifications))
+
+
+def push_unread_counts_on_commit(user_ids):
+    if get_channel_layer is None:
+        return
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: push_unread_counts(user_ids))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from notifications.models.m_notifications import m_notification
+
+
+SUMMARY_CACHE_KEY = 'notifications:summary:{user_id}'
+
+
+def get_summary_cache_timeout():
+    """Segundos que se guarda el resumen por usuario; 0 lo desactiva"""
+    return getattr(settings, 'NOTIFICATIONS_SUMMARY_CACHE_TIMEOUT', 60)
+
+
+def compute_notification_summary(user_id):
+    """
+    Total, no leídas y contadores por tipo en una sola consulta
+    (GROUP BY type con COUNT condicional), usando el índice (user, is_read, type).
+    """
+    rows = (
+        m_notification.objects.filter(user_id=user_id)
+        .order_by()  # sin el ordering del Meta para que el GROUP BY sea solo por type
+        .values('type')
+        .annotate(count=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+    )
+    counts = {row['type']: row for row in rows}
+
+    type_counts = {}
+    for type_code, type_name in m_notification.NOTIFICATION_TYPES:
+        row = counts.get(type_code, {})
+        type_counts[type_code] = {
+            'name': type_name,
+            'count': row.get('count', 0),
+            'unread': row.get('unread', 0)
+        }
+
+    return {
+        'total': sum(row['count'] for row in counts.values()),
+        'unread': sum(row['unread'] for row in counts.values()),
+        'types': type_counts
+    }
+
+
+def get_notification_summary(user_id):
+    timeout = get_summary_cache_timeout()
+    if not timeout:
+        return compute_notification_summary(user_id)
+
+    key = SUMMARY_CACHE_KEY.format(user_id=user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_notification_summary(user_id)
+        cache.set(key, summary, timeout)
+    return summary
+
+
+def invalidate_notification_summary(user_ids):
+    """Se llama al crear, marcar como leídas o eliminar notificaciones de estos usuarios"""
+    keys = [SUMMARY_CACHE_KEY.format(user_id=user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
@@ -5,12 +5,32 @@ from django.utils import timezone
 from datetime import timedelta
 from notifications.models.m_notifications import m_notification
 from notifications.serializers.sz_notification import sz_notification
+from notifications.utils.summary_ut import get_notification_summary, invalidate_notification_summary
+from notifications.utils.push_ut import push_unread_counts_on_commit
+from notifications.utils.cleanup_ut import delete_in_batches, get_orphaned_notifications
+from function.paginator import Keyset_paginator
+
+
+class Notification_paginator(Keyset_paginator):
+    """Paginación por cursor de notificaciones: ?limit=50&cursor=..."""
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+    @classmethod
+    def applies(cls, request):
+        return cls.page_size_query_param in request.query_params or cls.cursor_query_param in request.query_params
+
 
 class V_Notification(viewsets.ModelViewSet):
     serializer_class = sz_notification
     
     def get_queryset(self):
-        return m_notification.objects.filter(user=self.request.user)
+        return m_notification.objects.filter(user=self.request.user).select_related('user').order_by('-created_at', '-id')
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_notification_summary([instance.user_id])
     
     def list(self, request):
         """
@@ -19,9 +39,6 @@ class V_Notification(viewsets.ModelViewSet):
         """
         queryset = self.get_queryset()
         
-        # Verificar si el usuario es admin para personalizar la navegación
-        is_admin = request.user.is_staff or request.user.is_superuser
-        
         # Filtrar por tipo
         notification_type = request.query_params.get('type')
         if notification_type:
@@ -53,25 +70,8 @@ class V_Notification(viewsets.ModelViewSet):
         limit = request.query_params.get('limit')
         if limit and limit.isdigit():
             queryset = queryset[:int(limit)]
-            
-        # Enriquecer los datos de notificación con información de navegación
-        for notification in queryset:
-            if 'data' not in notification.__dict__:
-                notification.data = {}
-            
-            # Añadir información si el usuario es admin para la navegación frontend
-            notification.data['is_admin'] = is_admin
-            
-            # Asegurar que haya una estructura de navegación
-            if 'navigation_route' not in notification.data and notification.type:
-                # Configurar rutas basadas en el tipo de notificación
-                if notification.type == 'new_sale_order':
-                    notification.data['navigation_route'] = '/admin/ofertas' if is_admin else '/ofertas'
-                elif notification.type == 'new_project':
-                    notification.data['navigation_route'] = '/admin/projects' if is_admin else '/projects'
-                elif notification.type == 'new_chat':
-                    notification.data['navigation_route'] = '/admin/chat' if is_admin else '/chat'
         
+        # is_admin y navigation_route los agrega el serializador
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -85,8 +85,9 @@ class V_Notification(viewsets.ModelViewSet):
             user=request.user
         )
         
-        count = notifications.count()
-        notifications.update(is_read=True)
+        count = notifications.update(is_read=True)
+        invalidate_notification_summary([request.user.id])
+        push_unread_counts_on_commit([request.user.id])
         
         return Response({
             'success': True,
@@ -100,8 +101,9 @@ class V_Notification(viewsets.ModelViewSet):
         Marca todas las notificaciones del usuario como leídas.
         """
         notifications = self.get_queryset().filter(is_read=False)
-        count = notifications.count()
-        notifications.update(is_read=True)
+        count = notifications.update(is_read=True)
+        invalidate_notification_summary([request.user.id])
+        push_unread_counts_on_commit([request.user.id])
         
         return Response({
             'success': True,
@@ -116,26 +118,12 @@ class V_Notification(viewsets.ModelViewSet):
         """
         notifications = self.get_queryset().filter(is_read=False)
         
-        # Verificar si el usuario es admin para personalizar la navegación
-        is_admin = request.user.is_staff or request.user.is_superuser
-        
-        # Enriquecer los datos de notificación con información de navegación
-        for notification in notifications:
-            if 'data' not in notification.__dict__:
-                notification.data = {}
-            
-            # Añadir información si el usuario es admin para la navegación frontend
-            notification.data['is_admin'] = is_admin
-            
-            # Asegurar que haya una estructura de navegación
-            if 'navigation_route' not in notification.data and notification.type:
-                # Configurar rutas basadas en el tipo de notificación
-                if notification.type == 'new_sale_order':
-                    notification.data['navigation_route'] = '/admin/ofertas' if is_admin else '/ofertas'
-                elif notification.type == 'new_project':
-                    notification.data['navigation_route'] = '/admin/projects' if is_admin else '/projects'
-                elif notification.type == 'new_chat':
-                    notification.data['navigation_route'] = '/admin/chat' if is_admin else '/chat'
+        # Con ?limit= o ?cursor= se pagina por cursor (created_at, id) en lugar de devolver todo
+        if Notification_paginator.applies(request):
+            paginator = Notification_paginator()
+            page = paginator.paginate_queryset(notifications, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(notifications, many=True)
         return Response(serializer.data)
@@ -146,26 +134,7 @@ class V_Notification(viewsets.ModelViewSet):
         Devuelve un resumen de las notificaciones: total, no leídas, 
         y contadores por tipo.
         """
-        queryset = self.get_queryset()
-        total = queryset.count()
-        unread = queryset.filter(is_read=False).count()
-        
-        # Contar por tipo
-        type_counts = {}
-        notification_types = m_notification.NOTIFICATION_TYPES
-        
-        for type_code, type_name in notification_types:
-            type_counts[type_code] = {
-                'name': type_name,
-                'count': queryset.filter(type=type_code).count(),
-                'unread': queryset.filter(type=type_code, is_read=False).count()
-            }
-        
-        return Response({
-            'total': total,
-            'unread': unread,
-            'types': type_counts
-        })
+        return Response(get_notification_summary(request.user.id))
     
     @action(detail=False, methods=['post'])
     def validate_and_cleanup(self, request):
@@ -173,23 +142,21 @@ class V_Notification(viewsets.ModelViewSet):
         Valida todas las notificaciones del usuario y elimina las que referencian
         objetos que ya no existen
         """
-        from notifications.utils.notifications_ut import validate_notification_references
-        
-        queryset = self.get_queryset().filter(is_read=False)
-        invalid_notifications = []
-        valid_count = 0
+        queryset = m_notification.objects.filter(user=request.user)
+        orphaned = get_orphaned_notifications(queryset)
+        invalid_notifications = [
+            {
+                'id': notification['id'],
+                'type': notification['type'],
+                'message': notification['message'],
+                'reason': 'Referencia no válida'
+            }
+            for notification in orphaned.values('id', 'type', 'message')
+        ]
         
-        for notification in queryset:
-            if not validate_notification_references(notification):
-                invalid_notifications.append({
-                    'id': notification.id,
-                    'type': notification.type,
-                    'message': notification.message,
-                    'reason': 'Referencia no válida'
-                })
-                notification.delete()
-            else:
-                valid_count += 1
+        # Un solo DELETE para las notificaciones inválidas del usuario
+        delete_in_batches(m_notification.objects.filter(id__in=[n['id'] for n in invalid_notifications]))
+        valid_count = queryset.filter(is_read=False).count()
         
         return Response({
             'message': 'Validación completada',
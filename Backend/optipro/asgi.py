@@ -1,17 +1,45 @@
 """
-ASGI config for Gestor_Citas project.
+ASGI config for optipro project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Lo usa el proceso web del Procfile para HTTP y WebSocket (notificaciones en tiempo real,
+Channels). Las descargas por streaming se envían por partes gracias a
+function.middleware.AsyncStreamingMiddleware.
 
 For more information on this file, see
-https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Gestor_Citas.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'optipro.settings')
 
-application = get_asgi_application()
+# Inicializar Django antes de importar consumers/modelos
+django_asgi_app = get_asgi_application()
 
+# Precargar estilos, imágenes y textos del PDF de cotización (ver wsgi.py)
+try:
+    from sale_order.utils.pdf_reportlab import warm_pdf_resources
+    warm_pdf_resources()
+except Exception as e:
+    logging.getLogger(__name__).warning(f"No se pudieron precargar los recursos del PDF: {e}")
+
+try:
+    from channels.routing import ProtocolTypeRouter, URLRouter
+    from channels.security.websocket import AllowedHostsOriginValidator
+except ImportError:
+    # Sin Channels instalado solo se atiende HTTP
+    application = django_asgi_app
+else:
+    from function.ws_auth import JWTAuthMiddleware
+    from notifications.routing import websocket_urlpatterns
+
+    application = ProtocolTypeRouter({
+        'http': django_asgi_app,
+        'websocket': AllowedHostsOriginValidator(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        ),
+    })
@@ -12,9 +12,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+import logging
 import os
+import sys
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 import dj_database_url
+from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -62,6 +67,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',   # OpClass en los índices de búsqueda (function/indexes.py)
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -103,6 +109,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'function.middleware.AsyncStreamingMiddleware',   # primero: envía por partes las descargas bajo ASGI
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -136,14 +143,29 @@ TEMPLATES = [
 WSGI_APPLICATION = 'optipro.wsgi.application'
 ASGI_APPLICATION = 'optipro.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [os.getenv('CHANNEL_LAYERS')],
+# Con CHANNEL_LAYERS (URL de Redis) se comparte entre workers; sin ella se usa una capa
+# en memoria de un solo proceso, válida solo en desarrollo y tests: con varios workers las
+# notificaciones enviadas desde un proceso no llegan a los sockets de los demás
+if os.getenv('CHANNEL_LAYERS'):
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv('CHANNEL_LAYERS')],
+            },
         },
-    },
-}
+    }
+else:
+    if not DEBUG and sys.argv[1:2] != ['test']:
+        logging.getLogger(__name__).error(
+            "CHANNEL_LAYERS no está definida: se usa InMemoryChannelLayer y las notificaciones "
+            "en tiempo real solo llegan a los sockets del mismo proceso"
+        )
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
 
 
 # Database
@@ -201,7 +223,9 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # Configuraciones de manejo de archivos
-FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
+# Los archivos mayores a esto se escriben a un temporal en disco en vez de quedar en la RAM del worker;
+# los archivos grandes se suben por partes (function/chunked_upload.py)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
 
@@ -219,6 +243,74 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = None  # Desactivar result backend para evitar problemas de pickle
 
+# Generar el PDF de la cotización en segundo plano (Celery) al crear/actualizar
+QUOTATION_PDF_PRERENDER = os.getenv('QUOTATION_PDF_PRERENDER', 'False') == 'True'
+
+# Crear las notificaciones a administradores en segundo plano (Celery) en lugar de durante la petición
+NOTIFICATIONS_ASYNC_FANOUT = os.getenv('NOTIFICATIONS_ASYNC_FANOUT', 'False') == 'True'
+
+# Segundos que se guarda en cache el resumen de notificaciones por usuario (0 = sin cache)
+NOTIFICATIONS_SUMMARY_CACHE_TIMEOUT = 60
+
+# Limpieza de notificaciones: filas por lote y días que se conservan las notificaciones leídas
+NOTIFICATIONS_CLEANUP_CHUNK_SIZE = 1000
+NOTIFICATIONS_READ_RETENTION_DAYS = 90
+
+# Las leídas antiguas se mueven a la tabla de archivo ('table') o a JSONL.gz mensuales ('file')
+NOTIFICATIONS_ARCHIVE_MODE = os.getenv('NOTIFICATIONS_ARCHIVE_MODE', 'table')
+NOTIFICATIONS_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive', 'notifications')
+
+# Módulos con tareas de Celery (no se llaman tasks.py, autodiscover no los encuentra)
+CELERY_IMPORTS = (
+    'notifications.utils.notifications_ut',
+    'notifications.utils.fanout_ut',
+    'notifications.utils.archive_ut',
+    'sale_order.utils.pdf_cache',
+    'function.delta_sync',
+    'sale_order.utils.daily_summary',
+    'function.file_deletion',
+    'function.media_gc',
+    'function.chunked_upload',
+    'sale_order.utils.pdf_bulk_export',
+)
+
+# Tareas programadas (celery -A optipro beat)
+CELERY_BEAT_SCHEDULE = {
+    'archive-read-notifications': {
+        'task': 'notifications.utils.archive_ut.archive_notifications_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'cleanup-orphaned-notifications': {
+        'task': 'notifications.utils.notifications_ut.cleanup_orphaned_notifications',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'purge-deleted-records': {
+        'task': 'function.delta_sync.purge_deleted_records_task',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'refresh-sale-order-daily-summary': {
+        'task': 'sale_order.utils.daily_summary.refresh_recent_sale_order_summary_task',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    # Respaldo de la cola de archivos (normalmente el worker se programa al confirmar cada eliminación)
+    'process-pending-file-deletions': {
+        'task': 'function.file_deletion.process_file_deletions_task',
+        'schedule': crontab(minute='*/10'),
+    },
+    'collect-orphaned-media': {
+        'task': 'function.media_gc.collect_orphaned_media_task',
+        'schedule': crontab(hour=5, minute=0, day_of_week='sunday'),
+    },
+    'cleanup-expired-chunked-uploads': {
+        'task': 'function.chunked_upload.cleanup_chunked_uploads_task',
+        'schedule': crontab(minute=15),
+    },
+    'purge-quotation-exports': {
+        'task': 'sale_order.utils.pdf_bulk_export.purge_quotation_exports_task',
+        'schedule': crontab(minute=45),
+    },
+}
+
 # Configuración de logging mejorada
 LOGGING = {
     'version': 1,
@@ -286,17 +378,82 @@ CONN_HEALTH_CHECKS = True  # Verificar salud de conexiones
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Configuraciones de cache para mejorar rendimiento
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 300,
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,
-            'CULL_FREQUENCY': 3,
+# Con Redis la cache se comparte entre workers y Celery, con una copia local de pocos segundos
+# en cada proceso; sin Redis se usa memoria local.
+# La cache usa su propia base de Redis: cache.clear() ejecuta FLUSHDB y no debe borrar la cola de
+# Celery ni la capa de Channels. REDIS_CACHE_URL la indica completa; si no está, se usa el servidor
+# de REDIS_URL o CHANNEL_LAYERS con la base REDIS_CACHE_DB (por defecto 1). Si el proveedor de
+# Redis solo permite la base 0, definir REDIS_CACHE_URL con otra instancia.
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+if not REDIS_CACHE_URL and (os.getenv('REDIS_URL') or os.getenv('CHANNEL_LAYERS')):
+    REDIS_CACHE_URL = urlsplit(os.getenv('REDIS_URL') or os.getenv('CHANNEL_LAYERS'))._replace(
+        path=f"/{os.getenv('REDIS_CACHE_DB', '1')}"
+    ).geturl()
+if REDIS_CACHE_URL and os.getenv('CHANNEL_LAYERS'):
+    redis_cache_location = urlsplit(REDIS_CACHE_URL)
+    redis_broker_location = urlsplit(os.getenv('CHANNEL_LAYERS'))
+    if (redis_cache_location.netloc, redis_cache_location.path.strip('/') or '0') == \
+            (redis_broker_location.netloc, redis_broker_location.path.strip('/') or '0'):
+        raise ImproperlyConfigured(
+            'La cache y CHANNEL_LAYERS (broker de Celery y Channels) usan la misma base de Redis; '
+            'definir REDIS_CACHE_URL o REDIS_CACHE_DB con otra base'
+        )
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'function.cache.TieredCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'TIMEOUT': 300,
+            'KEY_PREFIX': 'optipro',
+            'OPTIONS': {
+                'L1_TIMEOUT': 5,
+                'L1_MAX_ENTRIES': 1000,
+            }
         }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+                'CULL_FREQUENCY': 3,
+            }
+        }
+    }
+
+# Segundos que se guardan las respuestas GET cacheadas (function/response_cache.py); 0 desactiva
+API_RESPONSE_CACHE_TIMEOUT = 300
+
+# Sincronización incremental para BI (function/delta_sync.py)
+DELTA_SYNC_OVERLAP_SECONDS = 60   # margen de next_since para transacciones que confirman tarde
+DELTA_SYNC_TOMBSTONE_DAYS = 90    # días que se guardan los ids eliminados (M_deleted_record)
+
+# Días que recalcula cada noche la tarea del resumen diario de cotizaciones (sale_order/utils/daily_summary.py)
+SALE_ORDER_SUMMARY_REFRESH_DAYS = 7
+
+# Cola de eliminación de archivos del storage (function/file_deletion.py)
+FILE_DELETION_BATCH_SIZE = 200
+FILE_DELETION_MAX_ATTEMPTS = 8   # después de estos intentos la fila queda para revisión manual
+
+# Recolector de archivos huérfanos de MEDIA_ROOT (function/media_gc.py)
+MEDIA_GC_GRACE_HOURS = 24   # no se tocan archivos más recientes (subidas con la transacción en curso)
+MEDIA_GC_EXCLUDE_DIRS = ['quotations_cache']   # directorios que no pertenecen a ningún FileField
+
+# Adjuntos con almacenamiento por contenido en MEDIA_ROOT/blobs (function/storage.py)
+BLOB_DELETE_GRACE_SECONDS = 3600   # un blob reutilizado hace menos de esto no se elimina (lo recupera el recolector)
+
+# Subida de archivos grandes por partes (function/chunked_upload.py)
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'chunked_uploads')   # fuera de MEDIA_ROOT: no se sirve públicamente
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024   # 2GB por archivo
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 20 * 1024 * 1024   # 20MB por parte
+CHUNKED_UPLOAD_EXPIRATION_HOURS = 48   # las subidas sin actividad se eliminan
+
+# Exportación en ZIP de los PDF de cotizaciones, generada en Celery (sale_order/utils/pdf_bulk_export.py)
+QUOTATION_EXPORT_RETENTION_HOURS = 24   # los ZIP generados se eliminan después de este tiempo
+QUOTATION_EXPORT_TIME_LIMIT_MINUTES = 30   # límite de la tarea; una exportación 'running' más vieja se marca fallida
 
 # Configuraciones para evitar memory leaks en workers
 USE_TZ = True
@@ -32,6 +32,7 @@ urlpatterns = [
     path('', include('sale_order.urls')),
     path('', include('technical_visit.urls')),
     path('', include('chat.urls')),
+    path('', include('function.urls')),
     path('api/', include('notifications.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
 ]
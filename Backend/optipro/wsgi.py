@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'optipro.settings')
 
 application = get_wsgi_application()
+
+# Precargar estilos, imágenes y textos del PDF de cotización; con gunicorn --preload
+# se construyen una sola vez en el proceso maestro y los workers los heredan
+try:
+    from sale_order.utils.pdf_reportlab import warm_pdf_resources
+    warm_pdf_resources()
+except Exception as e:
+    logging.getLogger(__name__).warning(f"No se pudieron precargar los recursos del PDF: {e}")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProyectConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'proyect'
+
+    def ready(self):
+        """Importar las señales cuando la aplicación esté lista"""
+        import proyect.signals
@@ -3,6 +3,7 @@ from proyect.models.proyect import M_proyect
 from function.validators import only_lters_for_names
 from django.core.validators import RegexValidator
 from django.core.validators import FileExtensionValidator
+from function.storage import get_attachment_storage
 
 class M_attach_proyect(models.Model):
     news_choices = [
@@ -19,7 +20,8 @@ class M_attach_proyect(models.Model):
     ]
     date = models.DateField(null=False, auto_now_add=True, editable=False)
     date_2 = models.DateField(null=True, blank=True, editable=True)
-    attach = models.FileField(null=False, upload_to='media/', validators=[FileExtensionValidator(allowed_extensions=['pdf','doc', 'docx', 'xls', 'xlsx','png', 'jpg'])])
+    # Almacenamiento por contenido (function/storage.py): un archivo repetido se guarda una sola vez
+    attach = models.FileField(null=False, upload_to='media/', storage=get_attachment_storage, db_index=True, validators=[FileExtensionValidator(allowed_extensions=['pdf','doc', 'docx', 'xls', 'xlsx','png', 'jpg'])])
     news = models.CharField(max_length=30, choices=news_choices, default='Ninguna', null=False, blank=False)
     fulfillment = models.CharField(max_length=12, choices=fulfillment_choices, default='Pendiente', null=False, blank=False)
     name = models.CharField(max_length=80, null=False, blank=False, validators=[
@@ -31,9 +33,15 @@ class M_attach_proyect(models.Model):
     size = models.CharField(max_length=50, null=False, blank=False)
     content_type = models.CharField(max_length=100, null=False, blank=False)
     proyect_id = models.ForeignKey(M_proyect, null=False, on_delete=models.CASCADE, db_column='proyect_id')
+    # Sincronización incremental (function/delta_sync.py); las filas existentes toman la fecha de la migración
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'attach_proyect'
+        indexes = [
+            models.Index(fields=['name'], name='attach_proyect_name_like_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['updated_at', 'id'], name='attach_proyect_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.proyect_id})'
\ No newline at end of file
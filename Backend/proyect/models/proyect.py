@@ -1,6 +1,7 @@
 from django.db import models
 from sale_order.models.sale_order import M_sale_order
 from django.contrib.auth.models import User
+from function.indexes import upper_prefix_index
 from function.validators import only_numbers, only_letters_numbers_symbols
 
 class M_proyect(models.Model):
@@ -15,10 +16,20 @@ class M_proyect(models.Model):
     status = models.CharField(max_length=30, null=False, blank=False, choices=status_choices)
     progress_percentage = models.FloatField(default=0.0)
     sale_order_id = models.ForeignKey(M_sale_order, null=False, blank=False, on_delete=models.DO_NOTHING, db_column='sale_order_id')
+    # Sincronización incremental (function/delta_sync.py); las filas existentes toman la fecha de la migración
+    updated_at = models.DateTimeField(auto_now=True)
     
 
     class Meta:
         db_table = 'proyect'
+        # Índices para búsquedas por prefijo (LIKE 'texto%'); en PostgreSQL usan varchar_pattern_ops.
+        # El nombre se busca sin distinguir mayúsculas: índice sobre UPPER(p_name) (function/indexes.py)
+        indexes = [
+            models.Index(fields=['code'], name='proyect_code_like_idx', opclasses=['varchar_pattern_ops']),
+            upper_prefix_index('p_name', name='proyect_p_name_upper_idx'),
+            models.Index(fields=['status'], name='proyect_status_like_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['updated_at', 'id'], name='proyect_updated_idx'),
+        ]
     
     def __str__(self):
         return f'{self.code} / {self.sale_order_id}'
\ No newline at end of file
@@ -115,5 +115,8 @@ class sz_proyect_powerBi(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_attachments(self, obj):
+        # V_proyect_export anota attachments_count en la consulta principal
+        if hasattr(obj, 'attachments_count'):
+            return obj.attachments_count
         return M_attach_proyect.objects.filter(proyect_id=obj.id).count()
 
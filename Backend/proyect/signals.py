@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from proyect.models.proyect import M_proyect
+from proyect.models.attach_proyect import M_attach_proyect
+from proyect.models.proyect_comentary import M_proyect_comentary
+from sale_order.models.sale_order import M_sale_order
+from function.delta_sync import register_deletion_tracking, touch_updated_at
+from function.file_deletion import register_file_cleanup
+from function.response_cache import cache_tag, connect_cache_tags
+from sale_order.utils.daily_summary import refresh_sale_order_daily_summary_on_commit
+
+
+# Cache de respuestas (function/response_cache.py): cada cambio invalida el proyecto y los listados
+connect_cache_tags(M_proyect, lambda instance: [
+    cache_tag('proyect', instance.pk), cache_tag('proyect')
+])
+connect_cache_tags(M_attach_proyect, lambda instance: [
+    cache_tag('proyect', instance.proyect_id_id), cache_tag('proyect')
+])
+connect_cache_tags(M_proyect_comentary, lambda instance: [
+    cache_tag('proyect', instance.proyect_id_id), cache_tag('proyect')
+])
+
+# La respuesta del proyecto incluye los datos de su cotización
+connect_cache_tags(M_sale_order, lambda instance: [
+    cache_tag('proyect', proyect_id)
+    for proyect_id in M_proyect.objects.filter(sale_order_id=instance.pk).values_list('id', flat=True)
+], name='proyect')
+
+
+# Sincronización incremental (function/delta_sync.py)
+register_deletion_tracking(M_proyect, M_attach_proyect)
+
+# Los archivos de los adjuntos eliminados se borran en segundo plano (function/file_deletion.py)
+register_file_cleanup(M_attach_proyect)
+
+
+@receiver(post_save, sender=M_sale_order)
+def touch_proyect_from_sale_order(sender, instance, **kwargs):
+    # La fila del proyecto en la exportación incluye columnas de la cotización
+    M_proyect.objects.filter(sale_order_id=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=M_attach_proyect)
+@receiver(post_delete, sender=M_attach_proyect)
+def touch_proyect_from_attachment(sender, instance, **kwargs):
+    # ... y la cantidad de adjuntos (agrupado dentro de deferred_delta_sync)
+    touch_updated_at(M_proyect, [instance.proyect_id_id])
+
+
+@receiver(post_save, sender=M_proyect)
+@receiver(post_delete, sender=M_proyect)
+def refresh_sale_order_summary_conversions(sender, instance, **kwargs):
+    # Las conversiones cotización -> proyecto del resumen diario se cuentan en el día de la cotización
+    day = M_sale_order.objects.filter(pk=instance.sale_order_id_id).values_list('date', flat=True).first()
+    refresh_sale_order_daily_summary_on_commit([day])
@@ -1,8 +1,9 @@
 from django.urls import path
-from proyect.views.v_proyect import V_proyect_create, V_proyect_list, V_proyect_retrive,V_proyect_update,V_proyect_delete, V_proyect_export, UpdateProjectProgress
+from proyect.views.v_proyect import V_proyect_create, V_proyect_list, V_proyect_retrive,V_proyect_update,V_proyect_delete, V_proyect_export, V_proyect_export_stream, UpdateProjectProgress
 from proyect.views.v_proyect_comentary import V_proyect_comentary_create, V_proyect_comentary_list, V_proyect_comentary_retrive, V_proyect_comentary_update
 from proyect.views.v_attach_proyect import AttachProyect, V_attach_proyect_list, V_attach_proyect_retrive, V_attach_proyect_update, V_attach_proyect_PowerBi, V_attach_proyect_delete
 from proyect.views.v_saleorder_to_proyect import V_sale_order_to_proyect
+from proyect.views.v_powerbi_delta import V_proyect_delta, V_sale_order_delta, V_attach_proyect_delta
 
 
 
@@ -31,6 +32,10 @@ urlpatterns = [
     path('sale_order_to_proyect/<int:sale_order_id>/', V_sale_order_to_proyect.as_view()),
 
     path('powerbi/proyectos/', V_proyect_export.as_view(), name='export_proyectos'),
+    path('powerbi/proyectos/stream/<str:export_format>/', V_proyect_export_stream.as_view(), name='export_proyectos_stream'),
+    path('powerbi/delta/proyectos/', V_proyect_delta.as_view(), name='delta_proyectos'),
+    path('powerbi/delta/cotizaciones/', V_sale_order_delta.as_view(), name='delta_cotizaciones'),
+    path('powerbi/delta/attach_proyect/', V_attach_proyect_delta.as_view(), name='delta_attach_proyect'),
     path('powerbi/attach_proyect/', V_attach_proyect_PowerBi.as_view(), name='export_attach_proyect'),
     path('powerbi/UpdateProjectProgress/<int:pk>/', UpdateProjectProgress.as_view(), name='export_progress_percentage'),
 ]
\ No newline at end of file
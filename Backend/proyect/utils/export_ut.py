@@ -0,0 +1,107 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F
+from proyect.models.proyect import M_proyect
+
+
+# Filas que se leen de la base de datos (cursor del lado del servidor en PostgreSQL) y se envían por bloque
+PROYECT_EXPORT_CHUNK_SIZE = 2000
+PROYECT_EXPORT_ROWS_PER_WRITE = 500
+
+PROYECT_EXPORT_FORMATS = ('jsonl', 'csv')
+
+# Columnas planas de la exportación: (columna, campo o expresión)
+PROYECT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('date', 'date'),
+    ('p_name', 'p_name'),
+    ('code', 'code'),
+    ('status', 'status'),
+    ('progress_percentage', 'progress_percentage'),
+    ('attachments', 'attachments'),
+    ('sale_order_id', 'sale_order_id'),
+    ('sale_order_code', F('sale_order_id__code')),
+    ('sale_order_date', F('sale_order_id__date')),
+    ('sale_order_state', F('sale_order_id__state')),
+    ('client_name', F('sale_order_id__name')),
+    ('nitCC', F('sale_order_id__nitCC')),
+    ('city', F('sale_order_id__city')),
+    ('departement', F('sale_order_id__departement')),
+    ('proyect_type', F('sale_order_id__proyect_type')),
+    ('system_type', F('sale_order_id__system_type')),
+    ('payment_type', F('sale_order_id__payment_type')),
+    ('Type_installation', F('sale_order_id__Type_installation')),
+    ('total_quotation', F('sale_order_id__total_quotation')),
+    ('power_required', F('sale_order_id__power_required')),
+    ('energy_production', F('sale_order_id__energy_production')),
+    ('number_panels', F('sale_order_id__number_panels')),
+    ('necessary_area', F('sale_order_id__necessary_area')),
+    ('date_start', F('sale_order_id__date_start')),
+    ('date_end', F('sale_order_id__date_end')),
+    ('cotizador', F('sale_order_id__cotizador')),
+    ('technical_visit_id', F('sale_order_id__technical_visit_id')),
+]
+PROYECT_EXPORT_FIELDNAMES = [column for column, _ in PROYECT_EXPORT_COLUMNS]
+
+
+def get_proyect_export_rows(chunk_size=PROYECT_EXPORT_CHUNK_SIZE):
+    """
+    Una sola consulta: proyecto + cotización (JOIN) + cantidad de adjuntos (COUNT agrupado).
+    Retorna un iterador de diccionarios planos; no carga la tabla completa en memoria.
+    """
+    plain_fields = [field for column, field in PROYECT_EXPORT_COLUMNS if isinstance(field, str) and field != 'attachments']
+    expressions = {column: field for column, field in PROYECT_EXPORT_COLUMNS if not isinstance(field, str)}
+
+    queryset = (
+        M_proyect.objects
+        .annotate(attachments=Count('m_attach_proyect'))
+        .values(*plain_fields, 'attachments', **expressions)
+        .order_by('id')
+    )
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Buffer de csv.writer que retorna la línea escrita en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def _batched(lines, size=PROYECT_EXPORT_ROWS_PER_WRITE):
+    # Agrupa las líneas para no enviar un bloque HTTP por cada fila
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_proyects_jsonl(rows=None):
+    rows = get_proyect_export_rows() if rows is None else rows
+    return _batched(
+        json.dumps({column: row[column] for column in PROYECT_EXPORT_FIELDNAMES}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        for row in rows
+    )
+
+
+def stream_proyects_csv(rows=None):
+    rows = get_proyect_export_rows() if rows is None else rows
+    writer = csv.DictWriter(_Echo(), fieldnames=PROYECT_EXPORT_FIELDNAMES, extrasaction='ignore')
+
+    def lines():
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+
+    return _batched(lines())
+
+
+def stream_proyect_export(export_format):
+    if export_format not in PROYECT_EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {export_format}. Opciones: {', '.join(PROYECT_EXPORT_FORMATS)}")
+    return stream_proyects_jsonl() if export_format == 'jsonl' else stream_proyects_csv()
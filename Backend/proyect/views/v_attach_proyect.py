@@ -10,7 +10,6 @@ from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from proyect.models.proyect import M_proyect
 from notifications.utils.notifications_ut import notify_new_project_attachment
-import os
 
 
 
@@ -118,10 +117,8 @@ class V_attach_proyect_delete(DestroyAPIView):
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        file_path = instance.attach.path  # Ruta completa del archivo
         file_name = instance.name # nombre del archivo
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # El archivo físico lo elimina el worker de la cola al confirmar (function/file_deletion.py)
         self.perform_destroy(instance)
         return Response(
             {
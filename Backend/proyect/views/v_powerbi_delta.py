@@ -0,0 +1,39 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny
+from django.db.models import Count
+from proyect.models import M_proyect, M_attach_proyect
+from sale_order.models.sale_order import M_sale_order
+from proyect.utils.export_ut import PROYECT_EXPORT_COLUMNS
+from function.delta_sync import delta_sync_response
+
+
+# Sincronización incremental para Power BI: ?since=<ISO 8601> retorna solo filas modificadas y ids eliminados.
+# Sin since retorna la carga inicial completa, paginada (seguir el enlace next hasta has_more=false).
+
+class V_proyect_delta(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # Mismas columnas planas que powerbi/proyectos/stream/
+        fields = [field for _, field in PROYECT_EXPORT_COLUMNS if isinstance(field, str) and field != 'attachments']
+        expressions = {column: field for column, field in PROYECT_EXPORT_COLUMNS if not isinstance(field, str)}
+        queryset = M_proyect.objects.annotate(attachments=Count('m_attach_proyect'))
+        return delta_sync_response(request, M_proyect, queryset, [*fields, 'attachments'], expressions)
+
+
+class V_sale_order_delta(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # values() con el nombre del campo: las llaves foráneas llegan como user_id y technical_visit_id
+        # (con el id relacionado), igual que en el resto de la API, no como user_id_id
+        fields = [field.name for field in M_sale_order._meta.concrete_fields if field.name != 'updated_at']
+        return delta_sync_response(request, M_sale_order, M_sale_order.objects.all(), fields)
+
+
+class V_attach_proyect_delta(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        fields = ['id', 'name', 'proyect_id', 'date', 'date_2', 'news', 'fulfillment', 'size', 'content_type']
+        return delta_sync_response(request, M_attach_proyect, M_attach_proyect.objects.all(), fields)
@@ -5,10 +5,16 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from proyect.models import M_proyect, M_attach_proyect
 from proyect.serializers.sz_proyect import sz_proyect, sz_proyect_retrive, sz_proyect_list, sz_proyect_powerBi
-import os
 
-from django.db.models import F, Q
+from django.db.models import Count, F, Prefetch, Q
+from django.http import StreamingHttpResponse
 from function.paginator import Limit_paginator
+from django.db import transaction
+from function.delta_sync import deferred_delta_sync
+from function.file_deletion import deferred_file_deletions
+from function.response_cache import Cached_response_mixin, cache_tag
+from proyect.utils.export_ut import PROYECT_EXPORT_FORMATS, stream_proyect_export
+from sale_order.serializers.sz_sale_order import sale_order_retrive_queryset
 
 class V_proyect_create(CreateAPIView):
     permission_classes = [AllowAny]
@@ -45,7 +51,7 @@ class V_proyect_list(ListAPIView):
         if query is not None and query != "":
             queryset = queryset.filter(
                 Q(code__startswith=query) |
-                Q(status_choices__startswith=query)
+                Q(status__startswith=query)
             )
         return queryset
     
@@ -68,12 +74,16 @@ class V_proyect_list(ListAPIView):
 
         return Response(data, status=status.HTTP_200_OK)
     
-class V_proyect_retrive(RetrieveAPIView): #class retrieve return response witch data filter for pk in request
+class V_proyect_retrive(Cached_response_mixin, RetrieveAPIView): #class retrieve return response witch data filter for pk in request
     permission_classes = [AllowAny]
     model_class = M_proyect
     queryset = model_class.objects.all()
     serializer_class = sz_proyect_retrive
 
+    def get_cache_tags(self, request, *args, **kwargs):
+        # Los cambios en la cotización del proyecto también invalidan esta etiqueta (signals.py)
+        return [cache_tag('proyect', kwargs.get('pk'))]
+
 class V_proyect_update(UpdateAPIView):
     queryset = M_proyect.objects.all()
     permission_classes = [AllowAny]
@@ -88,17 +98,11 @@ class V_proyect_delete(DestroyAPIView):
         try:
             proyecto = self.get_object()
 
-            # Buscar y eliminar archivos físicos
-            archivos = M_attach_proyect.objects.filter(proyect_id=proyecto)
-            for archivo in archivos:
-                try:
-                    if archivo.attach and os.path.isfile(archivo.attach.path):
-                        os.remove(archivo.attach.path)
-                except Exception as e:
-                    print(f"Error eliminando archivo {archivo.attach.name}: {str(e)}")
-
-            # Eliminar el proyecto
-            self.perform_destroy(proyecto)
+            # Eliminar el proyecto (y sus adjuntos en cascada); los archivos físicos se encolan
+            # con un solo INSERT y los elimina el worker al confirmar (function/file_deletion.py).
+            # Los registros de borrado también se insertan juntos (function/delta_sync.py)
+            with transaction.atomic(), deferred_file_deletions(), deferred_delta_sync():
+                self.perform_destroy(proyecto)
             return Response({'mensaje': 'Proyecto eliminado correctamente.'}, status=status.HTTP_204_NO_CONTENT)
             
         except Exception as e:
@@ -107,12 +111,42 @@ class V_proyect_delete(DestroyAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class V_proyect_export(ListAPIView):
-    queryset = M_proyect.objects.all()
+class V_proyect_export(Cached_response_mixin, ListAPIView):
+    # Cotización con sus relaciones precargadas y adjuntos contados en la misma consulta (sin N+1)
+    queryset = M_proyect.objects.annotate(attachments_count=Count('m_attach_proyect')).prefetch_related(
+        Prefetch('sale_order_id', queryset=sale_order_retrive_queryset())
+    )
     serializer_class = sz_proyect_powerBi
     pagination_class = None  
     permission_classes = [AllowAny]
 
+    def get_cache_tags(self, request, *args, **kwargs):
+        # Incluye todas las cotizaciones (con adjuntos, comentarios y visita técnica) de los proyectos
+        return [cache_tag('proyect'), cache_tag('sale_order'), cache_tag('technical_visit')]
+
+class V_proyect_export_stream(APIView):
+    """
+    Exportación plana de proyectos para Power BI, en JSON Lines o CSV.
+    Se genera por streaming desde una sola consulta: la memoria no crece con la cantidad de proyectos.
+    """
+    permission_classes = [AllowAny]
+
+    content_types = {
+        'jsonl': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, export_format):
+        if export_format not in PROYECT_EXPORT_FORMATS:
+            return Response(
+                {"error": "invalid format", "messages": f"Opciones: {', '.join(PROYECT_EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = StreamingHttpResponse(stream_proyect_export(export_format), content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="proyectos.{export_format}"'
+        return response
+
 class UpdateProjectProgress(APIView):
     permission_classes = [AllowAny]
 
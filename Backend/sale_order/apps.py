@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SaleOrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sale_order'
+
+    def ready(self):
+        """Importar las señales cuando la aplicación esté lista"""
+        import sale_order.signals
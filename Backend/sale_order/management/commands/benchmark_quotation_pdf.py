@@ -0,0 +1,63 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from sale_order.models.sale_order import M_sale_order
+from sale_order.utils.pdf_reportlab import (
+    generate_sale_order_pdf_reportlab,
+    reset_pdf_resources,
+    warm_pdf_resources,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el tiempo de generación del PDF de cotización: sin recursos precargados '
+        '(estilos e imágenes se construyen en cada PDF, como antes) y con el registro ya cargado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sale-order', type=int, help='ID de la cotización (por defecto la más reciente)')
+        parser.add_argument('--iterations', type=int, default=20, help='PDF a generar en cada modo')
+
+    def render_times(self, sale_order, iterations, cold):
+        times = []
+        for _ in range(iterations):
+            if cold:
+                reset_pdf_resources()
+            start = time.perf_counter()
+            pdf_file = generate_sale_order_pdf_reportlab(sale_order)
+            pdf_file.read()
+            times.append((time.perf_counter() - start) * 1000)
+            pdf_file.close()
+        return times
+
+    def report(self, label, times):
+        self.stdout.write(
+            f'{label}: media {statistics.mean(times):.2f} ms | '
+            f'mediana {statistics.median(times):.2f} ms | '
+            f'min {min(times):.2f} ms | max {max(times):.2f} ms'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations debe ser mayor a 0')
+
+        queryset = M_sale_order.objects.all()
+        if options.get('sale_order'):
+            queryset = queryset.filter(id=options['sale_order'])
+        sale_order = queryset.order_by('-id').first()
+        if sale_order is None:
+            raise CommandError('No se encontró la cotización')
+
+        iterations = options['iterations']
+        self.stdout.write(f'Cotización {sale_order.code}: {iterations} PDF por modo')
+
+        cold = self.render_times(sale_order, iterations, cold=True)
+        warm_pdf_resources()
+        warm = self.render_times(sale_order, iterations, cold=False)
+
+        self.report('Sin precarga', cold)
+        self.report('Con precarga', warm)
+        self.stdout.write(self.style.SUCCESS(
+            f'Mejora: {(1 - statistics.mean(warm) / statistics.mean(cold)) * 100:.1f}% por PDF'
+        ))
@@ -0,0 +1,49 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from sale_order.utils.pdf_bulk_export import (
+    QUOTATION_EXPORT_WORKERS,
+    filter_sale_orders_for_export,
+    write_quotations_zip,
+)
+
+
+class Command(BaseCommand):
+    help = 'Exporta en un ZIP los PDF de las cotizaciones filtradas por estado, fechas y ciudad'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Ruta del archivo ZIP a generar')
+        parser.add_argument('--state', type=str, help='Estado de la cotización (pendiente, aprobado, rechazado)')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Fecha final (YYYY-MM-DD)')
+        parser.add_argument('--city', type=str, help='Ciudad de la cotización')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=QUOTATION_EXPORT_WORKERS,
+            help=f'Procesos para generar los PDF (por defecto {QUOTATION_EXPORT_WORKERS})',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers debe ser mayor a 0')
+
+        queryset = filter_sale_orders_for_export(
+            state=options.get('state'),
+            date_from=options.get('date_from'),
+            date_to=options.get('date_to'),
+            city=options.get('city'),
+        )
+        sale_order_ids = list(queryset.values_list('id', flat=True))
+        if not sale_order_ids:
+            self.stdout.write(self.style.WARNING('No hay cotizaciones con esos filtros'))
+            return
+
+        self.stdout.write(f'Exportando {len(sale_order_ids)} cotizaciones con {options["workers"]} procesos...')
+
+        with open(options['output'], 'wb') as output:
+            written, errors = write_quotations_zip(sale_order_ids, output, workers=options['workers'])
+            size = output.tell()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'ZIP generado: {options["output"]} ({size / 1024:.1f} KB, {written} PDF, {errors} errores)'
+        ))
@@ -0,0 +1,15 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from sale_order.utils.daily_summary import rebuild_sale_order_daily_summary
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de cotizaciones (sale_order_daily_summary) desde sale_order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Fecha inicial (YYYY-MM-DD); por defecto todo el histórico')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Fecha final (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        written = rebuild_sale_order_daily_summary(date_from=options.get('date_from'), date_to=options.get('date_to'))
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario recalculado: {written} grupos'))
@@ -1,4 +1,6 @@
 from .sale_order import M_sale_order
 # from .sale_order_product import M_sale_order_product
 from .comentary_sale_order import M_comentary_sale_order
-from .attach_sale_order import M_attach_sale_order
\ No newline at end of file
+from .attach_sale_order import M_attach_sale_order
+from .sale_order_daily_summary import M_sale_order_daily_summary
+from .quotation_export import M_quotation_export
@@ -1,10 +1,12 @@
 from django.db import models
 from .sale_order import M_sale_order
 from django.contrib.auth.models import User
+from function.storage import get_attachment_storage
 
 class M_attach_sale_order(models.Model):
     date = models.DateField(null=False, auto_now_add=True, editable=False)
-    attach = models.FileField(null=False, upload_to='media/')
+    # Almacenamiento por contenido (function/storage.py): un archivo repetido se guarda una sola vez
+    attach = models.FileField(null=False, upload_to='media/', storage=get_attachment_storage, db_index=True)
     name = models.CharField(max_length=60, null=False, blank=False)
     size = models.CharField(max_length=50, null=False, blank=False)
     content_type = models.CharField(max_length=100, null=False, blank=False)  # Aumentado de 50 a 100 caracteres
@@ -15,6 +17,9 @@ class M_attach_sale_order(models.Model):
 
     class Meta:
         db_table = 'attach_sale_order'
+        indexes = [
+            models.Index(fields=['name'], name='attach_so_name_like_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return f'{self.name} - {self.sale_order_id.code}'
\ No newline at end of file
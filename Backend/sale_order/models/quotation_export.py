@@ -0,0 +1,36 @@
+import uuid
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class M_quotation_export(models.Model):
+    """
+    Exportación en ZIP de los PDF de cotizaciones (sale_order/utils/pdf_bulk_export.py).
+    La genera una tarea de Celery; la vista solo la encola y luego entrega el archivo terminado.
+    """
+    status_choices = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='quotation_exports')
+    filters = models.JSONField(default=dict)   # state, date_from, date_to, city
+    status = models.CharField(max_length=10, choices=status_choices, default='pending')
+    file = models.FileField(upload_to='quotation_exports/', null=True, blank=True)
+    quotations = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'quotation_export'
+        indexes = [
+            models.Index(fields=['created_at'], name='quotation_export_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
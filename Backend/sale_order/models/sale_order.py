@@ -2,6 +2,7 @@ from django.db import models
 # from person.models.person import M_person
 # from product.models.product import M_product
 from django.contrib.auth.models import User
+from function.indexes import upper_prefix_index
 from function.validators import only_numbers, only_letters_numbers_symbols, only_letters_numbers_spaces,only_lters_for_names
 from technical_visit.models.technical_visit import M_technical_visit
 import re
@@ -148,9 +149,23 @@ class M_sale_order(models.Model):
     workforce_price = models.DecimalField(max_digits=20, null=True, default=0, decimal_places=2)
 
     comentary_id = models.ManyToManyField(User, through='M_comentary_sale_order', related_name='comentarys')
+    # Sincronización incremental (function/delta_sync.py); las filas existentes toman la fecha de la migración
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'sale_order'
+        # Índices para búsquedas por prefijo (LIKE 'texto%'); en PostgreSQL usan varchar_pattern_ops.
+        # Los de texto libre son sobre UPPER(campo) para istartswith (function/indexes.py)
+        indexes = [
+            models.Index(fields=['code'], name='sale_order_code_like_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['state'], name='sale_order_state_like_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['nitCC'], name='sale_order_nitcc_like_idx', opclasses=['varchar_pattern_ops']),
+            upper_prefix_index('state', name='sale_order_state_upper_idx'),
+            upper_prefix_index('name', name='sale_order_name_upper_idx'),
+            upper_prefix_index('city', name='sale_order_city_upper_idx'),
+            models.Index(fields=['updated_at', 'id'], name='sale_order_updated_idx'),
+            models.Index(fields=['date'], name='sale_order_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.code} - {self.name} - {self.city} - {self.representante} - {self.power_required} - {self.total_quotation}   '
\ No newline at end of file
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class M_sale_order_daily_summary(models.Model):
+    """
+    Resumen diario de cotizaciones por estado, ciudad y tipo de sistema.
+    Se mantiene desde las señales de cotizaciones y proyectos y una tarea programada
+    (sale_order/utils/daily_summary.py); los tableros históricos consultan esta tabla
+    en lugar de sale_order.
+    """
+    day = models.DateField()  # fecha de creación de la cotización (M_sale_order.date)
+    state = models.CharField(max_length=35)
+    city = models.CharField(max_length=45)
+    system_type = models.CharField(max_length=20)
+    quotes = models.PositiveIntegerField(default=0)
+    converted = models.PositiveIntegerField(default=0)  # cotizaciones con proyecto
+    total_quotation = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    power_required = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    energy_production = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'sale_order_daily_summary'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'state', 'city', 'system_type'], name='sale_order_daily_summary_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.state} - {self.city} - {self.system_type}: {self.quotes}'
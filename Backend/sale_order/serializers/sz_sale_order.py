@@ -7,6 +7,7 @@ from .sz_comentary_sale_order import sz_comentary_sale_order_retrive
 from .sz_attach_sale_order import sz_attach_sale_order_list
 from technical_visit.serializers.sz_technical_visit import sz_technical_visit_retrive
 from django.core.files import File
+from django.db.models import Prefetch
 import logging
 
 # Configurar logger
@@ -248,7 +249,56 @@ class sz_sale_order(serializers.ModelSerializer):
 
 class sz_sale_order_list(serializers.ModelSerializer):
     # person_id_name = serializers.CharField(source='person_id.name', read_only=True)
-    
+
+    # Vistas con nombre para la proyección de columnas (?view=summary)
+    named_views = {
+        'summary': [
+            'id',
+            'date',
+            'code',
+            'state',
+            'name',
+            'nitCC',
+            'city',
+            'total_quotation',
+            'system_type',
+            'proyect_type',
+            'cotizador',
+            'fecha_cotizacion',
+        ],
+    }
+
+    def __init__(self, *args, **kwargs):
+        # Permite limitar las columnas serializadas (proyección)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def resolve_fields(cls, fields_param=None, view_param=None):
+        """
+        Devuelve la lista de columnas solicitadas por ?fields= o ?view=,
+        None si no se pidió proyección. Lanza ValueError si alguna columna no existe.
+        """
+        if view_param:
+            if view_param not in cls.named_views:
+                raise ValueError(f"Vista desconocida: {view_param}")
+            return list(cls.named_views[view_param])
+
+        if fields_param:
+            requested = [field.strip() for field in fields_param.split(',') if field.strip()]
+            unknown = [field for field in requested if field not in cls.Meta.fields]
+            if unknown:
+                raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+            if 'id' not in requested:
+                requested.insert(0, 'id')
+            return list(dict.fromkeys(requested))
+
+        return None
+
     class Meta:
         model = M_sale_order
         fields = [
@@ -435,7 +485,8 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
         
     def get_comentaries(self, obj):
         try:
-            comentarios = M_comentary_sale_order.objects.filter(sale_order_id=obj.id)
+            # Usa los comentarios precargados por sale_order_retrive_queryset si existen
+            comentarios = obj.m_comentary_sale_order_set.all()
             return sz_comentary_sale_order_retrive(comentarios, many=True).data
         except Exception as e:
             logger.error(f"Error al obtener comentarios para sale_order {obj.id}: {e}")
@@ -443,12 +494,12 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
       # Método para obtener los archivos adjuntos relacionados
     def get_archivos_adjuntos(self, obj):
         try:
-            # Obtener todos los archivos adjuntos
-            archivos = M_attach_sale_order.objects.filter(sale_order_id=obj.id)
+            # Obtener todos los archivos adjuntos en una sola consulta (o desde el prefetch)
+            archivos = list(obj.m_attach_sale_order_set.all())
             
-            # Separar los archivos en dos categorías
-            archivos_generales = archivos.filter(is_calculation_sheet=False)
-            hoja_calculo = archivos.filter(is_calculation_sheet=True).first()
+            # Separar los archivos en dos categorías en Python
+            archivos_generales = [archivo for archivo in archivos if not archivo.is_calculation_sheet]
+            hoja_calculo = next((archivo for archivo in archivos if archivo.is_calculation_sheet), None)
             
             resultado = {
                 'archivos_generales': sz_attach_sale_order_list(archivos_generales, many=True).data,
@@ -460,16 +511,15 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
             logger.error(f"Error al obtener archivos adjuntos para sale_order {obj.id}: {e}")
             return {'archivos_generales': [], 'hoja_calculo': []}      # Modificamos el método update para asegurar que todos los campos se actualicen correctamente
     def update(self, instance, validated_data):
-        print("\n--- ACTUALIZANDO DATOS EN SERIALIZADOR ---")
-        print("Datos validados recibidos:", validated_data)
+        logger.debug(f"Actualizando cotización {instance.pk}: {list(validated_data)}")
         
         # Actualizamos todos los campos básicos del modelo
         for attr, value in validated_data.items():
             if hasattr(instance, attr):
-                print(f"Actualizando campo {attr}: '{getattr(instance, attr)}' → '{value}'")
+                logger.debug(f"Actualizando campo {attr}: '{getattr(instance, attr)}' → '{value}'")
                 setattr(instance, attr, value)
             else:
-                print(f"¡Advertencia! Campo {attr} no existe en el modelo")
+                logger.warning(f"Campo {attr} no existe en el modelo")
         
         # Reconstruir el campo name con los valores actualizados
         if any(field in validated_data for field in ['firs_name', 'other_name', 'last_name', 'secon_surname']):
@@ -483,14 +533,15 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
             # Filtrar partes vacías y unir con espacios
             old_name = instance.name
             instance.name = " ".join(filter(None, name_parts))
-            print(f"Nombre recalculado: '{old_name}' → '{instance.name}'")
+            logger.debug(f"Nombre recalculado: '{old_name}' → '{instance.name}'")
         
         # Guardamos la instancia actualizada
+        # Un error se propaga: la vista actualiza dentro de una transacción que debe revertirse
         try:
             instance.save()
-            print("Instancia guardada correctamente")
         except Exception as e:
-            print(f"¡ERROR al guardar la instancia!: {str(e)}")
+            logger.error(f"Error al guardar la cotización {instance.pk}: {e}")
+            raise
         
         # Verificamos campos actualizados del equipamiento
         equipments = [
@@ -512,7 +563,7 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
         
         for field, price_field in equipments:
             if field in validated_data or price_field in validated_data:
-                print(f"Equipamiento actualizado: {field}={getattr(instance, field)}, {price_field}={getattr(instance, price_field)}")
+                logger.debug(f"Equipamiento actualizado: {field}={getattr(instance, field)}, {price_field}={getattr(instance, price_field)}")
                 
         return instance
 
@@ -521,15 +572,34 @@ class sz_sale_order_retrive(serializers.ModelSerializer):    # person_id_name =
             if hasattr(obj, 'technical_visit_id') and obj.technical_visit_id:
                 logger.info(f"Serializing technical visit {obj.technical_visit_id.id} for sale_order {obj.id}")
                 
-                # Verificar que la visita técnica aún existe
-                from technical_visit.models.technical_visit import M_technical_visit
-                if not M_technical_visit.objects.filter(id=obj.technical_visit_id.id).exists():
-                    logger.warning(f"Technical visit {obj.technical_visit_id.id} referenced by sale_order {obj.id} no longer exists")
-                    return None
-                
+                # La visita ya viene cargada por select_related; al eliminarse la FK queda en NULL (SET_NULL)
                 return sz_technical_visit_retrive(obj.technical_visit_id).data
             return None
         except Exception as e:
             logger.error(f"Error al obtener detalles de visita técnica para sale_order {obj.id}: {e}", exc_info=True)
             # En lugar de fallar, devolver None para mantener la funcionalidad
             return None
+
+
+def sale_order_retrive_queryset(queryset=None):
+    """
+    Queryset con todas las relaciones que usa sz_sale_order_retrive precargadas,
+    de forma que el detalle se serializa con un número fijo de consultas.
+    """
+    if queryset is None:
+        queryset = M_sale_order.objects.all()
+
+    return queryset.select_related(
+        'user_id',
+        'technical_visit_id__question_id',
+    ).prefetch_related(
+        Prefetch(
+            'm_comentary_sale_order_set',
+            queryset=M_comentary_sale_order.objects.order_by('id'),
+        ),
+        Prefetch(
+            'm_attach_sale_order_set',
+            queryset=M_attach_sale_order.objects.select_related('uploaded_by').order_by('id'),
+        ),
+        'technical_visit_id__evidence_photos',
+    )
@@ -0,0 +1,90 @@
+import logging
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from sale_order.models.sale_order import M_sale_order
+from sale_order.models.attach_sale_order import M_attach_sale_order
+from sale_order.models.comentary_sale_order import M_comentary_sale_order
+from sale_order.models.quotation_export import M_quotation_export
+from technical_visit.models.technical_visit import M_technical_visit
+from technical_visit.models.evidence_photo import M_evidence_photo
+from technical_visit.models.technical_question import M_technical_question
+from function.delta_sync import register_deletion_tracking
+from function.file_deletion import register_file_cleanup
+from sale_order.utils.daily_summary import refresh_sale_order_daily_summary_on_commit
+from function.response_cache import cache_tag, connect_cache_tags
+from sale_order.utils.pdf_cache import (
+    get_quotation_pdf_hash,
+    invalidate_quotation_pdf,
+    prerender_quotation_pdf,
+    quotation_pdf_prerender_enabled,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=M_sale_order)
+def invalidate_sale_order_pdf(sender, instance, created, **kwargs):
+    """
+    Elimina los PDF guardados que ya no corresponden al contenido actual de la cotización
+    y, si QUOTATION_PDF_PRERENDER está activo, genera el nuevo en segundo plano.
+    """
+    if not created:
+        invalidate_quotation_pdf(instance.id, keep=f'{get_quotation_pdf_hash(instance)}.pdf')
+
+    if quotation_pdf_prerender_enabled():
+        sale_order_id = instance.id
+
+        def schedule_prerender():
+            try:
+                prerender_quotation_pdf.delay(sale_order_id)
+            except Exception as e:
+                # Sin broker disponible el PDF se genera en la primera descarga
+                logger.warning(f"No se pudo programar el PDF de la cotización {sale_order_id}: {e}")
+
+        transaction.on_commit(schedule_prerender)
+
+
+@receiver(post_delete, sender=M_sale_order)
+def delete_sale_order_pdf(sender, instance, **kwargs):
+    invalidate_quotation_pdf(instance.id)
+
+
+@receiver(post_save, sender=M_sale_order)
+@receiver(post_delete, sender=M_sale_order)
+def refresh_sale_order_summary(sender, instance, **kwargs):
+    # Resumen diario (sale_order/utils/daily_summary.py): recalcula el día de creación de la cotización
+    refresh_sale_order_daily_summary_on_commit([instance.date])
+
+
+# Cache de respuestas (function/response_cache.py): cada cambio invalida la cotización y los listados
+connect_cache_tags(M_sale_order, lambda instance: [
+    cache_tag('sale_order', instance.pk), cache_tag('sale_order')
+])
+connect_cache_tags(M_attach_sale_order, lambda instance: [
+    cache_tag('sale_order', instance.sale_order_id_id), cache_tag('sale_order')
+])
+connect_cache_tags(M_comentary_sale_order, lambda instance: [
+    cache_tag('sale_order', instance.sale_order_id_id), cache_tag('sale_order')
+])
+
+# La respuesta de la cotización incluye su visita técnica (con preguntas y fotos de evidencia)
+connect_cache_tags(M_technical_visit, lambda instance: [
+    cache_tag('sale_order', sale_order_id)
+    for sale_order_id in M_sale_order.objects.filter(technical_visit_id=instance.pk).values_list('id', flat=True)
+], name='sale_order')
+connect_cache_tags(M_evidence_photo, lambda instance: [
+    cache_tag('sale_order', sale_order_id)
+    for sale_order_id in M_sale_order.objects.filter(technical_visit_id=instance.technical_visit_id).values_list('id', flat=True)
+], name='sale_order')
+connect_cache_tags(M_technical_question, lambda instance: [
+    cache_tag('sale_order', sale_order_id)
+    for sale_order_id in M_sale_order.objects.filter(technical_visit_id__question_id=instance.pk).values_list('id', flat=True)
+], name='sale_order')
+
+# Sincronización incremental (function/delta_sync.py)
+register_deletion_tracking(M_sale_order)
+
+# Los archivos de los registros eliminados se borran en segundo plano (function/file_deletion.py)
+register_file_cleanup(M_sale_order, M_attach_sale_order, M_quotation_export)
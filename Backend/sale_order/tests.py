@@ -1,3 +1,378 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from function.file_deletion import process_pending_file_deletions
+from function.models.pending_file_deletion import M_pending_file_deletion
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from sale_order.models.sale_order import M_sale_order
+from sale_order.models.comentary_sale_order import M_comentary_sale_order
+from sale_order.models.attach_sale_order import M_attach_sale_order
+from sale_order.models.quotation_export import M_quotation_export
+from sale_order.models.sale_order_daily_summary import M_sale_order_daily_summary
+from sale_order.utils.pdf_bulk_export import build_quotation_export_task, purge_quotation_exports_task
+from proyect.models.proyect import M_proyect
+from technical_visit.models.technical_question import M_technical_question
+from technical_visit.models.technical_visit import M_technical_visit
+from technical_visit.models.evidence_photo import M_evidence_photo
 
-# Create your tests here.
+
+def create_sale_order(user, code='100001', **extra):
+    data = {
+        'type_identification': 'NIT',
+        'identification': '900954914',
+        'nitCC': '900954914',
+        'firs_name': 'Ana',
+        'last_name': 'Lopez',
+        'secon_surname': 'Perez',
+        'addres': 'Carrera 14',
+        'city': 'Santa Marta',
+        'phone': '3017535841',
+        'code': code,
+        'user_id': user,
+        'date_start': '2025-01-01',
+        'proyect_type': 'Privado',
+        'total_quotation': '1000.00',
+        'payment_type': '50%,50%',
+        'system_type': 'On-grid',
+    }
+    data.update(extra)
+    return M_sale_order.objects.create(**data)
+
+
+class SaleOrderRetrieveQueriesTest(TestCase):
+    """El detalle de la oferta debe cargarse con un número fijo de consultas"""
+
+    def setUp(self):
+        # Las versiones de la cache se incrementan al confirmar la transacción, lo que no ocurre
+        # dentro de TestCase: se limpia para no reutilizar respuestas de otra prueba con el mismo id
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='comercial', password='x')
+        self.uploader = User.objects.create_user(username='tecnico', password='x')
+
+    def create_technical_visit(self, code, n_identification):
+        question = M_technical_question.objects.create(
+            Q_1='Bifásica', Q_2='No tiene', Q_3='Buenas condiciones',
+            Q_4='Fácil acceso', Q_5='Pendiente', Q_6='Pendiente',
+        )
+        return M_technical_visit.objects.create(
+            code=code, name='Ana', last_name='Lopez', city='Santa Marta',
+            department='Magdalena', phone='3017535841', N_identification=n_identification,
+            company='Optipro', addres='Carrera 14', date_visit='2025-01-01',
+            start_time='08:00', concept_visit='proceeds', question_id=question,
+        )
+
+    def populate(self, sale_order, items):
+        for index in range(items):
+            M_comentary_sale_order.objects.create(
+                user_id=self.user, sale_order_id=sale_order, description=f'Comentario {index}',
+            )
+            M_attach_sale_order.objects.create(
+                attach=f'media/adjunto_{sale_order.id}_{index}.pdf', name=f'adjunto {index}',
+                size='10', content_type='application/pdf', sale_order_id=sale_order,
+                uploaded_by=self.uploader if index % 2 else None,
+            )
+            M_evidence_photo.objects.create(
+                technical_visit=sale_order.technical_visit_id,
+                photo=f'technical_visits/evidence/foto_{sale_order.id}_{index}.jpg', order=index,
+            )
+        M_attach_sale_order.objects.create(
+            attach=f'media/hoja_{sale_order.id}.xlsx', name='Hoja de Cálculo - hoja.xlsx',
+            size='10', content_type='application/vnd.ms-excel', sale_order_id=sale_order,
+            is_calculation_sheet=True,
+        )
+
+    def test_retrieve_query_count_is_constant(self):
+        small = create_sale_order(
+            self.user, code='100001',
+            technical_visit_id=self.create_technical_visit('VT0001', '111'),
+        )
+        large = create_sale_order(
+            self.user, code='100002',
+            technical_visit_id=self.create_technical_visit('VT0002', '222'),
+        )
+        self.populate(small, 1)
+        self.populate(large, 10)
+
+        # oferta (+usuario, visita y preguntas), comentarios, adjuntos y fotos de evidencia
+        for sale_order, items in ((small, 1), (large, 10)):
+            with self.assertNumQueries(4):
+                response = self.client.get(f'/sale_order/retrieve/{sale_order.id}/')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['comentaries']), items)
+            self.assertEqual(len(response.data['archivos_adjuntos']['archivos_generales']), items)
+            self.assertEqual(len(response.data['archivos_adjuntos']['hoja_calculo']), 1)
+            self.assertEqual(len(response.data['technical_visit_details']['evidence_photos']), items)
+
+    def test_retrieve_without_technical_visit(self):
+        sale_order = create_sale_order(self.user)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/sale_order/retrieve/{sale_order.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['technical_visit_details'])
+
+    def test_cache_is_invalidated_on_commit(self):
+        sale_order = create_sale_order(self.user)
+        self.assertEqual(self.client.get(f'/sale_order/retrieve/{sale_order.id}/')['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            sale_order.city = 'Bogotá'
+            sale_order.save()
+        # Antes de confirmar la transacción se sigue usando la respuesta guardada
+        self.assertEqual(self.client.get(f'/sale_order/retrieve/{sale_order.id}/')['X-Cache'], 'HIT')
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(f'/sale_order/retrieve/{sale_order.id}/')
+        self.assertEqual((response['X-Cache'], response.data['city']), ('MISS', 'Bogotá'))
+
+    def test_retrieve_missing_sale_order(self):
+        response = self.client.get('/sale_order/retrieve/999/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['code'], 'SALE_ORDER_NOT_FOUND')
+
+
+class SaleOrderUpdateAttachmentsTest(TestCase):
+    """La actualización procesa los adjuntos en lote y borra los archivos al confirmar"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        # Sin periodo de gracia los blobs sin referencias se eliminan de inmediato (function/storage.py)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, BLOB_DELETE_GRACE_SECONDS=0)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='comercial', password='x')
+        self.sale_order = create_sale_order(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_attachment(self, name, is_calculation_sheet=False, sale_order=None, content=None):
+        return M_attach_sale_order.objects.create(
+            attach=SimpleUploadedFile(name, content or name.encode()), name=name, size='9',
+            content_type='application/pdf', sale_order_id=sale_order or self.sale_order,
+            is_calculation_sheet=is_calculation_sheet,
+        )
+
+    def test_update_replaces_and_deletes_attachments_in_batch(self):
+        by_id = self.create_attachment('por_id.pdf')
+        by_name = self.create_attachment('por_nombre.pdf')
+        kept = self.create_attachment('se_queda.pdf')
+        old_sheet = self.create_attachment('hoja_vieja.xlsx', is_calculation_sheet=True)
+        other_sale_order = create_sale_order(self.user, code='100009')
+        foreign = self.create_attachment('de_otra_oferta.pdf', sale_order=other_sale_order)
+        deleted_paths = [attachment.attach.path for attachment in (by_id, by_name, old_sheet)]
+
+        data = {
+            'city': 'Ciénaga',
+            'archivos_a_eliminar': f'[{by_id.id}, {foreign.id}]',
+            'archivos_nombres_eliminar': '["por_nombre.pdf"]',
+            'archivos_adjuntos': [SimpleUploadedFile(f'nuevo_{index}.pdf', b'pdf') for index in range(5)],
+            'hojaCalculo': SimpleUploadedFile('hoja.xlsx', b'xlsx'),
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            # Las consultas no dependen de la cantidad de archivos
+            with self.assertNumQueries(14):
+                response = self.client.patch(f'/sale_order/update/{self.sale_order.id}/', data, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        names = set(M_attach_sale_order.objects.filter(sale_order_id=self.sale_order).values_list('name', flat=True))
+        self.assertEqual(names, {
+            'se_queda.pdf', 'Hoja de Cálculo - hoja.xlsx', *[f'nuevo_{index}.pdf' for index in range(5)],
+        })
+        # Solo se eliminan adjuntos de la propia oferta
+        self.assertTrue(M_attach_sale_order.objects.filter(id=foreign.id).exists())
+
+        # Los archivos quedan en la cola y los elimina el worker
+        self.assertEqual(M_pending_file_deletion.objects.count(), 3)
+        self.assertEqual(process_pending_file_deletions(), (3, 0))
+        self.assertFalse(M_pending_file_deletion.objects.exists())
+        for path in deleted_paths:
+            self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(kept.attach.path))
+
+    def test_invalid_update_keeps_attachments(self):
+        attachment = self.create_attachment('adjunto.pdf')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/sale_order/update/{self.sale_order.id}/',
+                {'total_quotation': 'no es un número', 'archivos_a_eliminar': str(attachment.id)},
+                format='multipart',
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(M_attach_sale_order.objects.filter(id=attachment.id).exists())
+        self.assertFalse(M_pending_file_deletion.objects.exists())
+        self.assertTrue(os.path.exists(attachment.attach.path))
+
+    def test_delete_sale_order_queues_files(self):
+        attachments = [self.create_attachment(f'adjunto_{index}.pdf') for index in range(3)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/sale_order/delete/{self.sale_order.id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            set(M_pending_file_deletion.objects.values_list('name', flat=True)),
+            {attachment.attach.name for attachment in attachments},
+        )
+        process_pending_file_deletions()
+        for attachment in attachments:
+            self.assertFalse(os.path.exists(attachment.attach.path))
+
+
+class QuotationExportTest(TestCase):
+    """La exportación en ZIP se encola y la genera la tarea de Celery, no la petición"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.admin = User.objects.create_user(username='admin', password='x', is_staff=True)
+        self.sale_order = create_sale_order(self.admin, state='aprobado')
+        create_sale_order(self.admin, code='100002', state='pendiente')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_export_is_built_by_task_and_downloaded(self):
+        with mock.patch('sale_order.utils.pdf_bulk_export.build_quotation_export_task.delay') as delay:
+            response = self.client.post('/api/quotations_pdf/export/', {'state': 'aprobado'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        export_id = response.data['export_id']
+        delay.assert_called_once_with(export_id)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(self.client.get(f'/api/quotations_pdf/export/{export_id}/download/').status_code, 409)
+
+        build_quotation_export_task(export_id)
+        export = M_quotation_export.objects.get(id=export_id)
+        self.assertEqual((export.status, export.quotations, export.errors), ('done', 1, 0))
+
+        response = self.client.get(f'/api/quotations_pdf/export/{export_id}/download/')
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zip_file:
+            self.assertEqual(zip_file.namelist(), [f'cotizacion_{self.sale_order.code}.pdf'])
+
+    def test_export_fails_without_broker(self):
+        with mock.patch(
+            'sale_order.utils.pdf_bulk_export.build_quotation_export_task.delay', side_effect=ConnectionError('broker')
+        ):
+            response = self.client.post('/api/quotations_pdf/export/?state=rechazado')
+        self.assertEqual(response.status_code, 404)
+        with mock.patch(
+            'sale_order.utils.pdf_bulk_export.build_quotation_export_task.delay', side_effect=ConnectionError('broker')
+        ):
+            response = self.client.post('/api/quotations_pdf/export/', {'state': 'pendiente'}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(M_quotation_export.objects.get(id=response.data['export_id']).status, 'failed')
+
+    @override_settings(QUOTATION_EXPORT_TIME_LIMIT_MINUTES=30)
+    def test_purge_fails_exports_left_running(self):
+        now = timezone.now()
+        stale = M_quotation_export.objects.create(
+            user=self.admin, status='running', started_at=now - datetime.timedelta(minutes=31)
+        )
+        running = M_quotation_export.objects.create(
+            user=self.admin, status='running', started_at=now - datetime.timedelta(minutes=5)
+        )
+
+        purge_quotation_exports_task()
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(running.status, 'running')
+        response = self.client.get(f'/api/quotations_pdf/export/{stale.id}/')
+        self.assertEqual(response.data['status'], 'failed')
+
+
+class SaleOrderDailySummaryTest(TestCase):
+    """Las señales mantienen el resumen diario: upsert de los grupos del día y borrado de los vacíos"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='comercial', password='x')
+
+    def summary(self):
+        return {
+            (row.state, row.city): (row.quotes, row.converted)
+            for row in M_sale_order_daily_summary.objects.all()
+        }
+
+    def test_group_that_empties_out_is_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_sale_order(self.user, state='pendiente')
+            create_sale_order(self.user, code='100002', state='pendiente')
+        self.assertEqual(self.summary(), {('pendiente', 'Santa Marta'): (2, 0)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.state = 'aprobado'
+            first.save()
+        self.assertEqual(self.summary(), {('pendiente', 'Santa Marta'): (1, 0), ('aprobado', 'Santa Marta'): (1, 0)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.summary(), {('pendiente', 'Santa Marta'): (1, 0)})
+
+    def test_proyect_changes_conversion_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale_order = create_sale_order(self.user, state='aprobado')
+            create_sale_order(self.user, code='100002', state='aprobado')
+        self.assertEqual(self.summary(), {('aprobado', 'Santa Marta'): (2, 0)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            proyect = M_proyect.objects.create(p_name='Proyecto', code='200001', status='process', sale_order_id=sale_order)
+        self.assertEqual(self.summary(), {('aprobado', 'Santa Marta'): (2, 1)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            proyect.delete()
+        self.assertEqual(self.summary(), {('aprobado', 'Santa Marta'): (2, 0)})
+
+
+class SaleOrderDeltaSyncTest(TestCase):
+    """Un since anterior a los registros de borrado que se conservan exige una carga completa"""
+
+    def get_delta(self, since):
+        return self.client.get('/powerbi/delta/cotizaciones/', {'since': since.isoformat()})
+
+    @override_settings(DELTA_SYNC_TOMBSTONE_DAYS=30)
+    def test_since_older_than_tombstones_requires_full_resync(self):
+        user = User.objects.create_user(username='comercial', password='x')
+        create_sale_order(user).delete()
+
+        response = self.get_delta(timezone.now() - datetime.timedelta(days=31))
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['full_resync'])
+
+        response = self.get_delta(timezone.now() - datetime.timedelta(days=29))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['deleted']), 1)
+
+    def test_foreign_keys_use_field_names(self):
+        user = User.objects.create_user(username='comercial', password='x')
+        create_sale_order(user)
+
+        response = self.client.get('/powerbi/delta/cotizaciones/')
+        row = response.data['changed'][0]
+        self.assertEqual(row['user_id'], user.id)
+        self.assertIn('technical_visit_id', row)
+        self.assertNotIn('user_id_id', row)
+        self.assertNotIn('technical_visit_id_id', row)
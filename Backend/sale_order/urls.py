@@ -8,6 +8,8 @@ from sale_order.views.v_comentary_sale_order import (
 from sale_order.views.v_attach_sale_order import V_attach_sale_order_create, V_attach_sale_order_list, V_attach_sale_order_retrive, V_attach_sale_order_update
 from sale_order.views.v_quotation_document import QuotationDocumentView, DebugAttachSaleOrderView, quotation_pdf_native_view
 from sale_order.views.v_simple_file_upload import SimpleFileUploadView
+from sale_order.views.v_quotation_export import V_quotation_pdf_export, V_quotation_pdf_export_status, V_quotation_pdf_export_download
+from sale_order.views.v_sale_order_analytics import V_sale_order_analytics, V_sale_order_summary_analytics
 
 urlpatterns = [
     path('sale_order/create/', V_sale_order_create.as_view()),
@@ -16,6 +18,8 @@ urlpatterns = [
     path('sale_order/retrive/<int:pk>/', V_sale_order_retrive.as_view()),   # TEMPORAL: Compatibilidad hacia atrás
     path('sale_order/update/<int:pk>/', V_sale_order_update.as_view()),
     path('sale_order/delete/<int:pk>/', V_sale_order_delete.as_view()),
+    path('sale_order/analytics/', V_sale_order_analytics.as_view()),
+    path('sale_order/analytics/summary/', V_sale_order_summary_analytics.as_view()),
 
     path('comentary_sale_order/create/', V_comentary_sale_order_create.as_view()),
     path('comentary_sale_order/list/', V_comentary_sale_order_list.as_view()),
@@ -43,6 +47,9 @@ urlpatterns = [
     # API para documento principal de cotización
     # path('api/quotations/<int:cotizacion_id>/document/', QuotationDocumentView.as_view(), name='quotation-document'),
     path('api/quotations_pdf/<int:cotizacion_id>/', quotation_pdf_native_view, name='quotation-document-weasy'),
+    path('api/quotations_pdf/export/', V_quotation_pdf_export.as_view(), name='quotation-pdf-export'),
+    path('api/quotations_pdf/export/<uuid:export_id>/', V_quotation_pdf_export_status.as_view(), name='quotation-pdf-export-status'),
+    path('api/quotations_pdf/export/<uuid:export_id>/download/', V_quotation_pdf_export_download.as_view(), name='quotation-pdf-export-download'),
     
     # Endpoint de depuración
     path('debug/attach_sale_order/', DebugAttachSaleOrderView.as_view(), name='debug-attach-sale-order'),
@@ -0,0 +1,139 @@
+"""
+Indicadores de ventas calculados en SQL: una sola consulta agrupada (GROUP BY) por las
+dimensiones pedidas. Los totales generales se suman en Python a partir de los grupos.
+"""
+from decimal import Decimal
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from proyect.models.proyect import M_proyect
+from sale_order.models.sale_order import M_sale_order
+from sale_order.models.sale_order_daily_summary import M_sale_order_daily_summary
+
+
+# Dimensiones de agrupación: nombre público -> campo del modelo o expresión
+ANALYTICS_DIMENSIONS = {
+    'state': 'state',
+    'city': 'city',
+    'system_type': 'system_type',
+    'proyect_type': 'proyect_type',
+    'month': TruncMonth('date'),
+    'cotizador': 'cotizador',
+}
+
+# Columnas de precio de equipos y servicios que se suman por grupo
+ANALYTICS_PRICE_FIELDS = [
+    'solar_panels_price',
+    'Assembly_structures_price',
+    'Wiring_and_cabinet_price',
+    'Legalization_and_designs_price',
+    'batterys_price',
+    'investors_price',
+    'Kit_5kw_price',
+    'Kit_8kw_price',
+    'Kit_12kw_price',
+    'Kit_15kw_price',
+    'Kit_30kw_price',
+    'Microinverters_price',
+    'Transport_price',
+    'workforce_price',
+]
+
+ANALYTICS_SUM_FIELDS = ['total_quotation', 'power_required', *ANALYTICS_PRICE_FIELDS]
+
+
+def _rate(part, total):
+    return round(part / total, 4) if total else 0.0
+
+
+def get_sale_order_analytics(group_by, date_from=None, date_to=None):
+    """
+    Retorna {'group_by', 'groups': [...], 'totals': {...}}.
+    Cada grupo trae count, approved, rejected, with_proyect, approval_rate, conversion_rate
+    (cotizaciones que pasaron a proyecto) y la suma de total_quotation y de cada *_price.
+    """
+    queryset = M_sale_order.objects.all()
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+
+    fields = [name for name in group_by if isinstance(ANALYTICS_DIMENSIONS[name], str)]
+    expressions = {name: ANALYTICS_DIMENSIONS[name] for name in group_by if name not in fields}
+    aggregates = {
+        'count': Count('id'),
+        'approved': Count('id', filter=Q(state='aprobado')),
+        'rejected': Count('id', filter=Q(state='rechazado')),
+        'with_proyect': Count('id', filter=Q(has_proyect=True)),
+        **{field: Sum(field) for field in ANALYTICS_SUM_FIELDS},
+    }
+
+    rows = list(
+        queryset
+        .annotate(has_proyect=Exists(M_proyect.objects.filter(sale_order_id=OuterRef('pk'))))
+        .values(*fields, **expressions)
+        .annotate(**aggregates)
+        .order_by(*group_by)
+    )
+
+    totals = {'count': 0, 'approved': 0, 'rejected': 0, 'with_proyect': 0}
+    totals.update({field: Decimal('0') for field in ANALYTICS_SUM_FIELDS})
+    for row in rows:
+        for field in ANALYTICS_SUM_FIELDS:
+            row[field] = row[field] or Decimal('0')
+        for key in totals:
+            totals[key] += row[key]
+        row['approval_rate'] = _rate(row['approved'], row['count'])
+        row['conversion_rate'] = _rate(row['with_proyect'], row['count'])
+
+    totals['approval_rate'] = _rate(totals['approved'], totals['count'])
+    totals['conversion_rate'] = _rate(totals['with_proyect'], totals['count'])
+
+    return {'group_by': list(group_by), 'groups': rows, 'totals': totals}
+
+
+# --- Resumen diario materializado (M_sale_order_daily_summary) ---
+
+SUMMARY_DIMENSIONS = {
+    'day': 'day',
+    'month': TruncMonth('day'),
+    'year': TruncYear('day'),
+    'state': 'state',
+    'city': 'city',
+    'system_type': 'system_type',
+}
+
+SUMMARY_SUM_FIELDS = ['quotes', 'converted', 'total_quotation', 'power_required', 'energy_production']
+
+
+def get_daily_summary_analytics(group_by, date_from=None, date_to=None):
+    """
+    Igual que get_sale_order_analytics pero desde la tabla de resumen diario:
+    comparaciones entre años sin recorrer sale_order.
+    """
+    queryset = M_sale_order_daily_summary.objects.all()
+    if date_from:
+        queryset = queryset.filter(day__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(day__lte=date_to)
+
+    fields = [name for name in group_by if isinstance(SUMMARY_DIMENSIONS[name], str)]
+    expressions = {name: SUMMARY_DIMENSIONS[name] for name in group_by if name not in fields}
+    rows = list(
+        queryset
+        .values(*fields, **expressions)
+        .annotate(**{f'{field}_sum': Sum(field) for field in SUMMARY_SUM_FIELDS})
+        .order_by(*group_by)
+    )
+
+    totals = {field: 0 for field in SUMMARY_SUM_FIELDS}
+    groups = []
+    for row in rows:
+        group = {name: row[name] for name in group_by}
+        for field in SUMMARY_SUM_FIELDS:
+            group[field] = row[f'{field}_sum'] or 0
+            totals[field] += group[field]
+        group['conversion_rate'] = _rate(group['converted'], group['quotes'])
+        groups.append(group)
+    totals['conversion_rate'] = _rate(totals['converted'], totals['quotes'])
+
+    return {'group_by': list(group_by), 'groups': groups, 'totals': totals}
@@ -0,0 +1,102 @@
+"""
+Procesamiento por lotes de los adjuntos de una cotización al actualizarla.
+
+Todas las eliminaciones se resuelven con una consulta (id__in / name__in / hoja de cálculo),
+las altas se insertan con bulk_create y todo ocurre dentro de la transacción de la vista.
+Los archivos físicos de los registros eliminados se encolan (function/file_deletion.py) y
+los borra el worker cuando la transacción se confirma; si se revierte, se borran los
+archivos nuevos ya subidos.
+"""
+import json
+import logging
+from django.db import transaction
+from django.db.models import Q
+from function.file_deletion import deferred_file_deletions
+from function.response_cache import cache_tag, invalidate_cache_tags
+from sale_order.models.attach_sale_order import M_attach_sale_order
+
+
+logger = logging.getLogger(__name__)
+
+CALCULATION_SHEET_FIELDS = ('hojaCalculo', 'hoja_calculo')
+GENERAL_ATTACHMENT_FIELDS = ('archivos_adjuntos', 'archivos_generales')
+
+
+def parse_list_param(value, cast=str):
+    """Acepta una lista, un JSON con una lista o un valor suelto ('5', '[1, 2]', 'a.pdf')"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = [value]
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+
+    items = []
+    for item in value:
+        try:
+            items.append(cast(item))
+        except (TypeError, ValueError):
+            logger.warning(f"Valor ignorado en la lista de adjuntos a eliminar: {item!r}")
+    return items
+
+
+def build_attachment(sale_order, uploaded_file, is_calculation_sheet=False):
+    name = f"Hoja de Cálculo - {uploaded_file.name}" if is_calculation_sheet else uploaded_file.name
+    return M_attach_sale_order(
+        attach=uploaded_file,
+        sale_order_id=sale_order,
+        name=name,
+        size=str(uploaded_file.size),
+        content_type=(uploaded_file.content_type or '')[:100],
+        is_calculation_sheet=is_calculation_sheet,
+    )
+
+
+def apply_sale_order_attachment_changes(sale_order, files, delete_calculation_sheet=False, delete_ids=(), delete_names=()):
+    """
+    Aplica en lote los cambios de adjuntos de una actualización de cotización.
+    - files: request.FILES. Una hoja de cálculo nueva reemplaza a las anteriores (queda solo la última).
+    - delete_calculation_sheet: elimina las hojas de cálculo existentes.
+    - delete_ids / delete_names: adjuntos existentes de esta cotización a eliminar.
+    Debe llamarse dentro de transaction.atomic(). Retorna (creados, eliminados).
+    """
+    sheets = [uploaded for field in CALCULATION_SHEET_FIELDS for uploaded in files.getlist(field)]
+    general = [uploaded for field in GENERAL_ATTACHMENT_FIELDS for uploaded in files.getlist(field)]
+
+    new_attachments = [build_attachment(sale_order, uploaded) for uploaded in general]
+    if sheets:
+        new_attachments.append(build_attachment(sale_order, sheets[-1], is_calculation_sheet=True))
+
+    # Eliminaciones: una consulta sobre los adjuntos existentes de la cotización
+    conditions = Q()
+    if delete_ids:
+        conditions |= Q(id__in=delete_ids)
+    if delete_names:
+        conditions |= Q(name__in=delete_names)
+    if sheets or delete_calculation_sheet:
+        conditions |= Q(is_calculation_sheet=True)
+
+    deleted = 0
+    if conditions:
+        with deferred_file_deletions():
+            deleted, _ = M_attach_sale_order.objects.filter(conditions, sale_order_id=sale_order).delete()
+
+    if new_attachments:
+        # FileField.pre_save sube cada archivo al storage durante el INSERT. Si la transacción se
+        # revierte no se borran aquí: el storage conserva los blobs recientes (BLOB_DELETE_GRACE_SECONDS)
+        # y media_gc los recupera cuando ninguna fila los referencia
+        M_attach_sale_order.objects.bulk_create(new_attachments)
+
+    if new_attachments or deleted:
+        # bulk_create no envía post_save: invalida la cache de la cotización al confirmar
+        transaction.on_commit(
+            lambda: invalidate_cache_tags(cache_tag('sale_order', sale_order.pk), cache_tag('sale_order'))
+        )
+
+    logger.info(
+        f"Cotización {sale_order.pk}: {len(new_attachments)} adjuntos nuevos, {deleted} eliminados"
+    )
+    return new_attachments, deleted
@@ -0,0 +1,120 @@
+"""
+Mantenimiento de M_sale_order_daily_summary.
+
+Cada actualización recalcula días completos desde sale_order (una consulta agrupada por
+los días afectados), hace upsert de los grupos y elimina los grupos de esos días que ya
+no existen. Así el resultado es el mismo sin importar cuántas veces o en qué orden se
+refresque un día.
+"""
+import datetime
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+from function.response_cache import cache_tag, invalidate_cache_tags
+from proyect.models.proyect import M_proyect
+from sale_order.models.sale_order import M_sale_order
+from sale_order.models.sale_order_daily_summary import M_sale_order_daily_summary
+
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_TAG = cache_tag('sale_order_summary')
+
+# Días que se recalculan juntos al reconstruir el histórico
+SUMMARY_REBUILD_DAYS_PER_BATCH = 31
+
+
+def refresh_sale_order_daily_summary(days):
+    """Recalcula el resumen de los días indicados. Retorna la cantidad de grupos escritos"""
+    days = sorted({day for day in days if day})
+    if not days:
+        return 0
+
+    refreshed_at = timezone.now()
+    groups = (
+        M_sale_order.objects
+        .filter(date__in=days)
+        .annotate(has_proyect=Exists(M_proyect.objects.filter(sale_order_id=OuterRef('pk'))))
+        .values('date', 'state', 'city', 'system_type')
+        .annotate(
+            quotes_count=Count('id'),
+            converted_count=Count('id', filter=Q(has_proyect=True)),
+            total_quotation_sum=Sum('total_quotation'),
+            power_required_sum=Sum('power_required'),
+            energy_production_sum=Sum('energy_production'),
+        )
+        .order_by()
+    )
+    summaries = [
+        M_sale_order_daily_summary(
+            day=group['date'],
+            state=group['state'],
+            city=group['city'],
+            system_type=group['system_type'],
+            quotes=group['quotes_count'],
+            converted=group['converted_count'],
+            total_quotation=group['total_quotation_sum'] or 0,
+            power_required=group['power_required_sum'] or 0,
+            energy_production=group['energy_production_sum'] or 0,
+            refreshed_at=refreshed_at,
+        )
+        for group in groups
+    ]
+
+    with transaction.atomic():
+        M_sale_order_daily_summary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['day', 'state', 'city', 'system_type'],
+            update_fields=['quotes', 'converted', 'total_quotation', 'power_required', 'energy_production', 'refreshed_at'],
+        )
+        # Grupos que quedaron vacíos (p.ej. todas las cotizaciones de la ciudad cambiaron de estado)
+        M_sale_order_daily_summary.objects.filter(day__in=days, refreshed_at__lt=refreshed_at).delete()
+
+    invalidate_cache_tags(SUMMARY_CACHE_TAG)
+    return len(summaries)
+
+
+def refresh_sale_order_daily_summary_on_commit(days):
+    """Para señales: recalcula cuando la transacción que modificó los datos se confirma"""
+    days = list(days)
+    transaction.on_commit(lambda: refresh_sale_order_daily_summary(days))
+
+
+def rebuild_sale_order_daily_summary(date_from=None, date_to=None, batch_days=SUMMARY_REBUILD_DAYS_PER_BATCH):
+    """Reconstruye el histórico (o un rango) por lotes de días. Retorna los grupos escritos"""
+    queryset = M_sale_order.objects.all()
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    days = list(queryset.order_by('date').values_list('date', flat=True).distinct())
+
+    # Días que ya no tienen cotizaciones
+    stale = M_sale_order_daily_summary.objects.filter(~Exists(M_sale_order.objects.filter(date=OuterRef('day'))))
+    if date_from:
+        stale = stale.filter(day__gte=date_from)
+    if date_to:
+        stale = stale.filter(day__lte=date_to)
+    stale.delete()
+
+    written = 0
+    for start in range(0, len(days), batch_days):
+        written += refresh_sale_order_daily_summary(days[start:start + batch_days])
+    return written
+
+
+@shared_task
+def refresh_recent_sale_order_summary_task(days=None):
+    """
+    Tarea programada: recalcula los últimos SALE_ORDER_SUMMARY_REFRESH_DAYS días.
+    Corrige cambios que no pasan por señales (queryset.update(), cargas masivas).
+    """
+    days = getattr(settings, 'SALE_ORDER_SUMMARY_REFRESH_DAYS', 7) if days is None else days
+    date_from = timezone.localdate() - datetime.timedelta(days=days)
+    written = rebuild_sale_order_daily_summary(date_from=date_from)
+    logger.info(f"Resumen diario de cotizaciones recalculado desde {date_from}: {written} grupos")
+    return f"Grupos del resumen diario recalculados: {written}"
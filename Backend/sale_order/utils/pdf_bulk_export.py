@@ -0,0 +1,243 @@
+"""
+Exportación en ZIP de los PDF de cotizaciones.
+
+La vista registra la exportación (M_quotation_export) y la encola; la genera
+build_quotation_export_task en el worker de Celery, escribiendo el ZIP a un archivo
+temporal que luego se guarda en el storage. Los workers de gunicorn no generan PDF ni
+crean procesos, y la descarga del archivo terminado se entrega por partes (FileResponse).
+
+El comando export_quotations_pdf puede generar los PDF con un pool de procesos (--workers);
+el pool solo se usa desde ese comando, nunca dentro de una petición ni de una tarea de Celery
+(los procesos del worker de Celery no pueden crear procesos hijos).
+"""
+import datetime
+import logging
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.db import connections
+from django.utils import timezone
+from sale_order.models.quotation_export import M_quotation_export
+from sale_order.models.sale_order import M_sale_order
+
+
+logger = logging.getLogger(__name__)
+
+# Procesos que usa el comando por defecto y cuántos PDF puede haber en memoria por proceso
+QUOTATION_EXPORT_WORKERS = 2
+QUOTATION_EXPORT_PENDING_PER_WORKER = 2
+
+
+def filter_sale_orders_for_export(state=None, date_from=None, date_to=None, city=None):
+    """Cotizaciones a exportar según estado, rango de fechas (date) y ciudad"""
+    queryset = M_sale_order.objects.all()
+    if state:
+        queryset = queryset.filter(state=state)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if city:
+        queryset = queryset.filter(city__iexact=city)
+    return queryset.order_by('id')
+
+
+def _init_export_worker():
+    """Inicializa Django en el proceso hijo (necesario cuando el pool usa 'spawn')"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _render_quotation_pdf_worker(sale_order_id):
+    """
+    Retorna (nombre, contenido) del PDF.
+    Usa el PDF guardado en cache si existe; si no, lo genera con ReportLab y lo guarda.
+    """
+    from sale_order.utils.pdf_cache import get_cached_quotation_pdf
+
+    sale_order = M_sale_order.objects.get(id=sale_order_id)
+    pdf_file = get_cached_quotation_pdf(sale_order)
+    try:
+        return f'cotizacion_{sale_order.code}.pdf', pdf_file.read()
+    finally:
+        pdf_file.close()
+
+
+def _render_quotation_pdfs_in_process(sale_order_ids):
+    for sale_order_id in sale_order_ids:
+        try:
+            filename, content = _render_quotation_pdf_worker(sale_order_id)
+            yield sale_order_id, filename, content, None
+        except Exception as e:
+            logger.error(f"Error generando el PDF de la cotización {sale_order_id}: {e}")
+            yield sale_order_id, None, None, str(e)
+
+
+def _render_quotation_pdfs_in_pool(sale_order_ids, workers):
+    sale_order_ids = iter(sale_order_ids)
+    max_pending = max(1, workers * QUOTATION_EXPORT_PENDING_PER_WORKER)
+
+    # Las conexiones abiertas no se deben compartir con los procesos hijos
+    connections.close_all()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_export_worker) as executor:
+        pending = deque()
+
+        def submit_next():
+            for sale_order_id in sale_order_ids:
+                pending.append((sale_order_id, executor.submit(_render_quotation_pdf_worker, sale_order_id)))
+                return True
+            return False
+
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        while pending:
+            sale_order_id, future = pending.popleft()
+            try:
+                filename, content = future.result()
+                yield sale_order_id, filename, content, None
+            except Exception as e:
+                logger.error(f"Error generando el PDF de la cotización {sale_order_id}: {e}")
+                yield sale_order_id, None, None, str(e)
+            submit_next()
+
+
+def render_quotation_pdfs(sale_order_ids, workers=1):
+    """
+    Entrega tuplas (sale_order_id, nombre, contenido o None, error o None) en el mismo orden
+    de sale_order_ids. Con workers > 1 usa un pool de procesos con pocas tareas pendientes a la
+    vez, así la memoria no crece con la cantidad de cotizaciones (solo desde el comando).
+    """
+    if workers > 1:
+        return _render_quotation_pdfs_in_pool(sale_order_ids, workers)
+    return _render_quotation_pdfs_in_process(sale_order_ids)
+
+
+def write_quotations_zip(sale_order_ids, output, workers=1):
+    """
+    Escribe en output (archivo binario) un ZIP con los PDF de las cotizaciones.
+    Cada PDF se agrega apenas está listo. Retorna (pdf agregados, errores).
+    """
+    errors = []
+    used_names = set()
+    written = 0
+
+    with zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for sale_order_id, filename, content, error in render_quotation_pdfs(sale_order_ids, workers):
+            if error is not None:
+                errors.append(f'{sale_order_id}: {error}')
+                continue
+
+            if filename in used_names:
+                filename = f'{filename[:-4]}_{sale_order_id}.pdf'
+            used_names.add(filename)
+
+            zip_file.writestr(filename, content)
+            written += 1
+
+        if errors:
+            zip_file.writestr('errores.txt', '\n'.join(errors))
+
+    return written, len(errors)
+
+
+def get_export_filename(export):
+    state = export.filters.get('state') or 'todas'
+    return f"cotizaciones_{state}_{timezone.localdate(export.created_at).isoformat()}.zip"
+
+
+def create_quotation_export(user, filters):
+    """Registra la exportación y la encola. Si no hay broker la marca como fallida"""
+    export = M_quotation_export.objects.create(user=user, filters=filters)
+    try:
+        build_quotation_export_task.delay(str(export.id))
+    except Exception as e:
+        logger.error(f"No se pudo encolar la exportación de cotizaciones {export.id}: {e}")
+        export.status = 'failed'
+        export.error = 'No se pudo encolar la exportación'
+        export.finished_at = timezone.now()
+        export.save(update_fields=['status', 'error', 'finished_at'])
+    return export
+
+
+def get_export_time_limit():
+    """Segundos que puede durar la tarea de una exportación"""
+    return getattr(settings, 'QUOTATION_EXPORT_TIME_LIMIT_MINUTES', 30) * 60
+
+
+def build_quotation_export(export):
+    """Genera el ZIP de una exportación y lo guarda en el storage"""
+    export.status = 'running'
+    export.started_at = timezone.now()
+    export.save(update_fields=['status', 'started_at'])
+
+    filters = export.filters
+    queryset = filter_sale_orders_for_export(
+        state=filters.get('state'),
+        date_from=filters.get('date_from'),
+        date_to=filters.get('date_to'),
+        city=filters.get('city'),
+    )
+    sale_order_ids = list(queryset.values_list('id', flat=True))
+
+    try:
+        with tempfile.TemporaryFile() as output:
+            written, errors = write_quotations_zip(sale_order_ids, output)
+            output.seek(0)
+            export.file.save(get_export_filename(export), File(output), save=False)
+    except Exception as e:
+        logger.error(f"Error generando la exportación de cotizaciones {export.id}: {e}")
+        export.status = 'failed'
+        export.error = str(e)[:1000]
+        export.finished_at = timezone.now()
+        export.save(update_fields=['status', 'error', 'finished_at'])
+        return export
+
+    export.status = 'done'
+    export.quotations = written
+    export.errors = errors
+    export.finished_at = timezone.now()
+    export.save(update_fields=['status', 'file', 'quotations', 'errors', 'finished_at'])
+    return export
+
+
+@shared_task(time_limit=get_export_time_limit())
+def build_quotation_export_task(export_id):
+    try:
+        export = M_quotation_export.objects.get(id=export_id, status='pending')
+    except M_quotation_export.DoesNotExist:
+        return f"Exportación {export_id} no encontrada o ya procesada"
+    export = build_quotation_export(export)
+    return f"Exportación {export_id}: {export.status}, {export.quotations} PDF"
+
+
+def fail_stale_quotation_exports():
+    """
+    Marca como fallidas las exportaciones 'running' que superaron el límite de la tarea: el worker
+    murió o la tarea se canceló por time_limit sin llegar a actualizar el estado.
+    """
+    now = timezone.now()
+    limit = now - datetime.timedelta(seconds=get_export_time_limit())
+    return M_quotation_export.objects.filter(status='running', started_at__lt=limit).update(
+        status='failed', error='La exportación no terminó a tiempo', finished_at=now
+    )
+
+
+@shared_task
+def purge_quotation_exports_task():
+    """
+    Marca como fallidas las exportaciones interrumpidas y elimina las viejas; los ZIP se borran
+    con la cola de archivos
+    """
+    failed = fail_stale_quotation_exports()
+    hours = getattr(settings, 'QUOTATION_EXPORT_RETENTION_HOURS', 24)
+    limit = timezone.now() - datetime.timedelta(hours=hours)
+    deleted, _ = M_quotation_export.objects.filter(created_at__lt=limit).delete()
+    return f"Exportaciones de cotizaciones interrumpidas: {failed}, eliminadas: {deleted}"
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from sale_order.models.sale_order import M_sale_order
+from sale_order.utils.pdf_reportlab import generate_sale_order_pdf_reportlab
+
+
+logger = logging.getLogger(__name__)
+
+# Carpeta (dentro del storage por defecto) donde se guardan los PDF ya generados
+QUOTATION_PDF_CACHE_DIR = 'quotations_cache'
+
+# Subir este valor cuando cambie el diseño de pdf_reportlab para invalidar todos los PDF guardados
+QUOTATION_PDF_TEMPLATE_VERSION = 1
+
+# Campos de M_sale_order que usa generate_sale_order_pdf_reportlab
+QUOTATION_PDF_FIELDS = (
+    'code', 'city', 'date', 'fecha_cotizacion', 'name', 'type_identification', 'identification',
+    'proyect_type', 'system_type', 'power_required', 'panel_type', 'number_panels', 'Type_installation',
+    'total_quotation', 'description', 'description_2', 'Validity_offer', 'payment_type',
+    'Delivery_deadline', 'Warranty',
+    'solar_panels', 'solar_panels_price',
+    'Assembly_structures', 'Assembly_structures_price',
+    'Wiring_and_cabinet', 'Wiring_and_cabinet_price',
+    'Legalization_and_designs', 'Legalization_and_designs_price',
+    'batterys', 'batterys_price',
+    'investors', 'investors_price',
+    'Kit_5kw', 'Kit_5kw_price',
+    'Kit_8kw', 'Kit_8kw_price',
+    'Kit_12kw', 'Kit_12kw_price',
+    'Kit_15kw', 'Kit_15kw_price',
+    'Kit_30kw', 'Kit_30kw_price',
+    'Transport', 'Transport_price',
+    'workforce', 'workforce_price',
+    'Microinverters', 'Microinverters_price',
+)
+
+
+def get_quotation_pdf_hash(sale_order):
+    """Hash del contenido que termina en el PDF; si no cambia, el PDF guardado sigue siendo válido"""
+    content = [QUOTATION_PDF_TEMPLATE_VERSION]
+    content.extend(getattr(sale_order, field, None) for field in QUOTATION_PDF_FIELDS)
+    raw = json.dumps(content, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def get_quotation_pdf_dir(sale_order_id):
+    return f'{QUOTATION_PDF_CACHE_DIR}/{sale_order_id}'
+
+
+def get_quotation_pdf_path(sale_order):
+    return f'{get_quotation_pdf_dir(sale_order.id)}/{get_quotation_pdf_hash(sale_order)}.pdf'
+
+
+def render_quotation_pdf(sale_order):
+    """Genera el PDF con ReportLab y lo guarda en el storage. Retorna la ruta guardada"""
+    path = get_quotation_pdf_path(sale_order)
+    pdf_file = generate_sale_order_pdf_reportlab(sale_order)
+    try:
+        content = pdf_file.read()
+    finally:
+        pdf_file.close()
+
+    # Otro proceso pudo haberlo generado mientras tanto; el contenido es el mismo
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(content))
+    return path
+
+
+def get_cached_quotation_pdf(sale_order):
+    """
+    Retorna el PDF de la cotización abierto en modo binario.
+    Si ya existe uno para el contenido actual se sirve desde el storage sin usar ReportLab.
+    """
+    path = get_quotation_pdf_path(sale_order)
+    if not default_storage.exists(path):
+        path = render_quotation_pdf(sale_order)
+    return default_storage.open(path, 'rb')
+
+
+def invalidate_quotation_pdf(sale_order_id, keep=None):
+    """Elimina los PDF guardados de una cotización, excepto el archivo `keep` (nombre) si se indica"""
+    directory = get_quotation_pdf_dir(sale_order_id)
+    try:
+        _, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return 0
+
+    deleted = 0
+    for filename in files:
+        if filename == keep:
+            continue
+        try:
+            default_storage.delete(f'{directory}/{filename}')
+            deleted += 1
+        except OSError as e:
+            logger.warning(f"No se pudo eliminar el PDF en cache {directory}/{filename}: {e}")
+    return deleted
+
+
+def quotation_pdf_prerender_enabled():
+    return getattr(settings, 'QUOTATION_PDF_PRERENDER', False)
+
+
+@shared_task
+def prerender_quotation_pdf(sale_order_id):
+    """Genera el PDF en segundo plano después de crear/actualizar una cotización"""
+    try:
+        sale_order = M_sale_order.objects.get(id=sale_order_id)
+    except M_sale_order.DoesNotExist:
+        return
+
+    path = get_quotation_pdf_path(sale_order)
+    if not default_storage.exists(path):
+        render_quotation_pdf(sale_order)
@@ -9,126 +9,224 @@ from reportlab.lib.units import inch
 from django.core.files import File
 from django.conf import settings
 import io
+import logging
 import os
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+# Textos legales fijos de la propuesta (no dependen de la cotización)
+ANOTACION_TEXTO = """Al realizar este proyecto usted tendrá el derecho a deducir su renta, en un periodo no mayor a 15 años, contados a partir del año gravable siguiente en el que haya entrado en operación la inversión, el 50% del total de la inversión realizada; tal como el artículo 11 de la Ley 1715 de 2014."""
+
+CONFIDENCIALIDAD_TEXTO = """<b>CONFIDENCIALIDAD:</b> Para proteger los derechos de las partes, sobre la respectiva información propiedad de ésta o sus afiliadas, se acuerda: Sin el previo consentimiento por escrito de la parte que revela información, la otra no divulgará, proveerá o suministrará, ninguna parte de la información, propiedad de la relevante o de sus empresas afiliadas, en ninguna forma, ni a ninguna persona, excepto a sus empleados, funcionarios, o directores, cuyo acceso a la información propiedad de la parte reveladora o de alguna de sus afiliadas, sea necesario para permitir la ejecución del presente oferta. Las partes se comprometen a tomar las medidas razonables y las mismas precauciones protectoras que usan para proteger su propia información, de cualquier divulgación a terceros."""
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+X_MARGIN = 50
+PARAGRAPH_WIDTH = PAGE_WIDTH - 2 * X_MARGIN
+
+ALIGNMENTS = {
+    'justify': TA_JUSTIFY,
+    'center': TA_CENTER,
+    'right': TA_RIGHT,
+    'left': TA_LEFT,
+}
+
+
+def get_image_path(filename):
+    """Ruta de una imagen estática: STATIC_ROOT (collectstatic) o, si no existe, static/ del proyecto"""
+    static_root = getattr(settings, 'STATIC_ROOT', None)
+    if static_root:
+        path = os.path.join(static_root, 'img', filename)
+        if os.path.exists(path):
+            return path
+    return os.path.join(settings.BASE_DIR, 'static', 'img', filename)
+
+
+def load_image_reader(filename):
+    path = get_image_path(filename)
+    if not os.path.exists(path):
+        return None
+    try:
+        reader = ImageReader(path)
+        # Decodificar una sola vez; los siguientes PDF reutilizan los datos
+        reader.getRGBData()
+        return reader
+    except Exception as e:
+        logger.warning(f"Error cargando {filename}: {e}")
+        return None
+
+
+class PdfResources:
+    """
+    Recursos de la plantilla que no dependen de la cotización: estilos, imágenes y párrafos legales.
+    Se construyen una vez por proceso y se comparten entre todos los PDF generados.
+    """
+
+    def __init__(self):
+        self.primary_blue = HexColor('#1e3a8a')
+        self.styles = getSampleStyleSheet()
+
+        # Estilo para texto justificado normal
+        self.justified_style = ParagraphStyle(
+            'Justified',
+            parent=self.styles['Normal'],
+            alignment=TA_JUSTIFY,
+            fontSize=10,
+            leading=14,
+            spaceAfter=6,
+            leftIndent=0,
+            rightIndent=0
+        )
+
+        # Estilo para texto justificado en negrita
+        self.justified_bold_style = ParagraphStyle(
+            'JustifiedBold',
+            parent=self.styles['Normal'],
+            alignment=TA_JUSTIFY,
+            fontSize=10,
+            leading=14,
+            spaceAfter=6,
+            fontName='Helvetica-Bold',
+            leftIndent=0,
+            rightIndent=0
+        )
+
+        # Estilo para títulos centrados
+        self.title_style = ParagraphStyle(
+            'Title',
+            parent=self.styles['Normal'],
+            alignment=TA_CENTER,
+            fontSize=18,
+            leading=22,
+            fontName='Helvetica-Bold',
+            textColor=self.primary_blue,
+            spaceAfter=12
+        )
+
+        # Estilo para subtítulos
+        self.subtitle_style = ParagraphStyle(
+            'Subtitle',
+            parent=self.styles['Normal'],
+            alignment=TA_LEFT,
+            fontSize=16,
+            leading=20,
+            fontName='Helvetica-Bold',
+            textColor=HexColor('#222222'),
+            spaceAfter=10
+        )
+
+        self.custom_styles = {}
+        self.custom_styles_lock = threading.Lock()
+
+        self.logo = load_image_reader('Logo.png')
+        self.firma = load_image_reader('Firma.png')
+
+        # Párrafos legales ya divididos en líneas para el ancho de la página: (párrafo, alto)
+        self.anotacion = self.build_paragraph(ANOTACION_TEXTO, self.justified_style)
+        self.confidencialidad = self.build_paragraph(CONFIDENCIALIDAD_TEXTO, self.justified_style)
+
+    def build_paragraph(self, text, style):
+        paragraph = Paragraph(text, style)
+        height = paragraph.wrap(PARAGRAPH_WIDTH, PAGE_HEIGHT)[1]
+        return paragraph, height
+
+    def get_custom_style(self, bold, size, color, align):
+        """Estilo de párrafo para una combinación de negrita/tamaño/color/alineación, creado una sola vez"""
+        key = (bold, size, color.hexval(), align)
+        style = self.custom_styles.get(key)
+        if style is None:
+            with self.custom_styles_lock:
+                style = self.custom_styles.get(key)
+                if style is None:
+                    style = ParagraphStyle(
+                        f'Custom_{len(self.custom_styles)}',
+                        parent=self.styles['Normal'],
+                        alignment=ALIGNMENTS.get(align, TA_LEFT),
+                        fontSize=size,
+                        leading=size + 4,
+                        fontName='Helvetica-Bold' if bold else 'Helvetica',
+                        textColor=color,
+                        spaceAfter=6
+                    )
+                    self.custom_styles[key] = style
+        return style
+
+
+_pdf_resources = None
+_pdf_resources_lock = threading.Lock()
+
+
+def get_pdf_resources():
+    """Registro de recursos del proceso; se crea en la primera llamada (o en warm_pdf_resources)"""
+    global _pdf_resources
+    if _pdf_resources is None:
+        with _pdf_resources_lock:
+            if _pdf_resources is None:
+                _pdf_resources = PdfResources()
+    return _pdf_resources
+
+
+def warm_pdf_resources():
+    """
+    Construye los recursos por adelantado. Llamado desde wsgi.py: con gunicorn --preload
+    se ejecuta en el proceso maestro y los workers los heredan al hacer fork.
+    """
+    return get_pdf_resources()
+
+
+def reset_pdf_resources():
+    """Descarta los recursos (p.ej. después de cambiar Logo.png/Firma.png o en benchmarks)"""
+    global _pdf_resources
+    with _pdf_resources_lock:
+        _pdf_resources = None
+
 
 def generate_sale_order_pdf_reportlab(sale_order):
     """
     Genera PDF de propuesta comercial con texto justificado
     Mantiene todos los párrafos, secciones y estructura del template original
     """
-    
-    # Rutas de imágenes
-    try:
-        if hasattr(settings, 'STATIC_ROOT') and settings.STATIC_ROOT:
-            logo_path = os.path.join(settings.STATIC_ROOT, 'img', 'Logo.png')
-            firma_path = os.path.join(settings.STATIC_ROOT, 'img', 'Firma.png')
-        else:
-            logo_path = os.path.join(settings.BASE_DIR, 'static', 'img', 'Logo.png')
-            firma_path = os.path.join(settings.BASE_DIR, 'static', 'img', 'Firma.png')
-    except:
-        logo_path = os.path.join(settings.BASE_DIR, 'static', 'img', 'Logo.png')
-        firma_path = os.path.join(settings.BASE_DIR, 'static', 'img', 'Firma.png')
+    resources = get_pdf_resources()
 
     buffer = io.BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    x_margin = 50
+    width, height = PAGE_WIDTH, PAGE_HEIGHT
+    x_margin = X_MARGIN
     y = height - 50
 
     # Colores exactos del HTML
-    primary_blue = HexColor('#1e3a8a')
+    primary_blue = resources.primary_blue
     secondary_blue = HexColor('#3b82f6')
     gray_color = HexColor('#888888')
     light_gray = HexColor('#e5e7eb')
     table_bg_even = HexColor('#f8fafc')
     total_row_bg = HexColor('#f1f5f9')
 
-    # Crear estilos para texto justificado
-    styles = getSampleStyleSheet()
-    
-    # Estilo para texto justificado normal
-    justified_style = ParagraphStyle(
-        'Justified',
-        parent=styles['Normal'],
-        alignment=TA_JUSTIFY,
-        fontSize=10,
-        leading=14,
-        spaceAfter=6,
-        leftIndent=0,
-        rightIndent=0
-    )
-    
-    # Estilo para texto justificado en negrita
-    justified_bold_style = ParagraphStyle(
-        'JustifiedBold',
-        parent=styles['Normal'],
-        alignment=TA_JUSTIFY,
-        fontSize=10,
-        leading=14,
-        spaceAfter=6,
-        fontName='Helvetica-Bold',
-        leftIndent=0,
-        rightIndent=0
-    )
-    
-    # Estilo para títulos centrados
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Normal'],
-        alignment=TA_CENTER,
-        fontSize=18,
-        leading=22,
-        fontName='Helvetica-Bold',
-        textColor=primary_blue,
-        spaceAfter=12
-    )
-    
-    # Estilo para subtítulos
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        alignment=TA_LEFT,
-        fontSize=16,
-        leading=20,
-        fontName='Helvetica-Bold',
-        textColor=HexColor('#222222'),
-        spaceAfter=10
-    )
+    justified_style = resources.justified_style
+    justified_bold_style = resources.justified_bold_style
 
-    def draw_text_justified(text, style=justified_style, bold=False, size=10, color=black, align='justify'):
-        """Función helper para dibujar texto justificado usando Paragraph"""
+    def draw_paragraph(para, para_height):
+        """Dibuja un párrafo ya dividido en líneas, con salto de página si no cabe"""
         nonlocal y
-        
-        # Crear estilo personalizado si es necesario
-        if bold or size != 10 or color != black or align != 'justify':
-            custom_style = ParagraphStyle(
-                'Custom',
-                parent=styles['Normal'],
-                alignment=TA_JUSTIFY if align == 'justify' else (TA_CENTER if align == 'center' else (TA_RIGHT if align == 'right' else TA_LEFT)),
-                fontSize=size,
-                leading=size + 4,
-                fontName='Helvetica-Bold' if bold else 'Helvetica',
-                textColor=color,
-                spaceAfter=6
-            )
-            style = custom_style
-        
-        # Crear párrafo
-        para = Paragraph(text, style)
-        
-        # Calcular espacio necesario
-        para_width = width - 2 * x_margin
-        para_height = para.wrap(para_width, height)[1]
-        
-        # Verificar si necesita salto de página
         if y - para_height < 50:
             p.showPage()
             y = height - 50
-        
-        # Dibujar párrafo
+
         para.drawOn(p, x_margin, y - para_height)
         y -= para_height + 6
 
+    def draw_text_justified(text, style=justified_style, bold=False, size=10, color=black, align='justify'):
+        """Función helper para dibujar texto justificado usando Paragraph"""
+        # Usar estilo personalizado (compartido entre PDF) si es necesario
+        if bold or size != 10 or color != black or align != 'justify':
+            style = resources.get_custom_style(bold, size, color, align)
+
+        para = Paragraph(text, style)
+        para_height = para.wrap(PARAGRAPH_WIDTH, height)[1]
+        draw_paragraph(para, para_height)
+
     def draw_text(text, bold=False, size=10, spacing=14, color=black, align='left'):
         """Función helper para dibujar texto simple (sin justificar)"""
         nonlocal y
@@ -217,12 +315,12 @@ def generate_sale_order_pdf_reportlab(sale_order):
 
     # === HEADER ===
     # Logo
-    if os.path.exists(logo_path):
+    if resources.logo is not None:
         try:
-            p.drawImage(ImageReader(logo_path), x_margin, y - 60,
+            p.drawImage(resources.logo, x_margin, y - 60,
                        width=180, preserveAspectRatio=True, mask='auto')
         except Exception as e:
-            print(f"Error cargando logo: {e}")
+            logger.warning(f"Error cargando logo: {e}")
 
     # NIT
     p.setFont("Helvetica-Bold", 14)
@@ -410,10 +508,8 @@ def generate_sale_order_pdf_reportlab(sale_order):
     check_page_break(150)
     draw_section_title("4. ANOTACIÓN IMPORTANTE:")
 
-    # Texto completo de la anotación justificado
-    anotacion_texto = """Al realizar este proyecto usted tendrá el derecho a deducir su renta, en un periodo no mayor a 15 años, contados a partir del año gravable siguiente en el que haya entrado en operación la inversión, el 50% del total de la inversión realizada; tal como el artículo 11 de la Ley 1715 de 2014."""
-    
-    draw_text_justified(anotacion_texto, justified_style)
+    # Texto completo de la anotación justificado (párrafo precompilado)
+    draw_paragraph(*resources.anotacion)
 
     # === SECCIÓN 5: NOTAS ACLARATORIAS ===
     check_page_break(300)
@@ -423,10 +519,8 @@ def generate_sale_order_pdf_reportlab(sale_order):
     validez_texto = f"<b>VALIDEZ DE LA OFERTA:</b> La oferta es válida por {getattr(sale_order, 'Validity_offer', 'quince (15)')} días calendario."
     draw_text_justified(validez_texto, justified_bold_style)
 
-    # Confidencialidad (texto justificado)
-    confidencialidad_texto = """<b>CONFIDENCIALIDAD:</b> Para proteger los derechos de las partes, sobre la respectiva información propiedad de ésta o sus afiliadas, se acuerda: Sin el previo consentimiento por escrito de la parte que revela información, la otra no divulgará, proveerá o suministrará, ninguna parte de la información, propiedad de la relevante o de sus empresas afiliadas, en ninguna forma, ni a ninguna persona, excepto a sus empleados, funcionarios, o directores, cuyo acceso a la información propiedad de la parte reveladora o de alguna de sus afiliadas, sea necesario para permitir la ejecución del presente oferta. Las partes se comprometen a tomar las medidas razonables y las mismas precauciones protectoras que usan para proteger su propia información, de cualquier divulgación a terceros."""
-
-    draw_text_justified(confidencialidad_texto, justified_style)
+    # Confidencialidad (texto justificado, párrafo precompilado)
+    draw_paragraph(*resources.confidencialidad)
 
     # === SECCIÓN FINAL ===
     check_page_break(200)
@@ -447,12 +541,12 @@ def generate_sale_order_pdf_reportlab(sale_order):
     check_page_break(150)
 
     # Firma
-    if os.path.exists(firma_path):
+    if resources.firma is not None:
         try:
-            p.drawImage(ImageReader(firma_path), x_margin, y - 160,
+            p.drawImage(resources.firma, x_margin, y - 160,
                        width=180, preserveAspectRatio=True, mask='auto')
         except Exception as e:
-            print(f"Error cargando firma: {e}")
+            logger.warning(f"Error cargando firma: {e}")
 
     y -= 50
 
@@ -103,7 +103,7 @@ class V_attach_sale_order_list(ListAPIView):
         # Filtrar por id de oferta si se proporciona
         if sale_order is not None and sale_order != "":
             queryset = queryset.filter(sale_order_id=sale_order)
-            return queryset
+        return queryset
     
     def get(self, request, *args, **kwargs): #overwrite functoin get to change the default
         queryset = self.get_queryset()
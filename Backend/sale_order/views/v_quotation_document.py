@@ -6,7 +6,7 @@ from django.http import FileResponse, Http404, JsonResponse
 from sale_order.models.sale_order import M_sale_order
 from sale_order.models.attach_sale_order import M_attach_sale_order
 import logging
-from sale_order.utils.pdf_reportlab import generate_sale_order_pdf_reportlab
+from sale_order.utils.pdf_cache import get_cached_quotation_pdf
 from django.shortcuts import get_object_or_404
 
 
@@ -73,5 +73,6 @@ class DebugAttachSaleOrderView(APIView):
     
 def quotation_pdf_native_view(request, cotizacion_id):
     sale_order = get_object_or_404(M_sale_order, pk=cotizacion_id)
-    pdf_buffer = generate_sale_order_pdf_reportlab(sale_order)
-    return FileResponse(pdf_buffer, as_attachment=True, filename=f"cotizacion_{sale_order.code}.pdf")
\ No newline at end of file
+    # Se sirve el PDF guardado si el contenido de la cotización no ha cambiado
+    pdf_file = get_cached_quotation_pdf(sale_order)
+    return FileResponse(pdf_file, as_attachment=True, filename=f"cotizacion_{sale_order.code}.pdf")
\ No newline at end of file
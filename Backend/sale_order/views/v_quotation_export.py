@@ -0,0 +1,103 @@
+from datetime import date
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from sale_order.models.quotation_export import M_quotation_export
+from sale_order.models.sale_order import M_sale_order
+from sale_order.utils.pdf_bulk_export import create_quotation_export, filter_sale_orders_for_export, get_export_filename
+
+
+def export_status(export):
+    return {
+        'export_id': str(export.id),
+        'status': export.status,
+        'filters': export.filters,
+        'quotations': export.quotations,
+        'errors': export.errors,
+        'error': export.error,
+        'created_at': export.created_at,
+        'started_at': export.started_at,
+        'finished_at': export.finished_at,
+        'status_url': f'/api/quotations_pdf/export/{export.id}/',
+        'download_url': f'/api/quotations_pdf/export/{export.id}/download/' if export.status == 'done' else None,
+    }
+
+
+class V_quotation_pdf_export(APIView):
+    """
+    Solicita la exportación en ZIP de los PDF de las cotizaciones filtradas.
+    El ZIP se genera en Celery (sale_order/utils/pdf_bulk_export.py); la respuesta trae la URL
+    para consultar el estado y, cuando termina, la de descarga.
+    Parámetros: state=aprobado&date_from=2025-01-01&date_to=2025-01-31&city=Santa Marta
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        params = request.data or request.query_params
+        state = params.get('state') or None
+        city = params.get('city') or None
+
+        valid_states = [choice[0] for choice in M_sale_order.state_choices]
+        if state and state not in valid_states:
+            return Response(
+                {"error": "invalid filter", "messages": f"Estado inválido. Opciones: {', '.join(valid_states)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_from = date.fromisoformat(params['date_from']) if params.get('date_from') else None
+            date_to = date.fromisoformat(params['date_to']) if params.get('date_to') else None
+        except ValueError:
+            return Response(
+                {"error": "invalid filter", "messages": "Las fechas deben tener formato YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = filter_sale_orders_for_export(state=state, date_from=date_from, date_to=date_to, city=city)
+        if not queryset.exists():
+            return Response({"message": "No results found."}, status=status.HTTP_404_NOT_FOUND)
+
+        filters = {
+            'state': state,
+            'date_from': date_from.isoformat() if date_from else None,
+            'date_to': date_to.isoformat() if date_to else None,
+            'city': city,
+        }
+        export = create_quotation_export(request.user, filters)
+        if export.status == 'failed':
+            return Response(
+                {"error": "export unavailable", "messages": export.error, **export_status(export)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(export_status(export), status=status.HTTP_202_ACCEPTED)
+
+
+class V_quotation_pdf_export_status(APIView):
+    """Estado de una exportación (pending, running, done, failed)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, export_id):
+        export = get_object_or_404(M_quotation_export, id=export_id)
+        return Response(export_status(export), status=status.HTTP_200_OK)
+
+
+class V_quotation_pdf_export_download(APIView):
+    """Descarga el ZIP de una exportación terminada; el archivo se envía por partes"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, export_id):
+        export = get_object_or_404(M_quotation_export, id=export_id)
+        if export.status != 'done' or not export.file:
+            return Response(
+                {"error": "export not ready", **export_status(export)},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=get_export_filename(export),
+            content_type='application/zip',
+        )
@@ -4,12 +4,16 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
 from sale_order.models.sale_order import M_sale_order
-from sale_order.serializers.sz_sale_order import sz_sale_order, sz_sale_order_retrive, sz_sale_order_list
+from sale_order.serializers.sz_sale_order import sz_sale_order, sz_sale_order_retrive, sz_sale_order_list, sale_order_retrive_queryset
 
 from django.db.models import F, Q
 from django.db import transaction
 from function.paginator import Limit_paginator
+from function.response_cache import Cached_response_mixin, cache_tag
 from sale_order.models.attach_sale_order import M_attach_sale_order
+from sale_order.utils.attachments import apply_sale_order_attachment_changes, parse_list_param
+from function.delta_sync import deferred_delta_sync
+from function.file_deletion import deferred_file_deletions
 from sale_order.models.comentary_sale_order import M_comentary_sale_order
 from proyect.models.proyect import M_proyect
 from notifications.utils.notifications_ut import notify_sale_order_status_change  # <--- Importa la utilidad
@@ -73,41 +77,65 @@ class V_sale_order_list(ListAPIView):
                 Q(state__startswith=query)
             )
         return queryset
-    
+
     def get(self, request, *args, **kwargs): #overwrite functoin get to change the default
+        # Proyección de columnas: ?fields=code,state,... o ?view=summary
+        try:
+            fields = sz_sale_order_list.resolve_fields(
+                request.query_params.get('fields', None),
+                request.query_params.get('view', None),
+            )
+        except ValueError as e:
+            return Response({"error": "invalid projection", "messages": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         queryset = self.get_queryset()
+        serializer_kwargs = {}
+        if fields is not None:
+            # Solo se leen de la base de datos las columnas solicitadas
+            queryset = queryset.only(*fields)
+            serializer_kwargs['fields'] = fields
 
-        if not queryset.exists(): #if not exists data retur message error
-            return Response({"message": "No results found."}, status=status.HTTP_200_OK)
-        
+        # No se consulta exists(): la página vacía indica que no hay resultados
         page = self.paginate_queryset(queryset) #asing function paginate_queryset with the queryset if valid the size of data
 
         if page is not None: #if page asing and return the queryset paginate
-            serializer = self.get_serializer(page, many=True)
+            if not page:
+                return Response({"message": "No results found."}, status=status.HTTP_200_OK)
+
+            serializer = self.get_serializer(page, many=True, **serializer_kwargs)
             data = serializer.data
 
             return self.get_paginated_response(data)
 
-        serializer = self.get_serializer(queryset, many=True) #if queryset not valid size for paginated return queryset initial in serializer
+        serializer = self.get_serializer(queryset, many=True, **serializer_kwargs) #if queryset not valid size for paginated return queryset initial in serializer
         data = serializer.data
 
+        if not data:
+            return Response({"message": "No results found."}, status=status.HTTP_200_OK)
+
         return Response(data, status=status.HTTP_200_OK)
-    
 
-    
-class V_sale_order_retrive(RetrieveAPIView): #class retrieve return response witch data filter for pk in request
+
+
+class V_sale_order_retrive(Cached_response_mixin, RetrieveAPIView): #class retrieve return response witch data filter for pk in request
     permission_classes = [AllowAny]
     model_class = M_sale_order
-    queryset = model_class.objects.all()
+    # Comentarios, adjuntos y visita técnica precargados: número fijo de consultas
+    queryset = sale_order_retrive_queryset()
     serializer_class = sz_sale_order_retrive
     
+    def get_cache_tags(self, request, *args, **kwargs):
+        # Los cambios en adjuntos, comentarios y visita técnica también invalidan esta etiqueta (signals.py)
+        return [cache_tag('sale_order', kwargs.get('pk'))]
+    
     def retrieve(self, request, *args, **kwargs):
         try:
             sale_order_id = kwargs.get('pk')
             logger.info(f"Attempting to retrieve sale_order with ID: {sale_order_id}")
             
-            # Verificar primero si la oferta existe
-            if not M_sale_order.objects.filter(id=sale_order_id).exists():
+            try:
+                instance = self.get_object()
+            except Http404:
                 logger.warning(f"Sale order with ID {sale_order_id} not found")
                 return Response(
                     {
@@ -117,8 +145,7 @@ class V_sale_order_retrive(RetrieveAPIView): #class retrieve return response wit
                     }, 
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            instance = self.get_object()
+
             logger.info(f"Found sale_order: {instance.code} (ID: {instance.id})")
             
             # Verificar si tiene technical_visit_id
@@ -162,200 +189,28 @@ class V_sale_order_update(UpdateAPIView): #class update have request post with d
     serializer_class = sz_sale_order_retrive
     
     def update(self, request, *args, **kwargs):
-        print("--------- DATOS DE LA SOLICITUD ---------")
-        print("Método:", request.method)
-        print("Content-Type:", request.content_type)
-        print("DATA:", request.data)
-        print("FILES:", request.FILES)
-        print("archivos_a_eliminar:", request.data.get('archivos_a_eliminar'))
-        print("------------------------------------------")
-        
         instance = self.get_object()
-        old_state = instance.state  
+        old_state = instance.state
+        logger.info(
+            f"Actualizando cotización {instance.pk}: campos={list(request.data.keys())}, "
+            f"archivos={[f'{name}:{uploaded.name}' for name, uploaded in request.FILES.items()]}"
+        )
 
-        # Depurar los datos recibidos para actualización
-        print("Datos recibidos en UPDATE:")
-        for key, value in request.data.items():
-            print(f"  - Campo: {key}, Valor: {value}")
+        # Datos de la cotización y adjuntos en una sola transacción. Si se revierte, los archivos
+        # ya subidos quedan sin referencia y los recupera media_gc (function/media_gc.py)
+        with transaction.atomic():
+            serializer = self.get_serializer(instance, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
 
-        # Añadir depuración para ver qué archivos se reciben
-        print("Archivos recibidos en UPDATE:")
-        for field_name, file_obj in request.FILES.items():
-            print(f"  - Campo: {field_name}, Archivo: {file_obj.name}, Tamaño: {file_obj.size}")
-        
-        # Primero actualizamos la instancia con los datos recibidos
-        serializer = self.get_serializer(instance, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-    
-        # Después de la actualización, procesamos los archivos adjuntos
-        if hasattr(request, 'FILES') and request.FILES:
-            # Procesamos primero la hoja de cálculo para implementar la lógica de reemplazo
-            # Verificamos si estamos recibiendo una hoja de cálculo
-            hoja_calculo_fields = ['hojaCalculo', 'hoja_calculo']
-            for field_name in hoja_calculo_fields:
-                if field_name in request.FILES:
-                    files = request.FILES.getlist(field_name)
-                    for archivo in files:
-                        print(f"Procesando hoja de cálculo: {archivo.name}")
-                        content_type = archivo.content_type
-                        if len(content_type) > 100:  # Ajustamos a 100 para mayor flexibilidad
-                            content_type = content_type[:100]
-                        
-                        is_calculation_sheet = True
-                        name = f"Hoja de Cálculo - {archivo.name}"
-                        
-                        # Buscar y eliminar hojas de cálculo anteriores
-                        old_sheets = M_attach_sale_order.objects.filter(
-                            sale_order_id=instance,
-                            is_calculation_sheet=True
-                        )
-                        
-                        if old_sheets.exists():
-                            print(f"Eliminando {old_sheets.count()} hojas de cálculo anteriores")
-                            for old_sheet in old_sheets:
-                                try:
-                                    # Eliminar el archivo físico
-                                    if old_sheet.attach:
-                                        if old_sheet.attach.storage.exists(old_sheet.attach.name):
-                                            old_sheet.attach.delete()
-                                    # Eliminar el registro de la BD
-                                    old_sheet.delete()
-                                    print(f"Hoja de cálculo anterior eliminada: {old_sheet.name}")
-                                except Exception as e:
-                                    print(f"Error al eliminar hoja de cálculo anterior: {str(e)}")
-                        
-                        # Crear el registro del archivo adjunto
-                        try:
-                            attachment = M_attach_sale_order.objects.create(
-                                attach=archivo,
-                                sale_order_id=instance,
-                                name=name,
-                                size=str(archivo.size),
-                                content_type=content_type,
-                                is_calculation_sheet=True
-                            )
-                            print(f"Nueva hoja de cálculo guardada correctamente: {name}, ID: {attachment.id}")
-                        except Exception as e:
-                            print(f"Error al guardar hoja de cálculo {name}: {str(e)}")
-        
-            # Procesamos archivos adjuntos generales
-            for field_name in ['archivos_adjuntos', 'archivos_generales']:
-                if field_name in request.FILES:
-                    files = request.FILES.getlist(field_name)
-                    for archivo in files:
-                        print(f"Procesando archivo adjunto general: {archivo.name}")
-                        content_type = archivo.content_type
-                        if len(content_type) > 100:
-                            content_type = content_type[:100]
-                        
-                        # Crear el registro del archivo adjunto
-                        try:
-                            attachment = M_attach_sale_order.objects.create(
-                                attach=archivo,
-                                sale_order_id=instance,
-                                name=archivo.name,
-                                size=str(archivo.size),
-                                content_type=content_type,
-                                is_calculation_sheet=False
-                            )
-                            print(f"Archivo adjunto general guardado correctamente: {archivo.name}, ID: {attachment.id}")
-                        except Exception as e:
-                            print(f"Error al guardar archivo adjunto general {archivo.name}: {str(e)}")
-                        
-        # Procesamos la eliminación explícita de la hoja de cálculo si se solicita
-        if request.data.get('eliminar_hoja_calculo') == 'true':
-            print("Se solicitó eliminar la hoja de cálculo")
-            old_sheets = M_attach_sale_order.objects.filter(
-                sale_order_id=instance,
-                is_calculation_sheet=True
+            apply_sale_order_attachment_changes(
+                instance,
+                request.FILES,
+                delete_calculation_sheet=request.data.get('eliminar_hoja_calculo') == 'true',
+                delete_ids=parse_list_param(request.data.get('archivos_a_eliminar'), cast=int),
+                delete_names=parse_list_param(request.data.get('archivos_nombres_eliminar')),
             )
-            
-            if old_sheets.exists():
-                print(f"Eliminando {old_sheets.count()} hojas de cálculo")
-                for old_sheet in old_sheets:
-                    try:
-                        # Eliminar el archivo físico
-                        if old_sheet.attach:
-                            if old_sheet.attach.storage.exists(old_sheet.attach.name):
-                                old_sheet.attach.delete()
-                        # Eliminar el registro de la BD
-                        old_sheet.delete()
-                        print(f"Hoja de cálculo eliminada: {old_sheet.name}")
-                    except Exception as e:
-                        print(f"Error al eliminar hoja de cálculo: {str(e)}")
-            else:
-                print("No se encontraron hojas de cálculo para eliminar")
-                
-        # Procesamos la eliminación de archivos adjuntos específicos si se solicita
-        archivos_a_eliminar = request.data.get('archivos_a_eliminar')
-        if archivos_a_eliminar:
-            try:
-                import json
-                # Intentamos interpretar como JSON si es string
-                if isinstance(archivos_a_eliminar, str):
-                    try:
-                        archivos_ids = json.loads(archivos_a_eliminar)
-                    except:
-                        archivos_ids = [int(archivos_a_eliminar)]
-                else:
-                    archivos_ids = archivos_a_eliminar
-                
-                print(f"IDs de archivos a eliminar: {archivos_ids}")
-                # Eliminar los archivos específicos
-                for archivo_id in archivos_ids:
-                    try:
-                        archivo = M_attach_sale_order.objects.get(id=archivo_id)
-                        if archivo.attach:
-                            if archivo.attach.storage.exists(archivo.attach.name):
-                                archivo.attach.delete()
-                        archivo.delete()
-                        print(f"Archivo eliminado correctamente: ID={archivo_id}")
-                    except M_attach_sale_order.DoesNotExist:
-                        print(f"No se encontró el archivo con ID={archivo_id}")
-                    except Exception as e:
-                        print(f"Error al eliminar archivo con ID={archivo_id}: {str(e)}")
-            except Exception as e:
-                print(f"Error al procesar archivos_a_eliminar: {str(e)}")
-        
-        # Nuevo: Procesamos la eliminación de archivos por nombre si se proporcionan nombres
-        archivos_nombres_eliminar = request.data.get('archivos_nombres_eliminar')
-        if archivos_nombres_eliminar:
-            try:
-                import json
-                # Intentamos interpretar como JSON si es string
-                if isinstance(archivos_nombres_eliminar, str):
-                    try:
-                        nombres_archivos = json.loads(archivos_nombres_eliminar)
-                    except:
-                        nombres_archivos = [archivos_nombres_eliminar]
-                else:
-                    nombres_archivos = archivos_nombres_eliminar
-                
-                print(f"Nombres de archivos a eliminar: {nombres_archivos}")
-                
-                # Buscar y eliminar archivos por nombre
-                for nombre in nombres_archivos:
-                    try:
-                        archivos = M_attach_sale_order.objects.filter(
-                            sale_order_id=instance,
-                            name=nombre
-                        )
-                        
-                        if archivos.exists():
-                            for archivo in archivos:
-                                if archivo.attach:
-                                    if archivo.attach.storage.exists(archivo.attach.name):
-                                        archivo.attach.delete()
-                                archivo.delete()
-                                print(f"Archivo eliminado por nombre: {nombre}")
-                        else:
-                            print(f"No se encontró archivo con nombre: {nombre}")
-                    except Exception as e:
-                        print(f"Error al eliminar archivo por nombre {nombre}: {str(e)}")
-            except Exception as e:
-                print(f"Error al procesar archivos_nombres_eliminar: {str(e)}")
-                    
+
         # Refrescamos la instancia para obtener los datos actualizados
         instance.refresh_from_db()
         new_state = instance.state
@@ -394,20 +249,11 @@ class V_sale_order_delete(DestroyAPIView): # Clase para eliminar ofertas
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Usamos transacción para asegurar que todo se elimina o nada
-            with transaction.atomic():
+            # Usamos transacción para asegurar que todo se elimina o nada.
+            # Los archivos físicos se encolan y los elimina el worker al confirmar (function/file_deletion.py)
+            with transaction.atomic(), deferred_file_deletions(), deferred_delta_sync():
                 # 1. Primero eliminamos los archivos adjuntos relacionados
-                attachments = M_attach_sale_order.objects.filter(sale_order_id=sale_order_id)
-                for attachment in attachments:
-                    # Si queremos eliminar también los archivos físicos:
-                    if attachment.attach:
-                        try:
-                            if attachment.attach.storage.exists(attachment.attach.name):
-                                attachment.attach.delete()
-                        except Exception as e:
-                            print(f"Error al eliminar archivo físico: {str(e)}")
-                # Eliminamos todos los registros de attachments de una vez
-                attachments.delete()
+                M_attach_sale_order.objects.filter(sale_order_id=sale_order_id).delete()
                 
                 # 2. Eliminamos los comentarios relacionados
                 M_comentary_sale_order.objects.filter(sale_order_id=sale_order_id).delete()
@@ -0,0 +1,71 @@
+from datetime import date
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from function.response_cache import Cached_response_mixin, cache_tag
+from sale_order.utils.analytics import (
+    ANALYTICS_DIMENSIONS,
+    SUMMARY_DIMENSIONS,
+    get_daily_summary_analytics,
+    get_sale_order_analytics,
+)
+from sale_order.utils.daily_summary import SUMMARY_CACHE_TAG
+
+
+class V_sale_order_analytics_base(APIView):
+    """
+    Totales, cantidades y tasas de aprobación/conversión de las cotizaciones, agrupados.
+    Parámetros: ?group_by=state,month&date_from=2025-01-01&date_to=2025-12-31
+    Dimensiones: state, city, system_type, proyect_type, month, cotizador
+    """
+    permission_classes = [IsAuthenticated]
+    dimensions = ANALYTICS_DIMENSIONS
+    default_group_by = 'state'
+
+    def get_results(self, group_by, date_from, date_to):
+        return get_sale_order_analytics(group_by, date_from=date_from, date_to=date_to)
+
+    def get(self, request):
+        params = request.query_params
+        group_by = [name.strip() for name in params.get('group_by', self.default_group_by).split(',') if name.strip()]
+        invalid = [name for name in group_by if name not in self.dimensions]
+        if not group_by or invalid:
+            return Response(
+                {"error": "invalid group_by", "messages": f"Opciones: {', '.join(self.dimensions)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_from = date.fromisoformat(params['date_from']) if params.get('date_from') else None
+            date_to = date.fromisoformat(params['date_to']) if params.get('date_to') else None
+        except ValueError:
+            return Response(
+                {"error": "invalid filter", "messages": "Las fechas deben tener formato YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(self.get_results(list(dict.fromkeys(group_by)), date_from, date_to))
+
+
+class V_sale_order_analytics(Cached_response_mixin, V_sale_order_analytics_base):
+    def get_cache_tags(self, request, *args, **kwargs):
+        # Cualquier cotización o proyecto (conversión) modificado invalida el resultado
+        return [cache_tag('sale_order'), cache_tag('proyect')]
+
+
+class V_sale_order_summary_analytics(Cached_response_mixin, V_sale_order_analytics_base):
+    """
+    Indicadores desde el resumen diario materializado (sin recorrer sale_order).
+    Parámetros: ?group_by=year,state&date_from=2023-01-01&date_to=2025-12-31
+    Dimensiones: day, month, year, state, city, system_type
+    """
+    dimensions = SUMMARY_DIMENSIONS
+    default_group_by = 'month'
+
+    def get_results(self, group_by, date_from, date_to):
+        return get_daily_summary_analytics(group_by, date_from=date_from, date_to=date_to)
+
+    def get_cache_tags(self, request, *args, **kwargs):
+        # Se invalida cada vez que se recalcula el resumen
+        return [SUMMARY_CACHE_TAG]
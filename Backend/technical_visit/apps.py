@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TechnicalVisitConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'technical_visit'
+
+    def ready(self):
+        """Importar las señales cuando la aplicación esté lista"""
+        import technical_visit.signals
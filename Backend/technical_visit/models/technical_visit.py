@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from .technical_question import M_technical_question
+from function.indexes import PREFIX_INDEX_LENGTH, upper_prefix_index
 from function.validators import only_lters_for_names, only_numbers, only_letters_numbers_symbols
 
 class M_technical_visit(models.Model):
@@ -39,6 +40,16 @@ class M_technical_visit(models.Model):
 
     class Meta:
         db_table = 'thechnical_visit'  
+        # Índices para búsquedas por prefijo (LIKE 'texto%'); en PostgreSQL usan *_pattern_ops.
+        # Nombre, ciudad y descripción se buscan sin distinguir mayúsculas (function/indexes.py);
+        # de la descripción (TextField sin límite) solo se indexan los primeros caracteres
+        indexes = [
+            models.Index(fields=['code'], name='tech_visit_code_like_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['N_identification'], name='tech_visit_nid_like_idx', opclasses=['varchar_pattern_ops']),
+            upper_prefix_index('name', name='tech_visit_name_upper_idx'),
+            upper_prefix_index('city', name='tech_visit_city_upper_idx'),
+            upper_prefix_index('description_more', name='tech_visit_desc_upper_idx', length=PREFIX_INDEX_LENGTH),
+        ]
 
     def __str__(self):
         return f'{self.code}'
\ No newline at end of file
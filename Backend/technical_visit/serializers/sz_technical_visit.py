@@ -76,8 +76,9 @@ class sz_technical_visit(serializers.ModelSerializer):
         return data
     
     def get_evidence_photos(self, obj):
-        evidence_photos = obj.evidence_photos.all()
-        if evidence_photos.exists():
+        # Se evalúa una sola vez (aprovecha prefetch_related si existe)
+        evidence_photos = list(obj.evidence_photos.all())
+        if evidence_photos:
             serializer = sz_evidence_photo(evidence_photos, many=True, context=self.context)
             return serializer.data
         return []
@@ -281,8 +282,9 @@ class sz_technical_visit_list(serializers.ModelSerializer):
         return obj.get_concept_visit_display()
         
     def get_evidence_photos(self, obj):
-        evidence_photos = obj.evidence_photos.all()
-        if evidence_photos.exists():
+        # Se evalúa una sola vez (aprovecha prefetch_related si existe)
+        evidence_photos = list(obj.evidence_photos.all())
+        if evidence_photos:
             serializer = sz_evidence_photo(evidence_photos, many=True, context=self.context)
             return serializer.data
         return []
@@ -320,8 +322,9 @@ class sz_technical_visit_retrive(serializers.ModelSerializer):
         ]
         
     def get_evidence_photos(self, obj):
-        evidence_photos = obj.evidence_photos.all()
-        if evidence_photos.exists():
+        # Se evalúa una sola vez (aprovecha prefetch_related si existe)
+        evidence_photos = list(obj.evidence_photos.all())
+        if evidence_photos:
             serializer = sz_evidence_photo(evidence_photos, many=True, context=self.context)
             return serializer.data
         return []
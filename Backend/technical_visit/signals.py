@@ -0,0 +1,21 @@
+from technical_visit.models.technical_visit import M_technical_visit
+from technical_visit.models.evidence_photo import M_evidence_photo
+from technical_visit.models.technical_question import M_technical_question
+from function.file_deletion import register_file_cleanup
+from function.response_cache import cache_tag, connect_cache_tags
+
+
+# Cache de respuestas (function/response_cache.py): cada cambio invalida la visita y los listados
+connect_cache_tags(M_technical_visit, lambda instance: [
+    cache_tag('technical_visit', instance.pk), cache_tag('technical_visit')
+])
+connect_cache_tags(M_evidence_photo, lambda instance: [
+    cache_tag('technical_visit', instance.technical_visit_id), cache_tag('technical_visit')
+])
+connect_cache_tags(M_technical_question, lambda instance: [
+    *[cache_tag('technical_visit', visit_id) for visit_id in instance.visit.values_list('id', flat=True)],
+    cache_tag('technical_visit')
+])
+
+# Las fotos de evidencia eliminadas se borran del storage en segundo plano (function/file_deletion.py)
+register_file_cleanup(M_evidence_photo)
@@ -5,7 +5,9 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from technical_visit.models.technical_visit import M_technical_visit
 from technical_visit.serializers.sz_technical_visit import sz_technical_visit, sz_technical_visit_list, sz_technical_visit_retrive
 from django.db.models import F, Q
+from function.indexes import upper_prefix_search
 from function.paginator import Limit_paginator
+from function.response_cache import Cached_response_mixin, cache_tag
 import logging
 import random
 from django.db import transaction
@@ -117,9 +119,11 @@ class V_technical_visit_list(ListAPIView):
             queryset = queryset.filter(user_id=user_id)
 
         if query is not None and query != "":
-            queryset = queryset.filter(
+            # La descripción se busca por el prefijo indexado (UPPER(SUBSTRING(...)), ver function/indexes.py)
+            annotations, description_condition = upper_prefix_search('description_more', query)
+            queryset = queryset.annotate(**annotations).filter(
                 Q(code__startswith=query) |
-                Q(description_more__startswith=query)
+                description_condition
             )
         return queryset
     
@@ -142,12 +146,15 @@ class V_technical_visit_list(ListAPIView):
 
         return Response(data, status=status.HTTP_200_OK)
     
-class V_technical_visit_retrive(RetrieveAPIView): #class retrieve return response witch data filter for pk in request
+class V_technical_visit_retrive(Cached_response_mixin, RetrieveAPIView): #class retrieve return response witch data filter for pk in request
     permission_classes = [AllowAny]
     model_class = M_technical_visit
     queryset = model_class.objects.all()
     serializer_class = sz_technical_visit_retrive
     
+    def get_cache_tags(self, request, *args, **kwargs):
+        return [cache_tag('technical_visit', kwargs.get('pk'))]
+    
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request